@@ -9,12 +9,14 @@ AI多媒体推荐系统
 
 import os
 import sys
-import shutil
 import json
+import zipfile
+import threading
+from collections import OrderedDict
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 from werkzeug.utils import secure_filename
 
 # 添加backend路径到sys.path
@@ -23,25 +25,113 @@ sys.path.insert(0, os.path.join(BASE_DIR, 'backend'))
 
 # 导入核心模块
 from backend.core.keyword_extractor import extract_keywords_from_folder
-from backend.core.resource_searcher import search_all_resources, clean_extracted_content, clean_title
-from backend.core.recommender import recommend_best_resources, save_recommended_resources
+from backend.core.resource_searcher import search_all_resources
+from backend.core.recommender import recommend_best_resources, render_recommended_resources
+from backend.core.idf_model import load_idf_model
+from backend.core.ai_summarizer import (
+    SUMMARY_STRATEGIES as DEFAULT_SUMMARY_STRATEGIES,
+    new_summary_memo,
+    generate_resource_summaries,
+    configure_summary_cache
+)
 from backend.utils.file_utils import (
-    count_txt_files,
-    count_pdf_files,
-    extract_zip,
-    create_output_zip,
-    sanitize_filename,
-    convert_all_pdfs_to_txt,
-    cleanup_user_data
+    iter_zip_stream,
+    iter_zip_stream_from_entries,
+    append_job_results,
+    load_job_results,
+    save_job_checkpoint,
+    load_job_checkpoint,
+    job_checkpoint_fingerprint,
+    file_sha256,
+    configure_pdf_cache,
+    ingest_zip,
+    save_upload_stream,
+    save_corpus_manifest,
+    load_corpus_manifest,
+    iter_corpus_documents,
+    read_corpus_texts
+)
+from backend.utils.cleanup_worker import (
+    start_cleanup_worker,
+    schedule_cleanup,
+    schedule_job_cleanup,
+    cancel_job_cleanup,
+    discard_path,
+    add_job_cleanup_hook,
+    mark_job_active,
+    mark_job_inactive
+)
+from backend.utils.job_manager import (
+    JOB_HISTORY_MAX,
+    JobQueueFull,
+    configure_job_manager,
+    submit_job,
+    get_job,
+    find_job,
+    get_job_events,
+    job_status,
+    iter_job_events
 )
 
 # 配置路径
 UPLOAD_DIR = os.path.join(BASE_DIR, "data", "uploads")
 RESULTS_DIR = os.path.join(BASE_DIR, "data", "results")
 OUTPUT_DIR = os.path.join(BASE_DIR, "data", "outputs")
+# 每个任务的搜索/推荐结果记录在 results/{任务}/ 下的一个JSON Lines文件中，
+# 下载时才按 类型/序号_标题.txt 的布局生成zip，不再每个资源写一个小文件
+JOB_RESULTS_FILE = "results.jsonl"
+# 处理完成后延迟多久删除上传数据（秒）
+CLEANUP_DELAY_SECONDS = 0.5
+# 上传/结果/输出数据的保留时间（秒），超过后即使没有下载或手动清理也会被后台删除
+DATA_TTL_SECONDS = 6 * 3600
+# 后台扫描过期数据的间隔（秒）
+CLEANUP_SWEEP_INTERVAL = 10 * 60
+# 同时运行的处理任务数；排队任务数上限（超过后 /process 返回503）
+JOB_WORKERS = 2
+JOB_QUEUE_MAX_DEPTH = 8
+# 内存中保留摘要记录的任务数上限（与任务管理保留的已结束任务数一致）
+JOB_SUMMARIES_MAX = JOB_HISTORY_MAX
+# 队列满时建议客户端多久后重试（秒）
+JOB_RETRY_AFTER_SECONDS = 30
+# SSE连接在没有进度事件时发送心跳的间隔（秒）
+SSE_HEARTBEAT_SECONDS = 15
+# 流水线检查点格式版本（阶段输出格式或处理参数变化时递增，旧检查点自动作废）
+PIPELINE_CHECKPOINT_VERSION = 1
+# 保存检查点的流水线阶段（按执行顺序）
+PIPELINE_STAGES = ("keywords", "search", "recommend", "summaries")
+# 增量关键词状态（同一语料重复上传时只处理新增/修改的文档）
+KEYWORD_STATE_DIR = os.path.join(BASE_DIR, "data", "keyword_state")
+# 增量关键词状态跨任务保留（同名语料再次上传时只对新增文档分词），超过保留时间未使用的由后台清理线程删除
+KEYWORD_STATE_TTL_SECONDS = 30 * 24 * 3600
+# 背景IDF模型（离线构建: python -m backend.core.idf_model data/idf_model data/keyword_state，
+# 语料来自跨任务保留的增量关键词状态）
+IDF_MODEL_DIR = os.path.join(BASE_DIR, "data", "idf_model")
+# AI摘要磁盘缓存（按资源URL/内容哈希、类型、提示词版本和模型复用，LRU淘汰）
+SUMMARY_CACHE_DIR = os.path.join(BASE_DIR, "data", "summary_cache")
+SUMMARY_CACHE_MAX_BYTES = 50 * 1024 * 1024
+# 摘要打包：每个API请求包含的同类型资源数（1表示每个资源单独请求）
+SUMMARY_PACK_SIZE = 5
+# 各资源类型的摘要策略（取值见 ai_summarizer.SUMMARY_STRATEGIES），这里只覆盖与默认不同的类型：
+# 代码资源优先用本地抽取式摘要（不调用API）
+SUMMARY_STRATEGIES = dict(DEFAULT_SUMMARY_STRATEGIES, code="extractive")
+
+# PDF转换：每个PDF最多提取的页数和字符数（关键词提取和相似度计算只需要有代表性的文本）
+PDF_MAX_PAGES = 300
+PDF_MAX_CHARS = 1500000
+# PDF转换缓存（按PDF内容的SHA-256复用转换结果，同一份讲义只转换一次，LRU淘汰）
+PDF_CACHE_DIR = os.path.join(BASE_DIR, "data", "pdf_cache")
+PDF_CACHE_MAX_BYTES = 500 * 1024 * 1024
+# PDF转换缓存保存的是用户文档的文本，超过保留时间未被复用的条目由后台清理线程删除
+PDF_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+# 下载打包方式：ZIP_DEFLATED 压缩（体积小，适合慢网络）；ZIP_STORED 不压缩直接打包（CPU开销最小）
+DOWNLOAD_ZIP_COMPRESSION = zipfile.ZIP_DEFLATED
+
+# 上传目录中的语料清单（/upload 从zip建立，/process 据此读取文档）
+CORPUS_MANIFEST = "corpus.json"
 
 # 确保目录存在
-for dir_path in [UPLOAD_DIR, RESULTS_DIR, OUTPUT_DIR]:
+for dir_path in [UPLOAD_DIR, RESULTS_DIR, OUTPUT_DIR, KEYWORD_STATE_DIR]:
     os.makedirs(dir_path, exist_ok=True)
 
 # 创建Flask应用
@@ -53,60 +143,55 @@ app = Flask(
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max file size
 app.config['UPLOAD_FOLDER'] = UPLOAD_DIR
 
+# 启动时以内存映射方式加载背景IDF模型（未构建时为None，各任务仍按自身文档计算IDF）
+IDF_MODEL = load_idf_model(IDF_MODEL_DIR)
+
+# 启用摘要缓存和PDF转换缓存
+configure_summary_cache(SUMMARY_CACHE_DIR, max_bytes=SUMMARY_CACHE_MAX_BYTES)
+configure_pdf_cache(PDF_CACHE_DIR, max_bytes=PDF_CACHE_MAX_BYTES)
+# 用户数据由后台清理线程统一删除，请求线程只负责入队
+start_cleanup_worker(BASE_DIR, ttl_seconds=DATA_TTL_SECONDS, sweep_interval=CLEANUP_SWEEP_INTERVAL,
+                     cache_dirs={PDF_CACHE_DIR: PDF_CACHE_TTL_SECONDS, KEYWORD_STATE_DIR: KEYWORD_STATE_TTL_SECONDS})
+# /process 的处理流水线在固定大小的工作线程池中运行
+configure_job_manager(workers=JOB_WORKERS, max_queue_depth=JOB_QUEUE_MAX_DEPTH)
+
+# 每个任务的推荐资源和摘要记录：{folder_name: {"resources": {resource_id: (资源, 类型)}, "memo": ...}}
+# 摘要在首次访问（或 /summary 按需请求）时生成，同一任务内每个资源只生成一次。
+# 任务结果数据被清理（下载、手动清理、过期）时删除记录；最多保留 JOB_SUMMARIES_MAX 个任务，超过后淘汰最早登记的
+JOB_SUMMARIES = OrderedDict()
+JOB_SUMMARIES_LOCK = threading.Lock()
+
+
+def register_job_summaries(folder_name: str, job_summaries: dict):
+    """登记任务的摘要记录（同名任务覆盖旧记录）"""
+    with JOB_SUMMARIES_LOCK:
+        JOB_SUMMARIES.pop(folder_name, None)
+        JOB_SUMMARIES[folder_name] = job_summaries
+        while len(JOB_SUMMARIES) > JOB_SUMMARIES_MAX:
+            JOB_SUMMARIES.popitem(last=False)
+
+
+def forget_job_summaries(folder_name: str):
+    """删除任务的摘要记录"""
+    with JOB_SUMMARIES_LOCK:
+        JOB_SUMMARIES.pop(folder_name, None)
+
+
+# 任务结果数据被删除时一并删除内存中的摘要记录
+add_job_cleanup_hook(forget_job_summaries)
+
+
+def job_results_path(folder_name: str) -> str:
+    """任务结果文件路径（搜索结果和推荐结果都记录在这一个JSON Lines文件中）"""
+    return os.path.join(RESULTS_DIR, folder_name, JOB_RESULTS_FILE)
+
 
 def save_search_results(all_resources: dict, folder_name: str):
-    """将搜索结果保存到 results/{folder_name}/ 下的子文件夹"""
-    result_folder = os.path.join(RESULTS_DIR, folder_name)
-    os.makedirs(result_folder, exist_ok=True)
-    
-    # 为每种类型创建子文件夹并保存
-    for resource_type, resources in all_resources.items():
-        type_folder = os.path.join(result_folder, resource_type)
-        os.makedirs(type_folder, exist_ok=True)
-        
-        for i, res in enumerate(resources):
-            if resource_type == "txt":
-                # 清理标题
-                cleaned_title = clean_title(res.get('title', 'resource'))
-                filename = f"{i+1}_{sanitize_filename(cleaned_title)[:50]}.txt"
-                filepath = os.path.join(type_folder, filename)
-                content = res.get("content", "")
-                # 清理内容：移除联系方式、部门信息等无关内容
-                cleaned_content = clean_extracted_content(content)
-                metadata = f"Source: {res.get('source', 'Unknown')}\n"
-                metadata += f"URL: {res.get('url', '')}\n"
-                metadata += "\n" + "="*50 + "\n\n"
-                with open(filepath, "w", encoding="utf-8") as f:
-                    f.write(metadata + cleaned_content)
-            
-            elif resource_type == "video":
-                # 清理标题
-                cleaned_title = clean_title(res.get('title', 'video'))
-                filename = f"{i+1}_{sanitize_filename(cleaned_title)[:50]}.txt"
-                filepath = os.path.join(type_folder, filename)
-                content = f"Title: {cleaned_title}\n"
-                content += f"URL: {res.get('url', '')}\n"
-                description = res.get('description', '')
-                if description:
-                    content += f"Description: {description}\n"
-                if res.get("thumbnail"):
-                    content += f"Thumbnail: {res.get('thumbnail')}\n"
-                with open(filepath, "w", encoding="utf-8") as f:
-                    f.write(content)
-            
-            elif resource_type == "code":
-                # 清理标题
-                cleaned_title = clean_title(res.get('title', 'code'))
-                filename = f"{i+1}_{sanitize_filename(cleaned_title)[:50]}.txt"
-                filepath = os.path.join(type_folder, filename)
-                content = f"Title: {cleaned_title}\n"
-                content += f"URL: {res.get('url', '')}\n"
-                content += f"Source: {res.get('source', 'Unknown')}\n"
-                description = res.get('description', '')
-                if description:
-                    content += f"Description: {description}\n"
-                with open(filepath, "w", encoding="utf-8") as f:
-                    f.write(content)
+    """将搜索结果写入任务结果文件（新任务开始时覆盖旧结果）"""
+    store_path = job_results_path(folder_name)
+    if os.path.exists(store_path):
+        os.remove(store_path)
+    append_job_results(store_path, "search", all_resources)
 
 
 # ==================== 路由 ====================
@@ -237,59 +322,59 @@ def contact():
 @app.route("/upload", methods=["POST"])
 def upload_folder():
     """上传文件夹（通过zip文件）"""
-    if 'folder' not in request.files:
+    # 流式保存上传的zip：按块写入磁盘并同时计算内容哈希，不在内存或临时文件中缓冲整个请求体
+    upload = save_upload_stream(request.stream, request.content_type, UPLOAD_DIR, field_name="folder")
+    if upload is None:
         return jsonify({"error": "没有上传文件"}), 400
     
-    file = request.files['folder']
-    if file.filename == '':
-        return jsonify({"error": "文件名为空"}), 400
-    
-    if not file.filename.lower().endswith('.zip'):
+    filename = upload["filename"]
+    if filename == '' or not filename.lower().endswith('.zip'):
+        os.remove(upload["path"])
+        if filename == '':
+            return jsonify({"error": "文件名为空"}), 400
         return jsonify({"error": "请上传zip格式的文件夹"}), 400
     
-    folder_name = secure_filename(file.filename.replace('.zip', ''))
+    folder_name = secure_filename(filename.replace('.zip', ''))
     upload_path = os.path.join(UPLOAD_DIR, folder_name)
+    # 同名任务重新上传：取消旧任务尚未执行的清理
+    cancel_job_cleanup(folder_name)
     os.makedirs(upload_path, exist_ok=True)
     
-    zip_path = os.path.join(upload_path, file.filename)
-    file.save(zip_path)
+    zip_path = os.path.join(upload_path, secure_filename(filename))
+    os.replace(upload["path"], zip_path)
     
-    extract_path = os.path.join(upload_path, "extracted")
-    os.makedirs(extract_path, exist_ok=True)
-    
-    if not extract_zip(zip_path, extract_path):
-        return jsonify({"error": "解压失败"}), 400
-    
-    # 统计原始文件数量（转换前）
-    pdf_count = count_pdf_files(extract_path)
-    
-    # 统计原始txt文件数量（不包括PDF转换后的txt和macOS系统文件）
-    original_txt_count = 0
-    for root, dirs, files in os.walk(extract_path):
-        for f in files:
-            # 过滤掉macOS资源分叉文件（以._开头）和其他系统隐藏文件
-            if f.startswith('._') or f.startswith('.DS_Store'):
-                continue
-            if f.lower().endswith('.txt') and not f.lower().endswith('_pdf.txt'):
-                original_txt_count += 1
-    
-    conversion_result = {"success_count": 0, "failed_count": 0}
+    # 同一任务重新上传内容完全相同的zip时，直接复用已有的语料清单
+    manifest_path = os.path.join(upload_path, CORPUS_MANIFEST)
+    previous = load_corpus_manifest(manifest_path)
+    if previous and previous.get("zip_sha256") == upload["sha256"] and previous.get("zip_path") == zip_path:
+        conversion_result = previous
+    else:
+        # 不解压：一次遍历zip完成计数，txt留在zip中，PDF从内存转换（结果保存在 converted 目录）
+        converted_dir = os.path.join(upload_path, "converted")
+        discard_path(converted_dir)
+        conversion_result = ingest_zip(zip_path, converted_dir,
+                                       max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS)
+        if conversion_result is None:
+            return jsonify({"error": "解压失败"}), 400
+        conversion_result["zip_sha256"] = upload["sha256"]
     
-    # 转换PDF文件为TXT
+    # 原始文件数量（转换前；txt不包括PDF转换后的txt和macOS系统文件）
+    pdf_count = conversion_result["pdf_count"]
+    original_txt_count = conversion_result["original_txt_count"]
     if pdf_count > 0:
-        print(f"发现目标文件，开始转换...")
-        conversion_result = convert_all_pdfs_to_txt(extract_path)
         print(f"PDF转换完成: 成功 {conversion_result['success_count']} 个, 失败 {conversion_result['failed_count']} 个")
     
     # 统计有效文件数量：原始txt + 成功转换的PDF数量
     total_valid_files = original_txt_count + conversion_result.get('success_count', 0)
     if total_valid_files < 10:
-        import shutil
-        shutil.rmtree(upload_path, ignore_errors=True)
+        schedule_cleanup([upload_path])
         return jsonify({
             "error": f"文件夹中有效的txt/pdf文件数量不足（需要至少10个，当前有{total_valid_files}个：{original_txt_count}个txt文件 + {conversion_result.get('success_count', 0)}个成功转换的PDF文件）"
         }), 400
     
+    # 保存语料清单，供 /process 直接从zip读取文档
+    save_corpus_manifest(conversion_result, manifest_path)
+    
     # 统计信息
     converted_txt = conversion_result.get('success_count', 0)
     
@@ -304,277 +389,417 @@ def upload_folder():
     })
 
 
-def send_progress_event(progress, message, step=None, details=None):
-    """发送SSE进度事件"""
-    event_data = {
+def progress_event(progress, message, step=None, details=None) -> dict:
+    """构造进度事件"""
+    return {
         "progress": progress,
         "message": message,
         "step": step,
         "details": details
     }
-    return f"data: {json.dumps(event_data, ensure_ascii=False)}\n\n"
 
 
-@app.route("/process", methods=["POST"])
-def process_folder():
-    """处理上传的文件夹（使用SSE流式返回进度）"""
-    data = request.get_json()
-    folder_name = data.get("folder_name")
-    # 从请求中获取OpenAI API key（如果前端提供了）
-    openai_api_key = data.get("openai_api_key")  # 前端传递的OpenAI API key
-    
-    if not folder_name:
-        return jsonify({"error": "缺少folder_name参数"}), 400
-    
-    upload_path = os.path.join(UPLOAD_DIR, folder_name, "extracted")
-    if not os.path.isdir(upload_path):
-        return jsonify({"error": "文件夹不存在"}), 404
-    
-    def generate():
-        try:
-            # 步骤1: 开始处理
-            yield send_progress_event(5, "🚀 开始处理文件...", "start", "正在初始化处理流程...")
-            
-            # 步骤2: 提取关键词
-            yield send_progress_event(10, "📝 正在分析文档内容，提取关键词和主题...", "extract_keywords", "正在读取文档并分析内容...")
-            keywords = extract_keywords_from_folder(upload_path, top_k=10)
+def sse_event(data: dict, event_id=None) -> str:
+    """把事件编码为一条SSE消息（带序号时写入 id 字段，浏览器重连时通过 Last-Event-ID 带回）"""
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def job_checkpoint_dir(folder_name: str) -> str:
+    """任务检查点目录（与任务结果文件放在一起，随任务数据一起清理）"""
+    return os.path.join(RESULTS_DIR, folder_name, "checkpoint")
+
+
+def job_input_fingerprint(corpus) -> str:
+    """
+    处理流水线的输入指纹：上传内容 + 影响结果的配置（检查点格式版本、背景IDF模型）。
+    重新上传不同内容或更换IDF模型后，旧检查点自动作废
+    """
+    content = corpus.get("zip_sha256") or file_sha256(corpus["zip_path"])
+    idf_version = IDF_MODEL["meta"]["built_at"] if IDF_MODEL is not None else "none"
+    return f"v{PIPELINE_CHECKPOINT_VERSION}:{content}:{idf_version}"
+
+
+def completed_checkpoint_fingerprint(folder_name: str):
+    """全部阶段都有同一次运行的检查点时返回其输入指纹，否则返回None"""
+    checkpoint_dir = job_checkpoint_dir(folder_name)
+    fingerprints = {job_checkpoint_fingerprint(checkpoint_dir, stage) for stage in PIPELINE_STAGES}
+    return fingerprints.pop() if len(fingerprints) == 1 else None
+
+
+def run_process_job(folder_name, openai_api_key, corpus, upload_path, emit, fingerprint=None):
+    """
+    处理流水线（在任务工作线程中运行）：提取关键词 → 搜索资源 → 推荐筛选 → 生成摘要，
+    每一步的进度通过 emit 发布，由 /process 或 /jobs 的订阅者转发给前端。
+
+    每个阶段完成后把输出保存为检查点；重新提交同一任务时从最后完成的阶段继续，
+    前面的阶段直接读取检查点。上传数据已被清理时（corpus 为None）
+    只能按给定的 fingerprint 完全从检查点恢复。
+    """
+    # 处理期间标记任务为活动状态，后台TTL扫描不会删除它的数据
+    mark_job_active(folder_name)
+    try:
+        # 步骤1: 开始处理
+        emit(progress_event(5, "🚀 开始处理文件...", "start", "正在初始化处理流程..."))
+        checkpoint_dir = job_checkpoint_dir(folder_name)
+        restore_only = corpus is None
+        if not restore_only:
+            fingerprint = job_input_fingerprint(corpus)
+        # 某个阶段重新计算后，之后的阶段也必须重新计算
+        resuming = [True]
+        
+        def resume_stage(stage):
+            if not resuming[0]:
+                return None
+            data = load_job_checkpoint(checkpoint_dir, stage, fingerprint)
+            if data is None:
+                if restore_only:
+                    raise RuntimeError("上传数据已清理，且没有可恢复的检查点")
+                resuming[0] = False
+            else:
+                emit({"type": "checkpoint", "stage": stage, "resumed": True})
+            return data
+        
+        def save_stage(stage, data):
+            if not restore_only:
+                save_job_checkpoint(checkpoint_dir, stage, fingerprint, data)
+        
+        # 步骤2: 提取关键词
+        emit(progress_event(10, "📝 正在分析文档内容，提取关键词和主题...", "extract_keywords", "正在读取文档并分析内容..."))
+        keywords = resume_stage("keywords")
+        if keywords is None:
+            keywords = extract_keywords_from_folder(
+                upload_path,
+                top_k=10,
+                state_path=os.path.join(KEYWORD_STATE_DIR, f"{folder_name}.pkl"),
+                idf_model=IDF_MODEL,
+                documents=iter_corpus_documents(corpus)
+            )
             if not keywords:
-                yield send_progress_event(0, "❌ 无法提取关键词", "error", "处理失败")
+                emit(progress_event(0, "❌ 无法提取关键词", "error", "处理失败"))
                 return
-            
-            yield send_progress_event(25, f"✅ 关键词提取完成，共提取 {len(keywords)} 个关键词", "keywords_extracted", f"关键词: {', '.join(keywords[:5])}...")
-            
-            # 步骤3: 搜索资源
-            yield send_progress_event(30, "🔍 开始搜索相关资源...", "search_resources", "正在搜索文本、视频和代码资源...")
-            
-            # 定义进度回调函数，实时发送搜索进度到前端
-            progress_queue = []
-            
-            def progress_callback(progress_info):
-                """进度回调函数，收集进度信息"""
-                progress_queue.append(progress_info)
-            
-            # 在后台线程中执行搜索，避免阻塞SSE流
-            import threading
-            search_result = [None]
-            search_error = [None]
-            search_done = threading.Event()
-            
-            def search_thread():
-                try:
-                    result = search_all_resources(keywords, max_per_type=20, progress_callback=progress_callback)
-                    search_result[0] = result
-                except Exception as e:
-                    search_error[0] = e
-                finally:
-                    search_done.set()
-            
-            thread = threading.Thread(target=search_thread)
-            thread.daemon = True
-            thread.start()
-            
-            # 实时发送进度信息
-            while not search_done.is_set() or progress_queue:
-                # 发送队列中的进度信息
-                while progress_queue:
-                    progress_info = progress_queue.pop(0)
-                    progress_data = {
-                        "type": "search_progress",
-                        "progress": progress_info
-                    }
-                    yield f"data: {json.dumps(progress_data, ensure_ascii=False)}\n\n"
-                
-                # 短暂休眠
-                import time
-                time.sleep(0.1)
-            
-            # 等待搜索完成
-            thread.join(timeout=300)
-            
-            if search_error[0]:
-                raise search_error[0]
-            
-            all_resources = search_result[0]
-            
-            txt_found = len(all_resources.get("txt", []))
-            video_found = len(all_resources.get("video", []))
-            code_found = len(all_resources.get("code", []))
-            
-            yield send_progress_event(50, f"📊 资源搜索完成", "resources_found", 
-                                    f"找到 {txt_found} 个文本资源, {video_found} 个视频资源, {code_found} 个代码资源")
-            
-            # 保存搜索结果
-            yield send_progress_event(55, "💾 正在保存搜索结果...", "save_results", "正在保存到本地文件...")
-            save_search_results(all_resources, folder_name)
-            yield send_progress_event(60, "✅ 搜索结果已保存", "results_saved", "")
-            
-            # 步骤4: 推荐筛选
-            yield send_progress_event(65, "🎯 开始推荐筛选...", "recommend", "正在计算相似度并筛选最佳资源...")
+            save_stage("keywords", keywords)
+        
+        emit(progress_event(25, f"✅ 关键词提取完成，共提取 {len(keywords)} 个关键词", "keywords_extracted", f"关键词: {', '.join(keywords[:5])}..."))
+        
+        # 步骤3: 搜索资源（搜索进度实时发布给前端）
+        emit(progress_event(30, "🔍 开始搜索相关资源...", "search_resources", "正在搜索文本、视频和代码资源..."))
+        all_resources = resume_stage("search")
+        if all_resources is None:
+            all_resources = search_all_resources(
+                keywords,
+                max_per_type=20,
+                progress_callback=lambda progress_info: emit({"type": "search_progress", "progress": progress_info})
+            )
+            save_stage("search", all_resources)
+        
+        txt_found = len(all_resources.get("txt", []))
+        video_found = len(all_resources.get("video", []))
+        code_found = len(all_resources.get("code", []))
+        
+        emit(progress_event(50, f"📊 资源搜索完成", "resources_found", 
+                            f"找到 {txt_found} 个文本资源, {video_found} 个视频资源, {code_found} 个代码资源"))
+        
+        # 保存搜索结果
+        emit(progress_event(55, "💾 正在保存搜索结果...", "save_results", "正在写入任务结果文件..."))
+        save_search_results(all_resources, folder_name)
+        emit(progress_event(60, "✅ 搜索结果已保存", "results_saved", ""))
+        
+        # 步骤4: 推荐筛选
+        emit(progress_event(65, "🎯 开始推荐筛选...", "recommend", "正在计算相似度并筛选最佳资源..."))
+        recommended = resume_stage("recommend")
+        if recommended is None:
             # 返回更多候选资源（最多20个），让前端可以动态调整显示数量
             recommended = recommend_best_resources(
                 upload_path,
                 all_resources,
-                top_k_per_type=20  # 返回更多候选，前端可以动态选择显示数量
+                top_k_per_type=20,  # 返回更多候选，前端可以动态选择显示数量
+                idf_model=IDF_MODEL,
+                user_docs=read_corpus_texts(corpus)
+            )
+            save_stage("recommend", recommended)
+        
+        txt_rec_count = len(recommended.get("txt", []))
+        video_rec_count = len(recommended.get("video", []))
+        code_rec_count = len(recommended.get("code", []))
+        
+        emit(progress_event(80, f"✨ 推荐筛选完成", "recommend_done", 
+                            f"推荐了 {txt_rec_count} 个文本资源, {video_rec_count} 个视频资源, {code_rec_count} 个代码资源"))
+        
+        # 步骤5: 保存推荐结果
+        emit(progress_event(85, "💾 正在保存推荐结果...", "save_recommended", "正在保存推荐资源..."))
+        append_job_results(job_results_path(folder_name), "recommended", recommended)
+        emit(progress_event(90, "✅ 推荐结果已保存", "recommended_saved", ""))
+        
+        # 步骤6: 准备返回数据
+        emit(progress_event(95, "📦 正在准备最终数据...", "prepare_data", "正在整理数据..."))
+        
+        stats = {
+            "keywords": len(keywords),
+            "txt_found": txt_found,
+            "video_found": video_found,
+            "code_found": code_found,
+            "txt_recommended": txt_rec_count,
+            "video_recommended": video_rec_count,
+            "code_recommended": code_rec_count,
+        }
+        
+        # 登记本任务的推荐资源，摘要按需生成（每个资源只生成一次）
+        job_summaries = {
+            "resources": {
+                res["resource_id"]: (res, resource_type)
+                for resource_type, resources in recommended.items()
+                for res in resources
+            },
+            "memo": new_summary_memo(),
+        }
+        # 上次已生成的摘要直接放入任务记录，不再重新生成
+        job_summaries["memo"]["results"].update(resume_stage("summaries") or {})
+        register_job_summaries(folder_name, job_summaries)
+        job_resources = list(job_summaries["resources"].values())
+        
+        # 准备推荐资源数据（用于前端展示）
+        recommended_resources = {}
+        for resource_type, resources in recommended.items():
+            recommended_resources[resource_type] = []
+            for res in resources:
+                resource_data = {
+                    "resource_id": res["resource_id"],
+                    "title": res.get("title", "无标题"),
+                    "url": res.get("url", ""),
+                    "source": res.get("source", "Unknown"),
+                    "similarity_score": res.get("similarity_score", 0.0),
+                }
+                
+                # 简介在最终结果之后生成，完成后通过 "summary" 事件按 resource_id 推送
+                resource_data["summary"] = None
+                resource_data["summary_type"] = None
+                
+                # 保留原始content用于其他用途
+                if resource_type == "txt":
+                    content = res.get("content", "")
+                    if content:
+                        resource_data["description"] = content[:200] + "..." if len(content) > 200 else content
+                elif resource_type == "video":
+                    if res.get("description"):
+                        resource_data["description"] = res.get("description")
+                    if res.get("thumbnail"):
+                        resource_data["thumbnail"] = res.get("thumbnail")
+                elif resource_type == "code":
+                    if res.get("description"):
+                        resource_data["description"] = res.get("description")
+                
+                recommended_resources[resource_type].append(resource_data)
+        
+        # 发送最终结果
+        emit({
+            "progress": 100,
+            "message": "✨ 处理完成！",
+            "step": "complete",
+            "success": True,
+            "keywords": keywords,
+            "stats": stats,
+            "recommended_resources": recommended_resources
+        })
+        
+        # 并发生成摘要（复用同一个客户端，受并发数和限速约束），每完成一个就推送一个 "summary" 事件
+        def on_summary(i, summary_result):
+            res, resource_type = job_resources[i]
+            emit({
+                "type": "summary",
+                "resource_id": res["resource_id"],
+                "resource_type": resource_type,
+                "summary": summary_result.get("summary"),
+                "summary_type": summary_result.get("summary_type") if summary_result.get("summary") else None,
+            })
+        
+        try:
+            generate_resource_summaries(
+                [res for res, _ in job_resources],
+                [resource_type for _, resource_type in job_resources],
+                openai_api_key=openai_api_key,
+                memo=job_summaries["memo"],
+                pack_size=SUMMARY_PACK_SIZE,
+                strategies=SUMMARY_STRATEGIES,
+                on_result=on_summary
             )
-            
-            txt_rec_count = len(recommended.get("txt", []))
-            video_rec_count = len(recommended.get("video", []))
-            code_rec_count = len(recommended.get("code", []))
-            
-            yield send_progress_event(80, f"✨ 推荐筛选完成", "recommend_done", 
-                                    f"推荐了 {txt_rec_count} 个文本资源, {video_rec_count} 个视频资源, {code_rec_count} 个代码资源")
-            
-            # 步骤5: 保存推荐结果
-            yield send_progress_event(85, "💾 正在保存推荐结果...", "save_recommended", "正在保存推荐资源...")
-            output_folder = os.path.join(OUTPUT_DIR, folder_name)
-            save_recommended_resources(recommended, output_folder)
-            yield send_progress_event(90, "✅ 推荐结果已保存", "recommended_saved", "")
-            
-            # 步骤6: 准备返回数据
-            yield send_progress_event(95, "📦 正在准备最终数据...", "prepare_data", "正在整理数据...")
-            
-            stats = {
-                "keywords": len(keywords),
-                "txt_found": txt_found,
-                "video_found": video_found,
-                "code_found": code_found,
-                "txt_recommended": txt_rec_count,
-                "video_recommended": video_rec_count,
-                "code_recommended": code_rec_count,
-            }
-            
-            # 准备推荐资源数据（用于前端展示）
-            from backend.core.ai_summarizer import generate_resource_summary
-            
-            recommended_resources = {}
-            for resource_type, resources in recommended.items():
-                recommended_resources[resource_type] = []
-                for res in resources:
-                    resource_data = {
-                        "title": res.get("title", "无标题"),
-                        "url": res.get("url", ""),
-                        "source": res.get("source", "Unknown"),
-                        "similarity_score": res.get("similarity_score", 0.0),
-                    }
-                    
-                    # 对所有资源类型使用AI生成简介
-                    # 传递从请求中获取的API key（如果存在）
-                    summary_result = generate_resource_summary(res, resource_type, openai_api_key=openai_api_key)
-                    if summary_result and summary_result.get("summary"):
-                        resource_data["summary"] = summary_result["summary"]
-                        resource_data["summary_type"] = summary_result.get("summary_type", "ai_generated")
-                    else:
-                        # OpenAI失败且没有fallback，不显示摘要
-                        resource_data["summary"] = None
-                        resource_data["summary_type"] = None
-                    
-                    # 保留原始content用于其他用途
-                    if resource_type == "txt":
-                        content = res.get("content", "")
-                        if content:
-                            resource_data["description"] = content[:200] + "..." if len(content) > 200 else content
-                    elif resource_type == "video":
-                        if res.get("description"):
-                            resource_data["description"] = res.get("description")
-                        if res.get("thumbnail"):
-                            resource_data["thumbnail"] = res.get("thumbnail")
-                    elif resource_type == "code":
-                        if res.get("description"):
-                            resource_data["description"] = res.get("description")
-                    
-                    recommended_resources[resource_type].append(resource_data)
-            
-            # 发送最终结果
-            final_data = {
-                "progress": 100,
-                "message": "✨ 处理完成！",
-                "step": "complete",
-                "success": True,
-                "keywords": keywords,
-                "stats": stats,
-                "recommended_resources": recommended_resources
-            }
-            yield f"data: {json.dumps(final_data, ensure_ascii=False)}\n\n"
-            
-            # 清理文件（异步，不阻塞响应）
-            import time
-            time.sleep(0.5)
-            cleanup_folder = os.path.join(UPLOAD_DIR, folder_name)
-            if os.path.exists(cleanup_folder):
-                try:
-                    shutil.rmtree(cleanup_folder)
-                except:
-                    pass
-            
-            output_cleanup = os.path.join(OUTPUT_DIR, folder_name)
-            if os.path.exists(output_cleanup):
-                try:
-                    shutil.rmtree(output_cleanup)
-                except:
-                    pass
-            
-            output_zip = os.path.join(OUTPUT_DIR, f"{folder_name}_recommended.zip")
-            if os.path.exists(output_zip):
-                try:
-                    os.remove(output_zip)
-                except:
-                    pass
-                    
         except Exception as e:
-            import traceback
-            error_data = {
-                "progress": 0,
-                "message": f"❌ 处理失败: {str(e)}",
-                "step": "error",
-                "error": str(e),
-                "traceback": traceback.format_exc()
-            }
-            yield f"data: {json.dumps(error_data, ensure_ascii=False)}\n\n"
+            print(f"摘要生成失败: {e}")
+        finally:
+            # 只保存成功生成的摘要，失败的在下次恢复时重新生成
+            save_stage("summaries", {
+                rid: result for rid, result in dict(job_summaries["memo"]["results"]).items()
+                if result.get("summary")
+            })
+        emit({"type": "summaries_done"})
+        
+        # 清理上传和输出数据（交给后台清理线程，任务结果文件保留到下载或过期）
+        schedule_job_cleanup(folder_name, delay=CLEANUP_DELAY_SECONDS,
+                             parts=("uploads", "outputs", "outputs_zip"))
+                
+    except Exception as e:
+        import traceback
+        emit({
+            "progress": 0,
+            "message": f"❌ 处理失败: {str(e)}",
+            "step": "error",
+            "error": str(e),
+            "traceback": traceback.format_exc()
+        })
+        raise
+    finally:
+        mark_job_inactive(folder_name)
+
+
+def submit_process_job(folder_name, openai_api_key):
+    """
+    校验上传数据并提交处理任务（同名任务正在排队或运行时返回该任务）
+
+    Returns:
+        (任务记录, None) 或 (None, (错误响应, 状态码))
+    """
+    existing = find_job(folder_name)
+    if existing is not None:
+        return existing, None
+    
+    # 使用语料清单直接读取zip中的文档
+    upload_path = os.path.join(UPLOAD_DIR, folder_name)
+    corpus = load_corpus_manifest(os.path.join(upload_path, CORPUS_MANIFEST))
+    fingerprint = None
+    if corpus is None:
+        # 处理完成后上传数据已清理：只要各阶段检查点齐全，仍可直接恢复结果（如连接在最后阶段断开后重试）
+        fingerprint = completed_checkpoint_fingerprint(folder_name)
+        if fingerprint is None:
+            return None, (jsonify({"error": "文件夹不存在"}), 404)
+    
+    try:
+        job = submit_job(folder_name, lambda emit: run_process_job(
+            folder_name, openai_api_key, corpus, upload_path, emit, fingerprint))
+    except JobQueueFull as e:
+        response = jsonify({"error": f"服务器繁忙，{e}，请稍后重试"})
+        response.headers["Retry-After"] = str(JOB_RETRY_AFTER_SECONDS)
+        return None, (response, 503)
+    return job, None
+
+
+def job_event_stream(job, since=0):
+    """
+    把任务的进度事件以SSE流返回（先发送任务信息，排队时提示前面的任务数）。
+    事件一发布就送达；长时间没有事件时发送SSE注释行作为心跳，防止代理断开空闲连接。
+    """
+    def generate():
+        yield sse_event({"type": "job", "job_id": job["id"], "state": job["state"]})
+        if job["state"] == "queued" and job.get("queue_position", 0) > 0 and since == 0:
+            ahead = job["queue_position"] - 1
+            yield sse_event(progress_event(0, "⏳ 任务排队中...", "queued", f"前面还有 {ahead} 个任务"))
+        for item in iter_job_events(job, since, heartbeat_interval=SSE_HEARTBEAT_SECONDS):
+            if item is None:
+                yield ": heartbeat\n\n"
+                continue
+            seq, event = item
+            yield sse_event(event, seq)
     
     return Response(
         stream_with_context(generate()),
         mimetype='text/event-stream',
         headers={
             'Cache-Control': 'no-cache',
-            'X-Accel-Buffering': 'no'
+            'X-Accel-Buffering': 'no',
+            'X-Job-Id': job["id"]
         }
     )
 
 
+@app.route("/process", methods=["POST"])
+def process_folder():
+    """提交处理任务并以SSE流式返回进度（处理在任务工作线程池中进行，队列满时返回503）"""
+    data = request.get_json()
+    folder_name = data.get("folder_name")
+    # 从请求中获取OpenAI API key（如果前端提供了）
+    openai_api_key = data.get("openai_api_key")  # 前端传递的OpenAI API key
+    
+    if not folder_name:
+        return jsonify({"error": "缺少folder_name参数"}), 400
+    
+    job, error = submit_process_job(folder_name, openai_api_key)
+    if error:
+        return error
+    return job_event_stream(job)
+
+
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    """提交处理任务，立即返回任务id（通过 /jobs/<job_id> 轮询或 /jobs/<job_id>/events 订阅进度）"""
+    data = request.get_json() or {}
+    folder_name = data.get("folder_name")
+    if not folder_name:
+        return jsonify({"error": "缺少folder_name参数"}), 400
+    
+    job, error = submit_process_job(folder_name, data.get("openai_api_key"))
+    if error:
+        return error
+    status = job_status(job)
+    status["status_url"] = f"/jobs/{job['id']}"
+    status["events_url"] = f"/jobs/{job['id']}/events"
+    return jsonify(status), 202
+
+
+@app.route("/jobs/<job_id>")
+def get_job_status(job_id):
+    """轮询任务状态，返回第 since 个之后的进度事件"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "任务不存在"}), 404
+    since = request.args.get("since", 0, type=int)
+    events = get_job_events(job, since)
+    status = job_status(job)
+    status["new_events"] = [event for _, event in events]
+    status["next"] = events[-1][0] + 1 if events else max(since, 0)
+    return jsonify(status)
+
+
+@app.route("/jobs/<job_id>/events")
+def stream_job_events(job_id):
+    """以SSE订阅任务进度（可多个连接同时订阅；断线重连时按 Last-Event-ID 或 since 重放之后的事件）"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "任务不存在"}), 404
+    last_event_id = request.headers.get("Last-Event-ID", "")
+    since = int(last_event_id) + 1 if last_event_id.isdigit() else request.args.get("since", 0, type=int)
+    return job_event_stream(job, since)
+
+
 @app.route("/download/<folder_name>")
 def download_output(folder_name):
-    """下载推荐结果的zip文件，下载后自动清理用户数据"""
+    """下载推荐结果的zip文件（边打包边发送，不写临时zip），下载后自动清理用户数据"""
     output_folder = os.path.join(OUTPUT_DIR, folder_name)
-    zip_path = os.path.join(OUTPUT_DIR, f"{folder_name}_recommended.zip")
     
-    if not os.path.isdir(output_folder):
-        return jsonify({"error": "输出文件夹不存在"}), 404
-    
-    if not os.path.isfile(zip_path):
-        if not create_output_zip(output_folder, zip_path):
-            return jsonify({"error": "创建zip文件失败"}), 500
+    if os.path.isdir(output_folder):
+        # 旧版布局：推荐结果已按文件写在输出目录
+        chunks = iter_zip_stream(output_folder, compression=DOWNLOAD_ZIP_COMPRESSION)
+    else:
+        recommended = load_job_results(job_results_path(folder_name), "recommended")
+        if recommended is None:
+            return jsonify({"error": "推荐结果不存在"}), 404
+        # 从任务结果文件按需生成每个资源的txt并打包
+        chunks = iter_zip_stream_from_entries(render_recommended_resources(recommended),
+                                              compression=DOWNLOAD_ZIP_COMPRESSION)
     
-    # 发送文件
-    response = send_file(
-        zip_path,
-        as_attachment=True,
-        download_name=f"{folder_name}_recommended.zip",
-        mimetype="application/zip"
+    response = Response(
+        stream_with_context(chunks),
+        mimetype="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename=\"{secure_filename(folder_name)}_recommended.zip\"",
+            "X-Accel-Buffering": "no"
+        }
     )
     
-    # 下载后异步清理数据（使用Flask的after_request机制）
-    # 注意：这里使用线程来延迟清理，确保文件已发送完成
-    import threading
+    # 响应发送完毕（或客户端断开）后再清理数据，不会删掉正在打包的文件
     def cleanup_after_download():
-        import time
-        time.sleep(2)  # 等待2秒确保文件下载开始
-        cleanup_result = cleanup_user_data(folder_name, BASE_DIR)
-        print(f"清理用户数据 {folder_name}: {cleanup_result['message']}")
-    
-    cleanup_thread = threading.Thread(target=cleanup_after_download)
-    cleanup_thread.daemon = True
-    cleanup_thread.start()
+        scheduled = schedule_job_cleanup(folder_name)
+        print(f"清理用户数据 {folder_name}: 已加入清理队列 {[k for k, v in scheduled.items() if v]}")
     
+    response.call_on_close(cleanup_after_download)
     return response
 
 
@@ -583,31 +808,65 @@ def get_status(folder_name):
     """获取处理状态"""
     result_folder = os.path.join(RESULTS_DIR, folder_name)
     output_folder = os.path.join(OUTPUT_DIR, folder_name)
+    has_output = os.path.isdir(output_folder) or load_job_results(job_results_path(folder_name), "recommended") is not None
     
     return jsonify({
         "folder_name": folder_name,
         "has_results": os.path.isdir(result_folder),
-        "has_output": os.path.isdir(output_folder),
-        "ready_for_download": os.path.isdir(output_folder)
+        "has_output": has_output,
+        "ready_for_download": has_output
     })
 
 
+@app.route("/summary/<folder_name>", methods=["POST"])
+def get_summaries(folder_name):
+    """
+    按需获取推荐资源的摘要（已生成的直接返回，未生成的现在生成，每个资源只生成一次）
+
+    请求体: {"resource_ids": [...], "openai_api_key": ...}，resource_ids 省略时返回本任务全部推荐资源的摘要；
+    服务端不保存用户的API key，未提供时使用环境变量中的key
+    """
+    job_summaries = JOB_SUMMARIES.get(folder_name)
+    if job_summaries is None:
+        return jsonify({"error": "任务不存在或已清理"}), 404
+    
+    data = request.get_json(silent=True) or {}
+    resource_ids = data.get("resource_ids") or list(job_summaries["resources"])
+    openai_api_key = data.get("openai_api_key")
+    
+    resource_ids = [rid for rid in resource_ids if rid in job_summaries["resources"]]
+    items = [job_summaries["resources"][rid] for rid in resource_ids]
+    results = generate_resource_summaries(
+        [res for res, _ in items],
+        [resource_type for _, resource_type in items],
+        openai_api_key=openai_api_key,
+        memo=job_summaries["memo"],
+        pack_size=SUMMARY_PACK_SIZE,
+        strategies=SUMMARY_STRATEGIES
+    )
+    
+    return jsonify({"success": True, "summaries": dict(zip(resource_ids, results))})
+
+
 @app.route("/cleanup/<folder_name>", methods=["POST"])
 def cleanup_data(folder_name):
-    """手动清理用户数据"""
+    """手动清理用户数据（放入后台清理队列，立即返回），包括下载后仍保留的增量关键词状态"""
     try:
-        cleanup_result = cleanup_user_data(folder_name, BASE_DIR)
-        if cleanup_result["success"]:
-            return jsonify({
-                "success": True,
-                "message": cleanup_result["message"],
-                "deleted": cleanup_result["deleted"]
-            })
-        else:
-            return jsonify({
-                "success": False,
-                "message": cleanup_result["message"]
-            }), 500
+        scheduled = schedule_job_cleanup(folder_name,
+                                         parts=("uploads", "results", "outputs", "outputs_zip", "keyword_state"))
+        deleted = {
+            "uploads": scheduled["uploads"],
+            "results": scheduled["results"],
+            "outputs": scheduled["outputs"] or scheduled["outputs_zip"],
+            "keyword_state": scheduled["keyword_state"]
+        }
+        names = {"uploads": "上传文件", "results": "处理结果", "outputs": "输出文件", "keyword_state": "关键词状态"}
+        items = [names[k] for k, v in deleted.items() if v]
+        return jsonify({
+            "success": True,
+            "message": f"已加入清理队列: {', '.join(items)}" if items else "没有需要清理的数据",
+            "deleted": deleted
+        })
     except Exception as e:
         return jsonify({
             "success": False,
@@ -634,6 +893,10 @@ if __name__ == "__main__":
     print(f"上传目录: {UPLOAD_DIR}")
     print(f"结果目录: {RESULTS_DIR}")
     print(f"输出目录: {OUTPUT_DIR}")
+    if IDF_MODEL is not None:
+        print(f"背景IDF模型: {IDF_MODEL['n_docs']} 个文档, {IDF_MODEL['meta']['n_terms']} 个短语 (版本 {IDF_MODEL['meta']['version']}, 构建于 {IDF_MODEL['meta']['built_at']})")
+    else:
+        print("背景IDF模型: 未构建（按每个任务自身的文档计算IDF）")
     print("=" * 50)
     print("访问地址: http://localhost:5000")
     print("按 Ctrl+C 停止服务")
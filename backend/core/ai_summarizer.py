@@ -7,7 +7,15 @@ AI摘要生成模块
 
 import os
 import re
-from typing import Dict, Optional
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
 
 # 尝试导入OpenAI
 try:
@@ -24,6 +32,11 @@ except ImportError:
     HAS_REQUESTS = False
 
 
+# 摘要使用的模型和系统提示词
+SUMMARY_MODEL = "gpt-3.5-turbo"
+SUMMARY_SYSTEM_PROMPT = "你是一个专业的学术资源推荐助手。请生成简洁的简介，包含三个方面：1)这是关于什么的，2)有什么亮点，3)你能学到什么。要求简洁明了，不要冗长，不要使用'与您的学习资料相关'等模糊表述。"
+
+
 def get_openai_api_key(api_key_from_request: Optional[str] = None) -> Optional[str]:
     """
     获取OpenAI API Key
@@ -43,32 +56,21 @@ def get_openai_api_key(api_key_from_request: Optional[str] = None) -> Optional[s
     return os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_KEY")
 
 
-def generate_summary_with_openai(content: str, resource_type: str, title: str = "", max_tokens: int = 150, api_key: Optional[str] = None) -> Optional[str]:
+def build_summary_prompt(content: str, resource_type: str, title: str = "") -> Optional[str]:
     """
-    使用OpenAI API生成摘要
-    
+    构建单个资源的摘要提示词
+
     Args:
         content: 资源内容
         resource_type: 资源类型 ('txt', 'video', 'code')
         title: 资源标题
-        max_tokens: 最大token数
-        api_key: OpenAI API key（可选，如果不提供则从环境变量获取）
-    
+
     Returns:
-        摘要字符串，如果失败返回None
+        提示词字符串，不支持的资源类型返回None
     """
-    if not HAS_OPENAI:
-        return None
-    
-    # 获取API key（优先使用传入的key）
-    api_key = api_key or get_openai_api_key()
-    if not api_key:
-        return None
-    
-    try:
-            # 根据资源类型和内容长度构建提示词
-        if resource_type == "txt":
-            prompt = f"""请为以下学术资源生成一个简洁的简介，包含三个方面：
+    # 根据资源类型和内容长度构建提示词
+    if resource_type == "txt":
+        prompt = f"""请为以下学术资源生成一个简洁的简介，包含三个方面：
 
 1. 这是关于什么的：用一句话说明这个资源的核心主题和内容
 2. 有什么亮点：简要说明这个资源的重点或特色
@@ -89,8 +91,8 @@ def generate_summary_with_openai(content: str, resource_type: str, title: str =
 {content}
 
 简介:"""
-        elif resource_type == "video":
-            prompt = f"""请为以下视频资源生成一个2-3句话的简介，帮助用户快速了解这个视频的内容。
+    elif resource_type == "video":
+        prompt = f"""请为以下视频资源生成一个2-3句话的简介，帮助用户快速了解这个视频的内容。
 
 要求：
 1. 第一句：说明视频类型和来源（如"这是一个来自YouTube的教学视频"）
@@ -109,8 +111,8 @@ def generate_summary_with_openai(content: str, resource_type: str, title: str =
 描述: {content}
 
 简介:"""
-        elif resource_type == "code":
-            prompt = f"""请为以下代码资源生成一个2-3句话的简介，帮助用户快速了解这个代码库的内容。
+    elif resource_type == "code":
+        prompt = f"""请为以下代码资源生成一个2-3句话的简介，帮助用户快速了解这个代码库的内容。
 
 要求：
 1. 第一句：说明代码库类型和来源（如"这是一个来自GitHub的开源项目"）
@@ -129,17 +131,101 @@ def generate_summary_with_openai(content: str, resource_type: str, title: str =
 描述: {content}
 
 简介:"""
+    else:
+        return None
+    return prompt
+
+
+def create_openai_client(api_key: Optional[str] = None, base_url: Optional[str] = None):
+    """
+    创建可复用的OpenAI客户端（v1.0+），不可用时返回None
+
+    Args:
+        api_key: OpenAI API key（可选，如果不提供则从环境变量获取）
+        base_url: API地址（可选，用于兼容服务或本地测试服务器）
+    """
+    if not HAS_OPENAI:
+        return None
+    api_key = api_key or get_openai_api_key()
+    if not api_key:
+        return None
+    try:
+        from openai import OpenAI
+    except ImportError:
+        return None
+    kwargs = {"api_key": api_key}
+    if base_url:
+        kwargs["base_url"] = base_url
+    return OpenAI(**kwargs)
+
+
+def make_rate_limiter(requests_per_second: Optional[float]):
+    """
+    创建线程安全的限速函数：每次调用前执行，保证请求间隔不小于 1 / requests_per_second
+    requests_per_second 为空或不大于0时不限速
+    """
+    if not requests_per_second or requests_per_second <= 0:
+        return lambda: None
+    interval = 1.0 / requests_per_second
+    lock = threading.Lock()
+    next_slot = [time.monotonic()]
+
+    def wait():
+        with lock:
+            now = time.monotonic()
+            slot = max(now, next_slot[0])
+            next_slot[0] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    return wait
+
+
+def generate_summary_with_openai(content: str, resource_type: str, title: str = "", max_tokens: int = 150,
+                                 api_key: Optional[str] = None, client=None, rate_limiter=None) -> Optional[str]:
+    """
+    使用OpenAI API生成摘要
+    
+    Args:
+        content: 资源内容
+        resource_type: 资源类型 ('txt', 'video', 'code')
+        title: 资源标题
+        max_tokens: 最大token数
+        api_key: OpenAI API key（可选，如果不提供则从环境变量获取）
+        client: 复用的OpenAI客户端（可选，见 create_openai_client）
+        rate_limiter: 发送请求前调用的限速函数（可选，见 make_rate_limiter）
+    
+    Returns:
+        摘要字符串，如果失败返回None
+    """
+    if client is None:
+        if not HAS_OPENAI:
+            return None
+        
+        # 获取API key（优先使用传入的key）
+        api_key = api_key or get_openai_api_key()
+        if not api_key:
+            return None
+    
+    try:
+        prompt = build_summary_prompt(content, resource_type, title)
+        if prompt is None:
+            return None
+        messages = [
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        if rate_limiter is not None:
+            rate_limiter()
         
         # 尝试使用新版本OpenAI库（v1.0+）
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=api_key)
+            if client is None:
+                from openai import OpenAI
+                client = OpenAI(api_key=api_key)
             response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "你是一个专业的学术资源推荐助手。请生成简洁的简介，包含三个方面：1)这是关于什么的，2)有什么亮点，3)你能学到什么。要求简洁明了，不要冗长，不要使用'与您的学习资料相关'等模糊表述。"},
-                    {"role": "user", "content": prompt}
-                ],
+                model=SUMMARY_MODEL,
+                messages=messages,
                 max_tokens=max_tokens,
                 temperature=0.7,
                 timeout=10
@@ -149,27 +235,27 @@ def generate_summary_with_openai(content: str, resource_type: str, title: str =
             # 回退到旧版本API
             openai.api_key = api_key
             response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "你是一个专业的学术资源推荐助手。请生成简洁的简介，包含三个方面：1)这是关于什么的，2)有什么亮点，3)你能学到什么。要求简洁明了，不要冗长，不要使用'与您的学习资料相关'等模糊表述。"},
-                    {"role": "user", "content": prompt}
-                ],
+                model=SUMMARY_MODEL,
+                messages=messages,
                 max_tokens=max_tokens,
                 temperature=0.7,
                 timeout=10
             )
             summary = response.choices[0].message.content.strip()
         
-        # 清理摘要：移除可能的引号、多余空格等
-        summary = re.sub(r'^["\']|["\']$', '', summary)
-        summary = re.sub(r'\s+', ' ', summary).strip()
-        
+        summary = clean_summary_text(summary)
         return summary if summary else None
         
     except Exception as e:
         return None
 
 
+def clean_summary_text(summary: str) -> str:
+    """清理摘要：移除可能的引号、多余空格等"""
+    summary = re.sub(r'^["\']|["\']$', '', summary.strip())
+    return re.sub(r'\s+', ' ', summary).strip()
+
+
 def generate_summary_with_fallback(content: str, resource_type: str, title: str = "") -> str:
     """
     使用fallback方法生成摘要（当没有AI API或API失败时）
@@ -261,6 +347,216 @@ def generate_summary_with_fallback(content: str, resource_type: str, title: str
     
 
 
+# ==================== 本地抽取式摘要 ====================
+
+# 各资源类型的摘要策略：
+#   "ai"                  只用AI，失败时按原规则回退（Wikipedia简单简介或无摘要）
+#   "ai_then_extractive"  优先AI，失败时用本地抽取式摘要
+#   "extractive"          优先本地抽取式摘要（不调用API），抽取不出时再用AI
+SUMMARY_STRATEGIES = {
+    "txt": "ai",
+    "video": "ai_then_extractive",
+    "code": "ai_then_extractive",
+}
+
+# 抽取式摘要：每种类型最多选取的句子数，以及参与抽取的最大内容长度
+EXTRACTIVE_MAX_SENTENCES = {"txt": 3, "video": 2, "code": 2}
+EXTRACTIVE_MAX_CONTENT = 20000
+
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|(?<=[。！？])|\n+")
+
+
+def split_sentences(text: str, min_length: int = 20) -> List[str]:
+    """把文本切分为句子（支持中英文标点），过滤过短的片段"""
+    text = re.sub(r"<[^>]+>", " ", text or "")
+    sentences = [re.sub(r"\s+", " ", s).strip() for s in _SENTENCE_SPLIT_RE.split(text)]
+    return [s for s in sentences if len(s) >= min_length]
+
+
+def generate_summary_extractive(content: str, resource_type: str, title: str = "",
+                                max_sentences: Optional[int] = None, max_chars: int = 400) -> Optional[str]:
+    """
+    本地抽取式摘要（TF-IDF质心法）：对资源的句子做TF-IDF，选出与全文质心最相近的几句，
+    按原文顺序拼接。不依赖网络，单个资源通常只需几毫秒
+    （IDF以句子为文档在资源内部计算，衡量的是词在该资源中的区分度，因此不使用任务级的向量器或背景IDF模型）
+
+    Args:
+        content: 资源内容
+        resource_type: 资源类型 ('txt', 'video', 'code')
+        title: 资源标题（与标题完全相同的句子会被跳过）
+        max_sentences: 最多选取的句子数（默认按 EXTRACTIVE_MAX_SENTENCES）
+        max_chars: 摘要最大长度
+
+    Returns:
+        摘要字符串，内容不足时返回None
+    """
+    skip_phrases = ["From Wikipedia", "Redirected from", "Part of a series"]
+    sentences = [
+        s for s in split_sentences(content)
+        if not any(phrase in s for phrase in skip_phrases) and s.strip().lower() != (title or "").strip().lower()
+    ]
+    if not sentences:
+        return None
+    max_sentences = max_sentences or EXTRACTIVE_MAX_SENTENCES.get(resource_type, 2)
+
+    if len(sentences) <= max_sentences:
+        chosen = list(range(len(sentences)))
+    else:
+        try:
+            vectorizer = TfidfVectorizer(
+                lowercase=True,
+                stop_words="english",
+                token_pattern=r"(?u)\b[a-zA-Z][a-zA-Z\-]+\b",
+                sublinear_tf=True,
+            )
+            X = vectorizer.fit_transform(sentences)
+            centroid = np.asarray(X.mean(axis=0)).ravel()
+            norm = np.linalg.norm(centroid)
+            scores = X @ centroid / norm if norm > 0 else np.zeros(len(sentences))
+            # 分数相同时偏向靠前的句子
+            order = np.lexsort((np.arange(len(sentences)), -np.asarray(scores).ravel()))
+            chosen = sorted(order[:max_sentences].tolist())
+        except ValueError:
+            # 没有可用的英文词（如纯中文内容）：取开头几句
+            chosen = list(range(max_sentences))
+
+    summary = ""
+    for i in chosen:
+        candidate = f"{summary} {sentences[i]}".strip()
+        if summary and len(candidate) > max_chars:
+            break
+        summary = candidate
+    if len(summary) > max_chars:
+        summary = summary[:max_chars - 3] + "..."
+    return summary or None
+
+
+# ==================== 摘要磁盘缓存 ====================
+
+# 提示词版本（修改提示词或摘要格式时递增，旧缓存自动失效）
+SUMMARY_PROMPT_VERSION = 1
+
+# 摘要缓存配置：目录为None时不启用（见 configure_summary_cache）
+_SUMMARY_CACHE = {
+    "dir": None,
+    "max_bytes": 50 * 1024 * 1024,
+    "size": None,  # 当前缓存总大小（首次使用时统计）
+    "lock": threading.Lock(),
+}
+
+
+def configure_summary_cache(cache_dir: Optional[str], max_bytes: int = 50 * 1024 * 1024):
+    """
+    启用（或关闭）摘要磁盘缓存
+
+    Args:
+        cache_dir: 缓存目录，None表示关闭缓存
+        max_bytes: 缓存总大小上限，超过后按最近最少使用（LRU）淘汰
+    """
+    with _SUMMARY_CACHE["lock"]:
+        _SUMMARY_CACHE["dir"] = cache_dir
+        _SUMMARY_CACHE["max_bytes"] = max_bytes
+        _SUMMARY_CACHE["size"] = None
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+
+def summary_cache_key(source: str, resource_type: str, model: str = SUMMARY_MODEL) -> str:
+    """
+    摘要缓存键：(资源URL或内容哈希, 资源类型, 提示词版本, 模型)
+
+    Args:
+        source: 资源URL；没有URL时传入标题和内容，按内容哈希
+    """
+    if not re.match(r"https?://", source or ""):
+        source = "sha256:" + hashlib.sha256((source or "").encode("utf-8")).hexdigest()
+    raw = json.dumps([source, resource_type, SUMMARY_PROMPT_VERSION, model], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _summary_cache_path(key: str) -> Optional[str]:
+    cache_dir = _SUMMARY_CACHE["dir"]
+    if not cache_dir:
+        return None
+    return os.path.join(cache_dir, key[:2], f"{key}.json")
+
+
+def load_cached_summary(key: str) -> Optional[Dict]:
+    """读取缓存的摘要（命中时刷新访问时间，用于LRU），未命中返回None"""
+    path = _summary_cache_path(key)
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        os.utime(path, None)
+        return result
+    except Exception:
+        return None
+
+
+def store_cached_summary(key: str, result: Dict):
+    """写入摘要缓存，超过大小上限时淘汰最久未使用的条目"""
+    path = _summary_cache_path(key)
+    if not path:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        # 覆盖已有条目时，总大小只增加新旧内容的差值
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"写入摘要缓存失败: {e}")
+        return
+
+    with _SUMMARY_CACHE["lock"]:
+        if _SUMMARY_CACHE["size"] is None:
+            _SUMMARY_CACHE["size"] = sum(size for _, _, size in _scan_summary_cache())
+        else:
+            _SUMMARY_CACHE["size"] += len(data) - old_size
+        if _SUMMARY_CACHE["size"] > _SUMMARY_CACHE["max_bytes"]:
+            _SUMMARY_CACHE["size"] = _evict_summary_cache(_SUMMARY_CACHE["max_bytes"])
+
+
+def _scan_summary_cache():
+    """列出缓存条目 (访问时间, 路径, 大小)"""
+    entries = []
+    cache_dir = _SUMMARY_CACHE["dir"]
+    if not cache_dir or not os.path.isdir(cache_dir):
+        return entries
+    for sub in os.scandir(cache_dir):
+        if not sub.is_dir():
+            continue
+        for entry in os.scandir(sub.path):
+            if entry.name.endswith(".json"):
+                st = entry.stat()
+                entries.append((st.st_mtime, entry.path, st.st_size))
+    return entries
+
+
+def _evict_summary_cache(max_bytes: int) -> int:
+    """按最近最少使用淘汰，直到总大小降到上限的90%以下；返回淘汰后的总大小"""
+    entries = sorted(_scan_summary_cache())
+    total = sum(size for _, _, size in entries)
+    target = int(max_bytes * 0.9)
+    for _, path, size in entries:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+    return total
+
+
 def extract_abstract_from_content(content: str) -> str:
     """
     从内容中提取abstract（摘要）
@@ -321,18 +617,18 @@ def generate_simple_wikipedia_summary(content: str, title: str) -> str:
     return f"这是关于{title}的百科文章。"
 
 
-def generate_resource_summary(resource: Dict, resource_type: str, openai_api_key: Optional[str] = None) -> Dict:
+def prepare_summary_request(resource: Dict, resource_type: str, strategies: Optional[Dict[str, str]] = None) -> Dict:
     """
-    为资源生成智能摘要
-    
+    摘要生成的准备阶段：能直接得到结果的（ArXiv摘要、本地抽取式摘要、缓存命中）直接返回结果，
+    否则整理出需要发给AI的内容
+
     Args:
-        resource: 资源字典
-        resource_type: 资源类型 ('txt', 'video', 'code')
-    
+        strategies: 各资源类型的摘要策略（可选，默认 SUMMARY_STRATEGIES）
+
     Returns:
-        包含summary和summary_type的字典
-        summary_type: 'ai_generated' | 'abstract' | 'wikipedia_simple' | None
+        {"result": 摘要结果} 或 {"title": ..., "content_text": ..., "cache_key": ..., "strategy": ...}
     """
+    strategy = (strategies or SUMMARY_STRATEGIES).get(resource_type, "ai")
     title = resource.get("title", "")
     content = resource.get("content", "")
     description = resource.get("description", "")
@@ -349,10 +645,10 @@ def generate_resource_summary(resource: Dict, resource_type: str, openai_api_key
             
             if is_arxiv:
                 # ArXiv文章：返回Abstract，标记为需要展开/收起
-                return {
+                return {"result": {
                     "summary": abstract,
                     "summary_type": "abstract"
-                }
+                }}
     
     # 准备内容文本
     content_text = ""
@@ -362,6 +658,16 @@ def generate_resource_summary(resource: Dict, resource_type: str, openai_api_key
         content_text = description or content or ""
     elif resource_type == "code":
         content_text = description or content or ""
+    full_text = content_text
+    
+    # 本地抽取式摘要优先：不调用API
+    if strategy == "extractive":
+        extractive = generate_summary_extractive(full_text[:EXTRACTIVE_MAX_CONTENT], resource_type, title)
+        if extractive:
+            return {"result": {
+                "summary": extractive,
+                "summary_type": "extractive"
+            }}
     
     # 对于Wikipedia等长文本，提取更多内容用于生成摘要
     # 但限制总长度避免API调用过长
@@ -369,24 +675,53 @@ def generate_resource_summary(resource: Dict, resource_type: str, openai_api_key
     if len(content_text) > max_content_length:
         content_text = content_text[:max_content_length] + "..."
     
-    # 尝试使用OpenAI API生成摘要
-    # 限制在100 tokens，生成更详细的简介（关于啥的、有啥亮点、你能学到啥）
-    max_tokens = 100
-    ai_summary = generate_summary_with_openai(content_text, resource_type, title, max_tokens=max_tokens, api_key=openai_api_key)
+    # 先查摘要缓存（同一资源被不同用户的关键词命中时不再重复调用API）
+    cache_key = summary_cache_key(url or f"{title}\n{content_text}", resource_type)
+    cached = load_cached_summary(cache_key)
+    if cached:
+        return {"result": cached}
+    
+    return {"title": title, "content_text": content_text, "cache_key": cache_key,
+            "strategy": strategy, "full_text": full_text}
+
+
+def finish_summary(resource: Dict, resource_type: str, request: Dict, ai_summary: Optional[str]) -> Dict:
+    """
+    摘要生成的收尾阶段：AI成功时写入缓存并返回，失败时按资源类型回退
+
+    Args:
+        request: prepare_summary_request 返回的待生成内容
+        ai_summary: AI生成的摘要（失败为None）
+    """
     if ai_summary:
-        return {
+        result = {
             "summary": ai_summary,
             "summary_type": "ai_generated"
         }
+        store_cached_summary(request["cache_key"], result)
+        return result
+    
+    title = request["title"]
+    url = resource.get("url", "")
+    source = resource.get("source", "")
     
-    # OpenAI失败时，根据资源类型处理
+    # OpenAI失败时，按策略使用本地抽取式摘要
+    if request.get("strategy") == "ai_then_extractive":
+        extractive = generate_summary_extractive(request["full_text"][:EXTRACTIVE_MAX_CONTENT], resource_type, title)
+        if extractive:
+            return {
+                "summary": extractive,
+                "summary_type": "extractive"
+            }
+    
+    # 否则根据资源类型处理
     if resource_type == "txt":
         # 检查是否是Wikipedia
         is_wikipedia = "Wikipedia" in (title or "") or "wikipedia" in (url or "").lower() or "wikipedia" in (source or "").lower()
         
         if is_wikipedia:
             # Wikipedia：生成简单简介
-            simple_summary = generate_simple_wikipedia_summary(content_text, title)
+            simple_summary = generate_simple_wikipedia_summary(request["content_text"], title)
             return {
                 "summary": simple_summary,
                 "summary_type": "wikipedia_simple"
@@ -403,3 +738,358 @@ def generate_resource_summary(resource: Dict, resource_type: str, openai_api_key
             "summary": None,
             "summary_type": None
         }
+
+
+def generate_resource_summary(resource: Dict, resource_type: str, openai_api_key: Optional[str] = None,
+                              client=None, rate_limiter=None, strategies: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    为资源生成智能摘要
+    
+    Args:
+        resource: 资源字典
+        resource_type: 资源类型 ('txt', 'video', 'code')
+        openai_api_key: OpenAI API key（可选）
+        client: 复用的OpenAI客户端（可选）
+        rate_limiter: 发送请求前调用的限速函数（可选）
+        strategies: 各资源类型的摘要策略（可选，默认 SUMMARY_STRATEGIES）
+    
+    Returns:
+        包含summary和summary_type的字典
+        summary_type: 'ai_generated' | 'abstract' | 'extractive' | 'wikipedia_simple' | None
+    """
+    request = prepare_summary_request(resource, resource_type, strategies)
+    if "result" in request:
+        return request["result"]
+    
+    # 尝试使用OpenAI API生成摘要
+    # 限制在100 tokens，生成更详细的简介（关于啥的、有啥亮点、你能学到啥）
+    max_tokens = 100
+    ai_summary = generate_summary_with_openai(request["content_text"], resource_type, request["title"],
+                                              max_tokens=max_tokens, api_key=openai_api_key,
+                                              client=client, rate_limiter=rate_limiter)
+    return finish_summary(resource, resource_type, request, ai_summary)
+
+
+# ==================== 按需摘要（每个任务每个资源只生成一次） ====================
+
+def resource_id(resource: Dict, resource_type: str) -> str:
+    """
+    资源在一次任务中的稳定标识（优先使用URL，否则使用标题和内容开头）
+    """
+    key = resource.get("url") or f"{resource.get('title', '')}\n{(resource.get('content') or resource.get('description') or '')[:500]}"
+    return hashlib.sha1(f"{resource_type}\n{key}".encode("utf-8")).hexdigest()[:16]
+
+
+def new_summary_memo() -> Dict:
+    """创建一个任务级的摘要记录（resource_id -> 摘要结果）"""
+    return {"results": {}, "pending": {}, "lock": threading.Lock()}
+
+
+def get_resource_summary(resource: Dict, resource_type: str, memo: Dict,
+                         openai_api_key: Optional[str] = None, **kwargs) -> Dict:
+    """
+    按需获取资源摘要：第一次访问时生成并记录，之后直接返回记录的结果。
+    多个线程同时请求同一资源时只有一个线程真正生成，其余等待其结果
+
+    Args:
+        resource: 资源字典
+        resource_type: 资源类型 ('txt', 'video', 'code')
+        memo: new_summary_memo() 创建的任务级记录
+        openai_api_key: OpenAI API key（可选）
+        **kwargs: 传给 generate_resource_summary 的其他参数（client、rate_limiter）
+
+    Returns:
+        与 generate_resource_summary 相同格式的字典
+    """
+    rid = resource.get("resource_id") or resource_id(resource, resource_type)
+    state, value = _claim_summary(memo, rid)
+    if state == "done":
+        return value
+    if state == "wait":
+        value.wait()
+        return memo["results"].get(rid, {"summary": None, "summary_type": None})
+
+    result = {"summary": None, "summary_type": None}
+    try:
+        result = generate_resource_summary(resource, resource_type, openai_api_key=openai_api_key, **kwargs)
+    except Exception as e:
+        print(f"摘要生成失败: {e}")
+    finally:
+        _release_summary(memo, rid, value, result)
+    return result
+
+
+def _claim_summary(memo: Dict, rid: str):
+    """
+    在任务级记录中认领一个资源的摘要生成
+
+    Returns:
+        ("done", 结果)：已生成；("wait", event)：其他线程正在生成；
+        ("own", event)：由当前调用者生成，完成后必须调用 _release_summary
+    """
+    with memo["lock"]:
+        if rid in memo["results"]:
+            return "done", memo["results"][rid]
+        event = memo["pending"].get(rid)
+        if event is not None:
+            return "wait", event
+        event = memo["pending"][rid] = threading.Event()
+        return "own", event
+
+
+def _release_summary(memo: Dict, rid: str, event: threading.Event, result: Dict):
+    """记录生成结果并唤醒等待同一资源的线程"""
+    with memo["lock"]:
+        memo["results"][rid] = result
+        memo["pending"].pop(rid, None)
+    event.set()
+
+
+# ==================== 批量并发摘要 ====================
+
+# 批量摘要的默认并发数和限速（每秒请求数）
+SUMMARY_MAX_CONCURRENCY = 8
+SUMMARY_REQUESTS_PER_SECOND = 5.0
+
+
+def generate_resource_summaries(resources: List[Dict], resource_types: Union[str, List[str]],
+                                openai_api_key: Optional[str] = None,
+                                max_concurrency: int = SUMMARY_MAX_CONCURRENCY,
+                                requests_per_second: Optional[float] = SUMMARY_REQUESTS_PER_SECOND,
+                                base_url: Optional[str] = None, client=None,
+                                memo: Optional[Dict] = None, pack_size: int = 1,
+                                on_result: Optional[Callable[[int, Dict], None]] = None,
+                                strategies: Optional[Dict[str, str]] = None) -> List[Dict]:
+    """
+    批量为资源生成摘要：复用同一个OpenAI客户端，在并发数和限速约束下并发请求
+
+    Args:
+        resources: 资源字典列表
+        resource_types: 资源类型（所有资源相同时传字符串，否则传与 resources 对应的列表）
+        openai_api_key: OpenAI API key（可选）
+        max_concurrency: 最大并发请求数
+        requests_per_second: 每秒最多发出的请求数（None表示不限速）
+        base_url: API地址（可选，用于兼容服务或本地测试服务器）
+        client: 复用的OpenAI客户端（可选，提供时忽略 openai_api_key 和 base_url）
+        memo: 任务级摘要记录（可选，见 new_summary_memo），提供时已生成的摘要直接复用
+        pack_size: 打包模式下每个请求包含的同类型资源数（1表示每个资源单独请求）
+        on_result: 每个资源的摘要完成时调用 on_result(下标, 结果)（在工作线程中调用，可选）
+        strategies: 各资源类型的摘要策略（可选，默认 SUMMARY_STRATEGIES）
+
+    Returns:
+        与 resources 顺序一致的摘要结果列表（格式同 generate_resource_summary）；
+        单个资源失败时按 generate_resource_summary 的规则回退，不影响其他资源
+    """
+    if isinstance(resource_types, str):
+        resource_types = [resource_types] * len(resources)
+    if not resources:
+        return []
+
+    if client is None:
+        client = create_openai_client(openai_api_key, base_url=base_url)
+    rate_limiter = make_rate_limiter(requests_per_second)
+
+    def summarize(pos, item):
+        resource, resource_type = item
+        try:
+            if memo is not None:
+                result = get_resource_summary(resource, resource_type, memo, openai_api_key=openai_api_key,
+                                              client=client, rate_limiter=rate_limiter, strategies=strategies)
+            else:
+                result = generate_resource_summary(resource, resource_type, openai_api_key=openai_api_key,
+                                                   client=client, rate_limiter=rate_limiter, strategies=strategies)
+        except Exception as e:
+            print(f"摘要生成失败: {e}")
+            result = {"summary": None, "summary_type": None}
+        _notify_result(on_result, pos, result)
+        return result
+
+    items = list(zip(resources, resource_types))
+    if pack_size > 1:
+        return _generate_summaries_in_packs(items, openai_api_key, client, rate_limiter,
+                                            max_concurrency, pack_size, memo, on_result, strategies)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(items)))) as pool:
+        return list(pool.map(summarize, range(len(items)), items))
+
+
+def _notify_result(on_result, pos: int, result: Dict):
+    """调用结果回调（回调出错不影响摘要生成）"""
+    if on_result is None:
+        return
+    try:
+        on_result(pos, result)
+    except Exception as e:
+        print(f"摘要回调失败: {e}")
+
+
+# ==================== 打包模式（一个请求包含多个资源） ====================
+
+def _summary_instructions(resource_type: str) -> str:
+    """单个资源提示词中的要求和示例部分（去掉末尾的标题和内容），供打包提示词复用"""
+    prompt = build_summary_prompt("", resource_type, "")
+    return prompt.split("\n\n标题: ")[0] if prompt else ""
+
+
+def build_packed_summary_prompt(requests: List[Dict], resource_type: str) -> Optional[str]:
+    """
+    构建打包提示词：同一类型的多个资源共用一份要求说明，要求以JSON返回各自的简介
+
+    Args:
+        requests: prepare_summary_request 返回的待生成内容列表
+        resource_type: 资源类型
+    """
+    instructions = _summary_instructions(resource_type)
+    if not instructions:
+        return None
+    parts = [
+        instructions,
+        "",
+        f"下面共有 {len(requests)} 个资源，请按上述要求分别为每个资源生成简介。",
+        '只输出JSON，不要输出其他内容，格式为：{"summaries": [{"id": 资源编号, "summary": "简介"}]}',
+    ]
+    for i, request in enumerate(requests, 1):
+        parts.append(f"\n资源 {i}\n标题: {request['title']}\n内容: {request['content_text']}")
+    return "\n".join(parts)
+
+
+def parse_packed_summaries(text: str, n: int) -> List[Optional[str]]:
+    """
+    解析打包请求返回的JSON，按资源编号取出各自的简介；缺失或格式不对的位置为None
+    """
+    summaries = [None] * n
+    match = re.search(r"\{.*\}", text or "", re.DOTALL)
+    if not match:
+        return summaries
+    try:
+        data = json.loads(match.group(0))
+    except ValueError:
+        return summaries
+    items = data.get("summaries") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return summaries
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get("summary"), str):
+            continue
+        try:
+            idx = int(item.get("id")) - 1
+        except (TypeError, ValueError):
+            continue
+        if 0 <= idx < n:
+            summaries[idx] = clean_summary_text(item["summary"]) or None
+    return summaries
+
+
+def generate_summaries_packed(requests: List[Dict], resource_type: str, client,
+                              max_tokens_per_item: int = 120, rate_limiter=None) -> Optional[List[Optional[str]]]:
+    """
+    用一个请求为同一类型的多个资源生成摘要
+
+    Returns:
+        与 requests 对应的摘要列表（解析失败的位置为None）；请求本身失败时返回None
+    """
+    prompt = build_packed_summary_prompt(requests, resource_type)
+    if client is None or prompt is None:
+        return None
+    try:
+        if rate_limiter is not None:
+            rate_limiter()
+        response = client.chat.completions.create(
+            model=SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens_per_item * len(requests),
+            temperature=0.7,
+            response_format={"type": "json_object"},
+            timeout=10 + 2 * len(requests)
+        )
+        return parse_packed_summaries(response.choices[0].message.content, len(requests))
+    except Exception as e:
+        print(f"打包摘要请求失败: {e}")
+        return None
+
+
+def _generate_summaries_in_packs(items, openai_api_key, client, rate_limiter, max_concurrency, pack_size, memo,
+                                 on_result=None, strategies=None):
+    """generate_resource_summaries 的打包模式实现"""
+    empty = {"summary": None, "summary_type": None}
+    results = [None] * len(items)
+    notified = set()
+    notify_lock = threading.Lock()
+
+    def finish(pos, result):
+        results[pos] = result
+        with notify_lock:
+            if pos in notified:
+                return
+            notified.add(pos)
+        _notify_result(on_result, pos, result)
+    owned, waiting = [], []
+    pending = {}  # 资源类型 -> [(位置, 待生成内容)]
+
+    for pos, (resource, resource_type) in enumerate(items):
+        if memo is not None:
+            rid = resource.get("resource_id") or resource_id(resource, resource_type)
+            state, value = _claim_summary(memo, rid)
+            if state == "done":
+                finish(pos, value)
+                continue
+            if state == "wait":
+                waiting.append((pos, rid, value))
+                continue
+            owned.append((pos, rid, value))
+        try:
+            request = prepare_summary_request(resource, resource_type, strategies)
+        except Exception as e:
+            print(f"摘要生成失败: {e}")
+            request = {"result": empty}
+        if "result" in request:
+            finish(pos, request["result"])
+        else:
+            pending.setdefault(resource_type, []).append((pos, request))
+
+    packs = [
+        (resource_type, entries[i:i + pack_size])
+        for resource_type, entries in pending.items()
+        for i in range(0, len(entries), pack_size)
+    ]
+
+    def run_pack(pack):
+        resource_type, entries = pack
+        try:
+            summaries = generate_summaries_packed([request for _, request in entries], resource_type, client,
+                                                  rate_limiter=rate_limiter)
+        except Exception as e:
+            print(f"打包摘要请求失败: {e}")
+            summaries = None
+        for i, (pos, request) in enumerate(entries):
+            # 每个资源单独处理异常，一个资源失败不影响同一包中的其他资源
+            try:
+                summary = summaries[i] if summaries is not None else None
+                if summary is None:
+                    # 打包请求失败，或打包结果中缺失、无法解析的资源，单独请求
+                    summary = generate_summary_with_openai(request["content_text"], resource_type, request["title"],
+                                                           max_tokens=100, api_key=openai_api_key,
+                                                           client=client, rate_limiter=rate_limiter)
+                finish(pos, finish_summary(items[pos][0], resource_type, request, summary))
+            except Exception as e:
+                print(f"摘要生成失败: {e}")
+
+    try:
+        if packs:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(packs)))) as pool:
+                list(pool.map(run_pack, packs))
+    finally:
+        for pos, rid, event in owned:
+            if results[pos] is None:
+                finish(pos, empty)
+            _release_summary(memo, rid, event, results[pos])
+
+    for pos, rid, event in waiting:
+        event.wait()
+        finish(pos, memo["results"].get(rid, empty))
+    for pos, result in enumerate(results):
+        if result is None:
+            finish(pos, empty)
+    return results
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+背景IDF模型模块
+从历史上传语料离线统计短语的文档频率，保存为紧凑的NumPy文件，启动时以内存映射方式加载。
+关键词提取和推荐系统据此计算IDF，不再只依赖当前任务的少量文档，得分在不同任务间更稳定。
+
+模型目录结构:
+    meta.json         版本、文档数、分词配置等元信息
+    term_hashes.npy   短语的64位哈希（升序，uint64）
+    doc_freq.npy      与 term_hashes 一一对应的文档频率（uint32）
+
+离线构建:
+    python -m backend.core.idf_model data/idf_model data/keyword_state/ 其他txt语料目录...
+    data/keyword_state/ 中的增量关键词状态跨任务保留（按最近使用时间淘汰），是默认的历史语料来源。
+"""
+
+import os
+import sys
+import json
+import time
+import glob
+import pickle
+import hashlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# 模型文件格式版本（存储结构变化时递增，旧模型自动失效）
+IDF_MODEL_VERSION = 1
+
+# 与关键词提取/推荐系统一致的分词配置；配置不一致的模型不可混用
+IDF_ANALYZER_CONFIG = {
+    "lowercase": True,
+    "stop_words": "english",
+    "token_pattern": r"(?u)\b[a-zA-Z][a-zA-Z\-]+\b",
+    "ngram_range": [1, 3],
+}
+
+
+def hash_terms(terms: Iterable[str]) -> np.ndarray:
+    """把短语映射为64位哈希（blake2b），用于在模型中二分查找"""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "little") for t in terms),
+        dtype=np.uint64,
+    )
+
+
+def save_idf_model(doc_freq_by_hash: Dict[int, int], n_docs: int, model_dir: str) -> dict:
+    """
+    保存IDF模型
+
+    Args:
+        doc_freq_by_hash: {短语哈希: 文档频率}
+        n_docs: 统计所用的文档总数
+        model_dir: 模型目录
+
+    Returns:
+        写入的元信息
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    hashes = np.fromiter(doc_freq_by_hash.keys(), dtype=np.uint64, count=len(doc_freq_by_hash))
+    freqs = np.fromiter(doc_freq_by_hash.values(), dtype=np.uint32, count=len(doc_freq_by_hash))
+    order = np.argsort(hashes)
+
+    meta = {
+        "version": IDF_MODEL_VERSION,
+        "n_docs": int(n_docs),
+        "n_terms": int(len(hashes)),
+        "analyzer": IDF_ANALYZER_CONFIG,
+        "built_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    # 先写数组再写meta：meta存在即表示模型完整
+    np.save(os.path.join(model_dir, "term_hashes.npy"), hashes[order])
+    np.save(os.path.join(model_dir, "doc_freq.npy"), freqs[order])
+    tmp_meta = os.path.join(model_dir, "meta.json.tmp")
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_meta, os.path.join(model_dir, "meta.json"))
+    return meta
+
+
+def load_idf_model(model_dir: str) -> Optional[dict]:
+    """
+    以内存映射方式加载IDF模型
+
+    Returns:
+        {"meta": ..., "n_docs": int, "term_hashes": memmap, "doc_freq": memmap}，
+        模型不存在、版本或分词配置不一致时返回None
+    """
+    meta_path = os.path.join(model_dir or "", "meta.json")
+    if not model_dir or not os.path.isfile(meta_path):
+        return None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != IDF_MODEL_VERSION or meta.get("analyzer") != IDF_ANALYZER_CONFIG:
+            print(f"IDF模型版本或分词配置不一致，忽略: {model_dir}")
+            return None
+        return {
+            "meta": meta,
+            "n_docs": int(meta["n_docs"]),
+            "term_hashes": np.load(os.path.join(model_dir, "term_hashes.npy"), mmap_mode="r"),
+            "doc_freq": np.load(os.path.join(model_dir, "doc_freq.npy"), mmap_mode="r"),
+        }
+    except Exception as e:
+        print(f"加载IDF模型失败: {e}")
+        return None
+
+
+def lookup_doc_freq(model: dict, term_hashes: np.ndarray) -> np.ndarray:
+    """查询一组短语哈希在背景语料中的文档频率（未收录的为0）"""
+    model_hashes = model["term_hashes"]
+    if len(model_hashes) == 0 or len(term_hashes) == 0:
+        return np.zeros(len(term_hashes), dtype=np.int64)
+    pos = np.searchsorted(model_hashes, term_hashes)
+    pos_clipped = np.minimum(pos, len(model_hashes) - 1)
+    found = model_hashes[pos_clipped] == term_hashes
+    return np.where(found, model["doc_freq"][pos_clipped], 0).astype(np.int64)
+
+
+def compute_idf(model: dict, term_hashes: np.ndarray, job_doc_freq: np.ndarray, n_job_docs: int) -> np.ndarray:
+    """
+    计算"背景语料 + 当前任务文档"上的平滑IDF（与scikit-learn的smooth_idf公式一致）:
+        idf = ln((1 + N_bg + n_job) / (1 + df_bg + df_job)) + 1
+
+    背景语料中未出现过的短语只按当前任务的文档频率计算，不会丢失新词。
+    """
+    bg_doc_freq = lookup_doc_freq(model, term_hashes)
+    n_total = model["n_docs"] + n_job_docs
+    return np.log((1 + n_total) / (1 + bg_doc_freq + np.asarray(job_doc_freq))) + 1
+
+
+# ==================== 离线构建 ====================
+
+def _iter_state_documents(state_path: str):
+    """从增量关键词状态文件中逐个取出 (文档哈希, 短语集合)"""
+    with open(state_path, "rb") as f:
+        state = pickle.load(f)
+    terms = state.get("terms", [])
+    for doc_hash, (ids, _) in state.get("docs", {}).items():
+        yield doc_hash, {terms[i] for i in ids}
+
+
+def _iter_txt_documents(folder_path: str):
+    """从txt语料目录中逐个取出 (文档哈希, 短语集合)，长文档与关键词提取一样按分块计"""
+    from backend.core.keyword_extractor import basic_clean, chunk_key, count_terms, iter_text_chunks, list_txt_paths
+
+    for path in list_txt_paths(folder_path):
+        with open(path, "rb") as f:
+            data = f.read()
+        doc_hash = hashlib.sha256(data).hexdigest()
+        chunks = list(iter_text_chunks(basic_clean(data.decode("utf-8", errors="ignore"))))
+        if len(chunks) == 1:
+            yield doc_hash, set(count_terms(chunks[0]))
+            continue
+        for i, chunk in enumerate(chunks):
+            yield chunk_key(doc_hash, i), set(count_terms(chunk))
+
+
+def build_idf_model(sources: List[str], model_dir: str, min_doc_freq: int = 2) -> dict:
+    """
+    从历史语料离线构建IDF模型
+
+    Args:
+        sources: 语料来源列表，可以是txt目录、增量关键词状态文件（.pkl）或包含状态文件的目录
+        model_dir: 输出目录
+        min_doc_freq: 只保留至少出现在这么多文档中的短语（控制模型体积）
+
+    Returns:
+        模型元信息
+    """
+    doc_freq = Counter()
+    seen_docs = set()
+
+    def add(documents):
+        for doc_hash, term_set in documents:
+            # 同一文档被多次上传时只计一次
+            if doc_hash in seen_docs:
+                continue
+            seen_docs.add(doc_hash)
+            doc_freq.update(hash_terms(term_set).tolist())
+
+    for source in sources:
+        if os.path.isfile(source) and source.endswith(".pkl"):
+            add(_iter_state_documents(source))
+        elif os.path.isdir(source):
+            state_files = sorted(glob.glob(os.path.join(source, "*.pkl")))
+            for state_path in state_files:
+                add(_iter_state_documents(state_path))
+            add(_iter_txt_documents(source))
+        else:
+            print(f"跳过无法识别的语料来源: {source}")
+
+    kept = {h: df for h, df in doc_freq.items() if df >= min_doc_freq}
+    meta = save_idf_model(kept, len(seen_docs), model_dir)
+    print(f"IDF模型构建完成: {meta['n_docs']} 个文档, {meta['n_terms']} 个短语 -> {model_dir}")
+    return meta
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("用法: python -m backend.core.idf_model <模型输出目录> <语料目录或状态文件> [...]")
+        sys.exit(1)
+    build_idf_model(sys.argv[2:], sys.argv[1])
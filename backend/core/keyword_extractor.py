@@ -7,9 +7,26 @@
 
 import os
 import re
+import hashlib
+import pickle
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional
 import numpy as np
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+
+from backend.core.idf_model import compute_idf, hash_terms
+from backend.utils.file_utils import get_all_txt_file_paths, process_context
+
+# 增量关键词状态的格式版本（分词规则或状态结构变化时递增，旧状态自动失效）
+KEYWORD_STATE_VERSION = 1
+
+# 长文档分块大小（词数）。超过该长度的文档按固定窗口切分后逐块分词，
+# 每块单独作为一行参与TF-IDF，避免单个超长文档的3-gram占满内存
+KEYWORD_CHUNK_WORDS = 20000
 
 
 def read_file(path: str) -> str:
@@ -27,6 +44,25 @@ def basic_clean(text: str) -> str:
     return text
 
 
+def _term_indicator_matrix(phrases: List[str], patterns) -> np.ndarray:
+    """
+    构造"短语 x 术语"的包含关系矩阵（bool）
+
+    把所有短语用换行拼成一个长字符串，每个术语只在其上扫描一次，
+    再通过各短语的起始偏移把命中位置映射回短语下标。
+    """
+    indicator = np.zeros((len(phrases), len(patterns)), dtype=bool)
+    if not phrases:
+        return indicator
+    joined = "\n".join(phrases)
+    starts = np.cumsum([0] + [len(p) + 1 for p in phrases[:-1]])
+    for j, pattern in enumerate(patterns):
+        positions = [m.start() for m in pattern.finditer(joined)]
+        if positions:
+            indicator[np.searchsorted(starts, positions, side="right") - 1, j] = True
+    return indicator
+
+
 def normalize_phrase(s: str) -> str:
     """规范化短语：连字符->空格、收尾清理、简单的复数去尾"""
     s = s.replace("-", " ").strip()
@@ -43,10 +79,186 @@ def normalize_phrase(s: str) -> str:
     return " ".join(tokens)
 
 
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_phrases(phrases) -> List[str]:
+    """
+    批量规范化短语（与逐个调用 normalize_phrase 的结果一致）
+    连字符替换和空白合并在拼接后的整串上一次完成
+    """
+    phrases = [str(p) for p in phrases]
+    # \x00 不属于空白字符，可以安全地作为分隔符；极少数含 \x00 的输入退回逐个处理
+    if not phrases or any("\x00" in p for p in phrases):
+        return [normalize_phrase(p) for p in phrases]
+    joined = _WHITESPACE_RE.sub(" ", "\x00".join(phrases).replace("-", " "))
+    normalized = []
+    for s in joined.split("\x00"):
+        s = s.strip()
+        head, _, last = s.rpartition(" ")
+        # 去掉极短词
+        if not head and len(last) <= 2:
+            normalized.append("")
+            continue
+        # 粗略单复数合并（仅最后一个词）
+        if len(last) > 3 and last.endswith("s"):
+            s = f"{head} {last[:-1]}" if head else last[:-1]
+        normalized.append(s)
+    return normalized
+
+
+# ==================== 噪声短语规则表 ====================
+# is_noise_phrase（逐个判断）与 filter_noise_phrases（批量判断）共用以下规则
+
+# 1. 网址相关（更严格的过滤）
+NOISE_URL_PATTERNS = [
+    r'www\.',
+    r'http',
+    r'https',
+    r'\.com',
+    r'\.org',
+    r'\.edu',
+    r'\.net',
+    r'\.uk',
+    r'\.cn',
+    r'\.ac\.uk',  # 大学域名（如 durham.ac.uk）
+    r'\.edu\.',   # .edu. 域名
+    r'email',
+    r'@',
+    r'\.gov',
+    r'\.mil',
+    r'doi\s+org',  # DOI链接
+    r'dx\s+doi',   # DOI链接变体
+    r'doi\s+org',  # DOI链接
+]
+
+# 1.5. 引用格式相关（arxiv, preprint, et al等）
+NOISE_CITATION_PATTERNS = [
+    r'\barxiv\s+preprint',
+    r'\bpreprint\s+arxiv',
+    r'\barxiv\s+\d+',
+    r'\bet\s+al\s+(proposed|introduced|presented|showed|demonstrated|developed)',
+    r'\bet\s+al\s+\d+',
+    r'\bdoi\s+org',
+    r'\bdx\s+doi',
+    r'\bvol\s+\d+',
+    r'\bpp\s+\d+',
+    r'\bpages\s+\d+',
+    r'\bvolume\s+\d+',
+]
+
+# 1.6. 大学域名和机构名称（更全面的过滤）
+NOISE_UNIVERSITY_PATTERNS = [
+    r'\b\w+\.ac\.uk\b',  # 匹配 "durham.ac.uk", "oxford.ac.uk" 等
+    r'\b\w+\.edu\b',     # 匹配 "mit.edu", "stanford.edu" 等
+    r'\bdurham\s+(university|ac|uk)\b',
+    r'\buniversity\s+of\s+\w+\s+(ac|uk|edu)\b',
+    r'\bdepartment\s+of\s+[a-z\s]+\s+(university|ac|uk|edu)\b',
+    r'\bfaculty\s+of\s+[a-z\s]+\s+(university|ac|uk|edu)\b',
+    r'\bschool\s+of\s+[a-z\s]+\s+(university|ac|uk|edu)\b',
+]
+
+# 2. 电话号码格式（数字+常见电话词汇）
+NOISE_PHONE_PATTERNS = [
+    r'\d+.*(tel|phone|fax|mobile)',
+    r'(tel|phone|fax|mobile).*\d+',
+]
+
+# 3. 地址相关词汇和机构信息
+NOISE_ADDRESS_KEYWORDS = [
+    'centre', 'center', 'street', 'road', 'avenue', 'lane',
+    'building', 'floor', 'room', 'office', 'address',
+    'postcode', 'zip', 'code', 'location',
+    'durham', 'stockton', 'palatine',  # 常见地名
+    'department', 'faculty', 'school', 'institute', 'college',  # 机构名称
+    'campus', 'headquarters', 'head office',  # 办公地点
+]
+NOISE_INSTITUTIONAL_KEYWORDS = ['department', 'faculty', 'school', 'institute', 'college', 'university']
+# 学术上下文（如"center of mass", "school of thought"），包含时保留
+NOISE_ACADEMIC_CONTEXT = [
+    'mass', 'gravity', 'distribution', 'cluster', 'point',
+    'matrix', 'vector', 'space', 'dimension',
+    'thought', 'theory', 'method', 'approach', 'algorithm',
+    'model', 'learning', 'network', 'data', 'analysis'
+]
+
+# 3.5. 地名+缩写模式（如 "newyork ny usa"）
+US_STATE_ABBREVS = {'ny', 'ca', 'tx', 'fl', 'il', 'pa', 'oh', 'ga', 'nc', 'mi',
+                    'nj', 'va', 'wa', 'az', 'ma', 'tn', 'in', 'mo', 'md', 'wi',
+                    'co', 'mn', 'sc', 'al', 'la', 'ky', 'or', 'ok', 'ct', 'ia',
+                    'ut', 'ar', 'nv', 'ms', 'ks', 'nm', 'ne', 'wv', 'id', 'hi',
+                    'nh', 'me', 'mt', 'ri', 'de', 'sd', 'nd', 'ak', 'dc', 'vt', 'wy'}
+COUNTRY_ABBREVS = {'usa', 'uk', 'us', 'ca', 'au', 'de', 'fr', 'it', 'es', 'nl', 'be', 'ch',
+                   'at', 'se', 'no', 'dk', 'fi', 'pl', 'cz', 'ie'}
+
+# 4. 联系方式相关
+NOISE_CONTACT_KEYWORDS = [
+    'telephone', 'phone', 'tel', 'fax', 'mobile',
+    'contact', 'call', 'reach',
+]
+# 学术相关关键词（即使包含联系方式词汇，如果是学术术语也保留）
+NOISE_ACADEMIC_KEYWORDS = [
+    'classification', 'algorithm', 'model', 'data', 'analysis',
+    'method', 'approach', 'technique', 'theory', 'concept',
+    'learning', 'network', 'system', 'process', 'function',
+    'matrix', 'vector', 'curve', 'score', 'metric', 'measure',
+    'evaluation', 'performance', 'accuracy', 'precision', 'recall',
+    'roc', 'auc', 'component', 'feature', 'sample', 'dataset'
+]
+
+# 6. 类似 "chapter 4 section" 的格式化信息（包含以下词时保留）
+NOISE_SECTION_PATTERN = r'[a-z]+\s+\d+\s+[a-z]+'
+NOISE_SECTION_KEEP_WORDS = [
+    'chapter', 'section', 'figure', 'table', 'equation',
+    'algorithm', 'method', 'model'
+]
+
+# 8. 常见无意义词汇组合（从短语开头匹配）
+NOISE_MATCH_PATTERNS = [
+    r'^\d+\s*$',  # 纯数字
+    r'^[a-z]\s+[a-z]\s+[a-z]$',  # 三个单字母
+    r'page\s+\d+',  # 页码
+    r'figure\s+\d+',  # 图号（但保留figure本身）
+]
+
+# 9. 机构联系信息模式（如 "Department of X, University of Y"）
+NOISE_INSTITUTION_CONTACT_PATTERN = r'(department|faculty|school|institute|college)\s+of\s+[^,]+,\s+(university|institute)'
+
+# 10. 常见大学名称
+COMMON_UNIVERSITIES = ['durham', 'oxford', 'cambridge', 'harvard', 'mit', 'stanford', 'yale', 'princeton']
+NOISE_UNIVERSITY_NAME_PATTERN = r'\b(durham|oxford|cambridge|harvard|mit|stanford|yale|princeton)\s+(university|college|institute)\b'
+
+# 11. 版权信息相关
+NOISE_COPYRIGHT_KEYWORDS = [
+    'copyright', 'licensed', 'license', 'reserved', 'rights',
+    'permission', 'reproduce', 'reproduction', 'prohibited',
+    'limited use', 'use limited', 'all rights', 'rights reserved'
+]
+
+# 12. 常见的学术缩写（短词过多时仍保留）
+ACADEMIC_ABBREVS = {'ai', 'ml', 'dl', 'nlp', 'cv', 'cnn', 'rnn', 'lstm', 'gan', 'svm',
+                    'pca', 'ica', 'knn', 'rf', 'gbm', 'xgb', 'bert', 'gpt', 'api', 'url',
+                    'http', 'html', 'xml', 'json', 'sql', 'db', 'id', 'ui', 'ux'}
+
+# 13. "world wide web"等URL相关但可能被误识别为学术术语的短语
+URL_LIKE_PHRASES = {'world wide web', 'www', 'http', 'https', 'ftp', 'smtp'}
+
+# 无条件规则（1、1.5、1.6、2、5、8、9、11）的必要子串：不含数字、不含其中任何一个子串、
+# 也不是"单字母+空白"开头的短语不可能命中这些规则，批量过滤时可直接跳过。
+# 带 \d 的规则（页码、卷号、电话等）由"含数字"覆盖；修改上面的规则时需同步维护此表
+NOISE_ALWAYS_TRIGGERS = [
+    'www', 'http', '.com', '.org', '.edu', '.net', '.uk', '.cn', 'email', '@', '.gov', '.mil',
+    'doi', 'arxiv', 'preprint',
+    'proposed', 'introduced', 'presented', 'showed', 'demonstrated', 'developed',
+    'durham', 'university', 'department', 'faculty', 'school', ',',
+] + NOISE_COPYRIGHT_KEYWORDS
+
+
 def is_noise_phrase(phrase: str) -> bool:
     """
     判断短语是否为噪声（无关术语）
     返回True表示应该过滤掉
+    （批量场景请使用 filter_noise_phrases）
     """
     phrase_lower = phrase.lower().strip()
     tokens = phrase_lower.split()
@@ -60,90 +272,18 @@ def is_noise_phrase(phrase: str) -> bool:
         if any(count >= 2 for count in word_counts.values()):
             return True
     
-    # 1. 包含网址相关（更严格的过滤）
-    url_patterns = [
-        r'www\.',
-        r'http',
-        r'https',
-        r'\.com',
-        r'\.org',
-        r'\.edu',
-        r'\.net',
-        r'\.uk',
-        r'\.cn',
-        r'\.ac\.uk',  # 大学域名（如 durham.ac.uk）
-        r'\.edu\.',   # .edu. 域名
-        r'email',
-        r'@',
-        r'\.gov',
-        r'\.mil',
-        r'doi\s+org',  # DOI链接
-        r'dx\s+doi',   # DOI链接变体
-        r'doi\s+org',  # DOI链接
-    ]
-    for pattern in url_patterns:
-        if re.search(pattern, phrase_lower):
-            return True
-    
-    # 1.5. 引用格式相关（arxiv, preprint, et al等）
-    citation_patterns = [
-        r'\barxiv\s+preprint',
-        r'\bpreprint\s+arxiv',
-        r'\barxiv\s+\d+',
-        r'\bet\s+al\s+(proposed|introduced|presented|showed|demonstrated|developed)',
-        r'\bet\s+al\s+\d+',
-        r'\bdoi\s+org',
-        r'\bdx\s+doi',
-        r'\bvol\s+\d+',
-        r'\bpp\s+\d+',
-        r'\bpages\s+\d+',
-        r'\bvolume\s+\d+',
-    ]
-    for pattern in citation_patterns:
+    # 1. 包含网址相关 / 1.5. 引用格式相关 / 1.6. 大学域名和机构名称 / 2. 电话号码格式
+    for pattern in NOISE_URL_PATTERNS + NOISE_CITATION_PATTERNS + NOISE_UNIVERSITY_PATTERNS + NOISE_PHONE_PATTERNS:
         if re.search(pattern, phrase_lower):
             return True
     
-    # 1.6. 大学域名和机构名称（更全面的过滤）
-    university_patterns = [
-        r'\b\w+\.ac\.uk\b',  # 匹配 "durham.ac.uk", "oxford.ac.uk" 等
-        r'\b\w+\.edu\b',     # 匹配 "mit.edu", "stanford.edu" 等
-        r'\bdurham\s+(university|ac|uk)\b',
-        r'\buniversity\s+of\s+\w+\s+(ac|uk|edu)\b',
-        r'\bdepartment\s+of\s+[a-z\s]+\s+(university|ac|uk|edu)\b',
-        r'\bfaculty\s+of\s+[a-z\s]+\s+(university|ac|uk|edu)\b',
-        r'\bschool\s+of\s+[a-z\s]+\s+(university|ac|uk|edu)\b',
-    ]
-    for pattern in university_patterns:
-        if re.search(pattern, phrase_lower):
-            return True
-    
-    # 2. 包含电话号码格式（数字+常见电话词汇）
-    if re.search(r'\d+.*(tel|phone|fax|mobile)', phrase_lower):
-        return True
-    if re.search(r'(tel|phone|fax|mobile).*\d+', phrase_lower):
-        return True
-    
     # 3. 地址相关词汇和机构信息（更严格的过滤）
-    address_keywords = [
-        'centre', 'center', 'street', 'road', 'avenue', 'lane',
-        'building', 'floor', 'room', 'office', 'address',
-        'postcode', 'zip', 'code', 'location',
-        'durham', 'stockton', 'palatine',  # 常见地名
-        'department', 'faculty', 'school', 'institute', 'college',  # 机构名称
-        'campus', 'headquarters', 'head office',  # 办公地点
-    ]
     # 如果短语中包含地址关键词，且同时包含机构相关词汇，很可能是机构地址
-    address_count = sum(1 for kw in address_keywords if kw in phrase_lower)
-    institutional_keywords = ['department', 'faculty', 'school', 'institute', 'college', 'university']
-    has_institutional = any(kw in phrase_lower for kw in institutional_keywords)
+    address_count = sum(1 for kw in NOISE_ADDRESS_KEYWORDS if kw in phrase_lower)
+    has_institutional = any(kw in phrase_lower for kw in NOISE_INSTITUTIONAL_KEYWORDS)
     
     # 但如果是学术术语（如"center of mass", "school of thought"），保留
-    academic_context = any(academic in phrase_lower for academic in [
-        'mass', 'gravity', 'distribution', 'cluster', 'point',
-        'matrix', 'vector', 'space', 'dimension',
-        'thought', 'theory', 'method', 'approach', 'algorithm',
-        'model', 'learning', 'network', 'data', 'analysis'
-    ])
+    academic_context = any(academic in phrase_lower for academic in NOISE_ACADEMIC_CONTEXT)
     
     # 如果包含机构关键词且没有学术上下文，很可能是机构信息
     if has_institutional and not academic_context:
@@ -152,41 +292,19 @@ def is_noise_phrase(phrase: str) -> bool:
     if address_count >= 2 and not academic_context:
         return True
     
-    # 3.5. 地名+缩写模式（如 "newyork ny usa"）
-    us_state_abbrevs = ['ny', 'ca', 'tx', 'fl', 'il', 'pa', 'oh', 'ga', 'nc', 'mi', 
-                       'nj', 'va', 'wa', 'az', 'ma', 'tn', 'in', 'mo', 'md', 'wi',
-                       'co', 'mn', 'sc', 'al', 'la', 'ky', 'or', 'ok', 'ct', 'ia',
-                       'ut', 'ar', 'nv', 'ms', 'ks', 'nm', 'ne', 'wv', 'id', 'hi',
-                       'nh', 'me', 'mt', 'ri', 'de', 'sd', 'nd', 'ak', 'dc', 'vt', 'wy']
-    country_abbrevs = ['usa', 'uk', 'us', 'ca', 'au', 'de', 'fr', 'it', 'es', 'nl', 'be', 'ch', 'at', 'se', 'no', 'dk', 'fi', 'pl', 'cz', 'ie']
-    
-    # 检测地名+州/国家缩写模式
+    # 3.5. 检测地名+州/国家缩写模式
     if len(tokens) >= 2:
         has_place_name = any(len(t) > 3 for t in tokens)  # 至少有一个较长的词（可能是地名）
-        has_abbrev = any(t in us_state_abbrevs or t in country_abbrevs for t in tokens)
+        has_abbrev = any(t in US_STATE_ABBREVS or t in COUNTRY_ABBREVS for t in tokens)
         if has_place_name and has_abbrev:
             # 如果没有学术上下文，很可能是地址
             if not academic_context:
                 return True
     
     # 4. 联系方式相关
-    contact_keywords = [
-        'telephone', 'phone', 'tel', 'fax', 'mobile',
-        'contact', 'call', 'reach',
-    ]
-    # 学术相关关键词（即使包含联系方式词汇，如果是学术术语也保留）
-    academic_keywords = [
-        'classification', 'algorithm', 'model', 'data', 'analysis',
-        'method', 'approach', 'technique', 'theory', 'concept',
-        'learning', 'network', 'system', 'process', 'function',
-        'matrix', 'vector', 'curve', 'score', 'metric', 'measure',
-        'evaluation', 'performance', 'accuracy', 'precision', 'recall',
-        'roc', 'auc', 'component', 'feature', 'sample', 'dataset'
-    ]
-    
-    if any(kw in phrase_lower for kw in contact_keywords):
+    if any(kw in phrase_lower for kw in NOISE_CONTACT_KEYWORDS):
         # 如果包含联系方式词汇且看起来不像学术术语
-        if not any(academic in phrase_lower for academic in academic_keywords):
+        if not any(academic in phrase_lower for academic in NOISE_ACADEMIC_KEYWORDS):
             return True
     
     # 5. 纯数字或包含过多数字
@@ -194,12 +312,9 @@ def is_noise_phrase(phrase: str) -> bool:
         return True
     
     # 6. 包含特殊字符组合（可能是格式化的信息）
-    if re.search(r'[a-z]+\s+\d+\s+[a-z]+', phrase_lower):  # 类似 "chapter 4 section"
+    if re.search(NOISE_SECTION_PATTERN, phrase_lower):  # 类似 "chapter 4 section"
         # 但保留学术相关的
-        if not any(academic in phrase_lower for academic in [
-            'chapter', 'section', 'figure', 'table', 'equation',
-            'algorithm', 'method', 'model'
-        ]):
+        if not any(academic in phrase_lower for academic in NOISE_SECTION_KEEP_WORDS):
             return True
     
     # 7. 过短或过长的短语（可能是噪声）
@@ -207,57 +322,171 @@ def is_noise_phrase(phrase: str) -> bool:
         return True
     
     # 8. 包含常见无意义词汇组合
-    noise_patterns = [
-        r'^\d+\s*$',  # 纯数字
-        r'^[a-z]\s+[a-z]\s+[a-z]$',  # 三个单字母
-        r'page\s+\d+',  # 页码
-        r'figure\s+\d+',  # 图号（但保留figure本身）
-    ]
-    for pattern in noise_patterns:
+    for pattern in NOISE_MATCH_PATTERNS:
         if re.match(pattern, phrase_lower):
             return True
     
     # 9. 机构联系信息模式（如 "Department of X, University of Y"）
-    if re.search(r'(department|faculty|school|institute|college)\s+of\s+[^,]+,\s+(university|institute)', phrase_lower):
+    if re.search(NOISE_INSTITUTION_CONTACT_PATTERN, phrase_lower):
         return True
     
     # 10. 包含常见大学名称（如果只是地名+大学，很可能是机构信息）
-    common_universities = ['durham', 'oxford', 'cambridge', 'harvard', 'mit', 'stanford', 'yale', 'princeton']
-    if any(uni in phrase_lower for uni in common_universities):
+    if any(uni in phrase_lower for uni in COMMON_UNIVERSITIES):
         # 如果只是 "durham university" 或类似结构，且没有学术上下文，过滤掉
-        if re.search(r'\b(durham|oxford|cambridge|harvard|mit|stanford|yale|princeton)\s+(university|college|institute)\b', phrase_lower):
+        if re.search(NOISE_UNIVERSITY_NAME_PATTERN, phrase_lower):
             if not academic_context:
                 return True
     
     # 11. 版权信息相关
-    copyright_keywords = [
-        'copyright', 'licensed', 'license', 'reserved', 'rights',
-        'permission', 'reproduce', 'reproduction', 'prohibited',
-        'limited use', 'use limited', 'all rights', 'rights reserved'
-    ]
-    if any(kw in phrase_lower for kw in copyright_keywords):
+    if any(kw in phrase_lower for kw in NOISE_COPYRIGHT_KEYWORDS):
         return True
     
     # 12. 包含过多单字母或双字母词（可能是缩写或噪声）
     short_word_count = sum(1 for t in tokens if len(t) <= 2)
     if len(tokens) >= 2 and short_word_count >= len(tokens) * 0.5:  # 超过一半是短词
         # 但保留一些常见的学术缩写
-        academic_abbrevs = ['ai', 'ml', 'dl', 'nlp', 'cv', 'cnn', 'rnn', 'lstm', 'gan', 'svm', 
-                           'pca', 'ica', 'knn', 'rf', 'gbm', 'xgb', 'bert', 'gpt', 'api', 'url',
-                           'http', 'html', 'xml', 'json', 'sql', 'db', 'id', 'ui', 'ux']
-        if not any(t in academic_abbrevs for t in tokens):
+        if not any(t in ACADEMIC_ABBREVS for t in tokens):
             return True
     
     # 13. 检测"world wide web"等URL相关但可能被误识别为学术术语的短语
-    url_like_phrases = [
-        'world wide web', 'www', 'http', 'https', 'ftp', 'smtp'
-    ]
-    if phrase_lower in url_like_phrases:
+    if phrase_lower in URL_LIKE_PHRASES:
         return True
     
     return False
 
 
+def _any_of(patterns: List[str]) -> str:
+    """把多个正则合并为一个分支表达式（任一分支命中即命中）"""
+    return "|".join(f"(?:{p})" for p in patterns)
+
+
+# 无条件判定为噪声的规则（1、1.5、1.6、2、5、8、9、11）合并为一个正则；
+# 规则8原本用 re.match，这里以 \A 锚定到开头，语义不变
+_NOISE_ALWAYS_RE = re.compile(_any_of(
+    NOISE_URL_PATTERNS + NOISE_CITATION_PATTERNS + NOISE_UNIVERSITY_PATTERNS + NOISE_PHONE_PATTERNS
+    + [r'\d{4,}', NOISE_INSTITUTION_CONTACT_PATTERN]
+    + [rf'\A(?:{p})' for p in NOISE_MATCH_PATTERNS]
+    + [re.escape(kw) for kw in NOISE_COPYRIGHT_KEYWORDS]
+))
+_NOISE_SECTION_RE = re.compile(NOISE_SECTION_PATTERN)
+_NOISE_UNIVERSITY_NAME_RE = re.compile(NOISE_UNIVERSITY_NAME_PATTERN)
+
+
+_NOISE_TRIGGER_PATTERNS = [re.compile(re.escape(t)) for t in NOISE_ALWAYS_TRIGGERS] + [re.compile(r'\d')]
+
+
+def _regex_hit_mask(lowered: List[str], regex, candidates: Optional[np.ndarray] = None) -> np.ndarray:
+    """判断每个短语是否命中合并正则；给定 candidates 时只搜索这些下标的短语"""
+    mask = np.zeros(len(lowered), dtype=bool)
+    indices = range(len(lowered)) if candidates is None else np.flatnonzero(candidates)
+    for i in indices:
+        mask[i] = regex.search(lowered[i]) is not None
+    return mask
+
+
+# 条件规则中用到的子串关键词表：合并为一个术语表，一次构造包含关系矩阵后按列分组
+_NOISE_KEYWORD_GROUPS = {
+    "address": NOISE_ADDRESS_KEYWORDS,
+    "institutional": NOISE_INSTITUTIONAL_KEYWORDS,
+    "academic_context": NOISE_ACADEMIC_CONTEXT,
+    "contact": NOISE_CONTACT_KEYWORDS,
+    "academic": NOISE_ACADEMIC_KEYWORDS,
+    "section_keep": NOISE_SECTION_KEEP_WORDS,
+    "university": COMMON_UNIVERSITIES,
+}
+_NOISE_KEYWORDS = sorted({kw for group in _NOISE_KEYWORD_GROUPS.values() for kw in group})
+_NOISE_KEYWORD_PATTERNS = [re.compile(re.escape(kw)) for kw in _NOISE_KEYWORDS]
+_NOISE_KEYWORD_COLUMNS = {
+    name: np.array([_NOISE_KEYWORDS.index(kw) for kw in dict.fromkeys(group)])
+    for name, group in _NOISE_KEYWORD_GROUPS.items()
+}
+
+
+def filter_noise_phrases(phrases) -> np.ndarray:
+    """
+    批量判断短语是否为噪声，结果与逐个调用 is_noise_phrase 一致
+
+    - 无条件规则合并为一个预编译正则，且只对命中必要子串（NOISE_ALWAYS_TRIGGERS）的短语搜索
+    - 条件规则中的关键词子串包含关系一次性构造为矩阵，按列分组求和/求或
+    - 词级规则（重复词、地名缩写、短词比例）先对整个词表的去重词计算属性，
+      再按短语分段聚合
+
+    Args:
+        phrases: 短语列表或数组
+
+    Returns:
+        np.ndarray[bool]: True 表示保留（非噪声），False 表示应过滤
+    """
+    lowered = [str(p).lower().strip() for p in phrases]
+    n = len(lowered)
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+
+    # 关键词包含关系（条件规则用）与无条件规则的必要子串，一次性在整个词表上扫描
+    contains = _term_indicator_matrix(lowered, _NOISE_KEYWORD_PATTERNS)
+    triggered = _term_indicator_matrix(lowered, _NOISE_TRIGGER_PATTERNS).any(axis=1)
+    # "单字母+空白"开头（规则8中"三个单字母"）没有固定子串，单独判断
+    triggered |= np.fromiter((len(p) > 1 and p[1].isspace() for p in lowered), dtype=bool, count=n)
+
+    # 无条件规则：只对命中必要子串的少数短语做合并正则搜索
+    noise = _regex_hit_mask(lowered, _NOISE_ALWAYS_RE, candidates=triggered)
+
+    def group_any(name):
+        return contains[:, _NOISE_KEYWORD_COLUMNS[name]].any(axis=1)
+
+    academic_context = group_any("academic_context")
+    address_count = contains[:, _NOISE_KEYWORD_COLUMNS["address"]].sum(axis=1)
+    # 3. 机构关键词或多个地址关键词，且没有学术上下文
+    noise |= (group_any("institutional") | (address_count >= 2)) & ~academic_context
+    # 4. 联系方式词汇且不像学术术语
+    noise |= group_any("contact") & ~group_any("academic")
+    # 6. "chapter 4 section" 之类的格式化信息
+    has_digit = _term_indicator_matrix(lowered, _NOISE_TRIGGER_PATTERNS[-1:])[:, 0]
+    noise |= _regex_hit_mask(lowered, _NOISE_SECTION_RE, candidates=has_digit) & ~group_any("section_keep")
+    # 10. "durham university" 之类的机构名称
+    noise |= _regex_hit_mask(lowered, _NOISE_UNIVERSITY_NAME_RE,
+                             candidates=contains[:, _NOISE_KEYWORD_COLUMNS["university"]].any(axis=1)) & ~academic_context
+    # 13. URL相关短语
+    noise |= np.fromiter((p in URL_LIKE_PHRASES for p in lowered), dtype=bool, count=n)
+
+    # 词级规则：对整个词表的去重词一次性计算属性，再按短语分段聚合
+    token_lists = [p.split() for p in lowered]
+    n_tokens = np.fromiter((len(t) for t in token_lists), dtype=np.int64, count=n)
+    token_ids = {}
+    flat_ids = np.fromiter(
+        (token_ids.setdefault(t, len(token_ids)) for tokens in token_lists for t in tokens),
+        dtype=np.int64, count=int(n_tokens.sum()),
+    )
+    unique_tokens = list(token_ids)
+    token_len = np.fromiter((len(t) for t in unique_tokens), dtype=np.int64, count=len(unique_tokens))
+    abbrev_tokens = US_STATE_ABBREVS | COUNTRY_ABBREVS
+    is_abbrev = np.fromiter((t in abbrev_tokens for t in unique_tokens), dtype=bool, count=len(unique_tokens))
+    is_academic_abbrev = np.fromiter((t in ACADEMIC_ABBREVS for t in unique_tokens), dtype=bool,
+                                     count=len(unique_tokens))
+    phrase_of_token = np.repeat(np.arange(n), n_tokens)
+
+    def per_phrase_count(token_mask):
+        return np.bincount(phrase_of_token, weights=token_mask[flat_ids], minlength=n)
+
+    multi_word = n_tokens >= 2
+    # 0. 同一短语内出现重复词
+    keys = np.unique(phrase_of_token * max(len(unique_tokens), 1) + flat_ids, return_counts=True)
+    repeated = np.zeros(n, dtype=bool)
+    repeated[keys[0][keys[1] >= 2] // max(len(unique_tokens), 1)] = True
+    noise |= multi_word & repeated
+    # 3.5. 地名+州/国家缩写
+    has_place_name = per_phrase_count(token_len > 3) > 0
+    has_abbrev = per_phrase_count(is_abbrev) > 0
+    noise |= multi_word & has_place_name & has_abbrev & ~academic_context
+    # 7. 超过5个词
+    noise |= n_tokens > 5
+    # 12. 超过一半是短词且不含常见学术缩写
+    short_word_count = per_phrase_count(token_len <= 2)
+    noise |= multi_word & (short_word_count >= n_tokens * 0.5) & (per_phrase_count(is_academic_abbrev) == 0)
+
+    return ~noise
+
+
 def build_vectorizer():
     """构建TF-IDF向量化器"""
     return TfidfVectorizer(
@@ -309,119 +538,484 @@ def mmr_select(candidates, cand_vectors, query_vec, top_k=6, lambda_div=0.7):
     return [candidates[i] for i in selected]
 
 
+# 学术和技术术语词典（按重要性加权），顺序即匹配优先级：只取第一个命中的术语
+SEMANTIC_TERM_WEIGHTS = (
+    # 机器学习核心概念
+    ('machine learning', 3.0), ('deep learning', 3.0), ('neural network', 3.0),
+    ('artificial intelligence', 3.0), ('ai', 2.5), ('ml', 2.0), ('dl', 2.0),
+    # 模型和算法
+    ('neural networks', 2.5), ('deep neural', 2.5), ('convolutional', 2.0),
+    ('recurrent neural', 2.0), ('rnn', 2.0), ('lstm', 2.0), ('cnn', 2.0),
+    ('transformer', 2.5), ('attention mechanism', 2.5), ('bert', 2.0), ('gpt', 2.0),
+    ('generative model', 2.5), ('gan', 2.0), ('variational', 2.0),
+    # 推荐系统
+    ('recommendation system', 2.5), ('content based', 2.5), ('collaborative filtering', 2.5),
+    ('recommender system', 2.5), ('content based filtering', 2.5),
+    # 自然语言处理
+    ('natural language', 2.5), ('nlp', 2.0), ('language model', 2.5),
+    ('large language model', 3.0), ('llm', 2.5), ('text processing', 2.0),
+    # 数据科学
+    ('data mining', 2.0), ('feature extraction', 2.0), ('dimensionality reduction', 2.0),
+    ('principal component', 2.0), ('pca', 1.5), ('clustering', 2.0), ('classification', 2.0),
+    ('regression', 2.0), ('supervised learning', 2.0), ('unsupervised learning', 2.0),
+    # 统计和数学
+    ('probability', 1.5), ('statistical', 1.5), ('optimization', 1.5),
+    ('gradient descent', 2.0), ('backpropagation', 2.0), ('loss function', 2.0),
+    # 计算机视觉
+    ('computer vision', 2.5), ('cv', 2.0), ('image processing', 2.0),
+    ('object detection', 2.0), ('semantic segmentation', 2.0),
+    # 其他重要术语
+    ('algorithm', 1.5), ('method', 1.0), ('approach', 1.0), ('technique', 1.0),
+    ('framework', 1.5), ('architecture', 1.5), ('model', 1.5), ('system', 1.0),
+    ('training', 1.5), ('evaluation', 1.5), ('performance', 1.0), ('accuracy', 1.0),
+)
+
+# 同时包含多个学术关键词时额外加分
+SEMANTIC_BONUS_KEYWORDS = ('learning', 'network', 'model', 'algorithm', 'method',
+                           'data', 'feature', 'training', 'neural', 'deep')
+
+# 预编译的打分表：术语正则、权重向量（额外加分关键词排在加权术语之后，权重为0）
+_SEMANTIC_TABLE_TERMS = [t for t, _ in SEMANTIC_TERM_WEIGHTS] + list(SEMANTIC_BONUS_KEYWORDS)
+_SEMANTIC_PATTERNS = [re.compile(re.escape(t)) for t in _SEMANTIC_TABLE_TERMS]
+_SEMANTIC_WEIGHTS = np.array(
+    [w for _, w in SEMANTIC_TERM_WEIGHTS] + [0.0] * len(SEMANTIC_BONUS_KEYWORDS)
+)
+_N_SEMANTIC_TERMS = len(SEMANTIC_TERM_WEIGHTS)
+
+
+def compute_semantic_scores(phrases) -> np.ndarray:
+    """
+    批量计算短语的语义重要性得分（与逐个调用 compute_semantic_score 的结果一致）
+
+    先得到包含关系矩阵，取每行第一个命中的加权术语构成独热矩阵，
+    再与权重向量相乘；其余加分项同样按整列向量化计算。
+
+    Args:
+        phrases: 短语列表或数组
+
+    Returns:
+        np.ndarray: 每个短语的语义得分
+    """
+    phrases = [str(p) for p in phrases]
+    if not phrases:
+        return np.zeros(0, dtype=np.float64)
+    contains = _term_indicator_matrix([p.lower() for p in phrases], _SEMANTIC_PATTERNS)
+
+    # 只匹配一次：每行保留第一个命中的加权术语
+    weighted = contains[:, :_N_SEMANTIC_TERMS]
+    first_hit = weighted & (np.cumsum(weighted, axis=1) == 1)
+    scores = first_hit @ _SEMANTIC_WEIGHTS[:_N_SEMANTIC_TERMS]
+
+    # 如果包含多个学术关键词，额外加分
+    scores += np.where(contains[:, _N_SEMANTIC_TERMS:].sum(axis=1) >= 2, 0.5, 0.0)
+
+    # 如果是短语（包含空格），通常更有意义
+    has_space = np.fromiter((' ' in p for p in phrases), dtype=bool, count=len(phrases))
+    scores += np.where(has_space, 0.3, 0.0)
+
+    # 如果长度适中（2-4个词），通常更有意义
+    word_counts = np.fromiter((len(p.split()) for p in phrases), dtype=np.int64, count=len(phrases))
+    scores += np.where((word_counts >= 2) & (word_counts <= 4), 0.2, 0.0)
+
+    return scores
+
+
 def compute_semantic_score(phrase: str) -> float:
     """
     计算短语的语义重要性得分
     基于是否包含学术相关术语、技术术语等
+    （批量场景请使用 compute_semantic_scores）
     """
-    phrase_lower = phrase.lower()
-    score = 0.0
-    
-    # 学术和技术术语词典（按重要性加权）
-    academic_terms = {
-        # 机器学习核心概念
-        'machine learning': 3.0, 'deep learning': 3.0, 'neural network': 3.0,
-        'artificial intelligence': 3.0, 'ai': 2.5, 'ml': 2.0, 'dl': 2.0,
-        # 模型和算法
-        'neural networks': 2.5, 'deep neural': 2.5, 'convolutional': 2.0,
-        'recurrent neural': 2.0, 'rnn': 2.0, 'lstm': 2.0, 'cnn': 2.0,
-        'transformer': 2.5, 'attention mechanism': 2.5, 'bert': 2.0, 'gpt': 2.0,
-        'generative model': 2.5, 'gan': 2.0, 'variational': 2.0,
-        # 推荐系统
-        'recommendation system': 2.5, 'content based': 2.5, 'collaborative filtering': 2.5,
-        'recommender system': 2.5, 'content based filtering': 2.5,
-        # 自然语言处理
-        'natural language': 2.5, 'nlp': 2.0, 'language model': 2.5,
-        'large language model': 3.0, 'llm': 2.5, 'text processing': 2.0,
-        # 数据科学
-        'data mining': 2.0, 'feature extraction': 2.0, 'dimensionality reduction': 2.0,
-        'principal component': 2.0, 'pca': 1.5, 'clustering': 2.0, 'classification': 2.0,
-        'regression': 2.0, 'supervised learning': 2.0, 'unsupervised learning': 2.0,
-        # 统计和数学
-        'probability': 1.5, 'statistical': 1.5, 'optimization': 1.5,
-        'gradient descent': 2.0, 'backpropagation': 2.0, 'loss function': 2.0,
-        # 计算机视觉
-        'computer vision': 2.5, 'cv': 2.0, 'image processing': 2.0,
-        'object detection': 2.0, 'semantic segmentation': 2.0,
-        # 其他重要术语
-        'algorithm': 1.5, 'method': 1.0, 'approach': 1.0, 'technique': 1.0,
-        'framework': 1.5, 'architecture': 1.5, 'model': 1.5, 'system': 1.0,
-        'training': 1.5, 'evaluation': 1.5, 'performance': 1.0, 'accuracy': 1.0,
+    return float(compute_semantic_scores([phrase])[0])
+
+
+def list_txt_paths(folder_path: str) -> List[str]:
+    """
+    获取文件夹中所有txt文件路径（包括PDF转换后的txt），按路径排序
+    排除macOS系统文件（以._开头的资源分叉文件）和其他隐藏文件
+    """
+    return get_all_txt_file_paths(folder_path)
+
+
+# 与 build_vectorizer 完全一致的分词器（小写、停用词、1-3gram），只构建一次
+_TERM_ANALYZER = build_vectorizer().build_analyzer()
+
+
+def count_terms(cleaned_text: str) -> Counter:
+    """统计单个（已清洗）文档中每个1-3gram短语的出现次数"""
+    return Counter(_TERM_ANALYZER(cleaned_text))
+
+
+_WORD_RE = re.compile(r"\S+")
+
+
+def iter_text_chunks(cleaned_text: str, chunk_words: int = KEYWORD_CHUNK_WORDS):
+    """
+    把（已清洗的）文本按固定词数切分为窗口，逐块产出子串。
+    不超过 chunk_words 个词的文本原样作为一块
+    """
+    start = 0
+    words = 0
+    for m in _WORD_RE.finditer(cleaned_text):
+        if words == chunk_words:
+            yield cleaned_text[start:m.start()].rstrip()
+            start = m.start()
+            words = 0
+        words += 1
+    if words or not start:
+        yield cleaned_text[start:]
+
+
+def chunk_key(doc_hash: str, chunk_no: int) -> str:
+    """长文档第 chunk_no 块在状态中的键（单块文档直接使用内容哈希）"""
+    return f"{doc_hash}#{chunk_no}"
+
+
+def _cached_chunk_keys(state: dict, doc_hash: str) -> Optional[List[str]]:
+    """查找状态中某个文档已有的分块键，未缓存时返回None"""
+    docs = state["docs"]
+    if doc_hash in docs:
+        return [doc_hash]
+    keys = []
+    while chunk_key(doc_hash, len(keys)) in docs:
+        keys.append(chunk_key(doc_hash, len(keys)))
+    return keys or None
+
+
+def new_keyword_state() -> dict:
+    """
+    创建空的增量关键词状态
+
+    结构:
+        {
+            "version": 状态格式版本,
+            "terms": [短语, ...],               # 短语id -> 短语（只增不减，定期压缩）
+            "docs": {sha256: (ids, counts)},    # 每个文档内容哈希对应的词频（numpy数组）
+            "members": [sha256, ...],           # 当前语料的文档组成（允许重复）
+            "doc_freq": np.ndarray,             # 按短语id索引的文档频率（基于members）
+        }
+    """
+    return {
+        "version": KEYWORD_STATE_VERSION,
+        "terms": [],
+        "docs": {},
+        "members": [],
+        "doc_freq": np.zeros(0, dtype=np.int64),
     }
-    
-    # 检查是否包含学术术语
-    for term, weight in academic_terms.items():
-        if term in phrase_lower:
-            score += weight
-            break  # 只匹配一次，避免重复加分
-    
-    # 如果包含多个学术关键词，额外加分
-    academic_keywords = ['learning', 'network', 'model', 'algorithm', 'method', 
-                        'data', 'feature', 'training', 'neural', 'deep']
-    keyword_count = sum(1 for kw in academic_keywords if kw in phrase_lower)
-    if keyword_count >= 2:
-        score += 0.5
-    
-    # 如果是短语（包含空格），通常更有意义
-    if ' ' in phrase:
-        score += 0.3
-    
-    # 如果长度适中（2-4个词），通常更有意义
-    word_count = len(phrase.split())
-    if 2 <= word_count <= 4:
-        score += 0.2
-    
-    return score
 
 
-def extract_keywords_from_folder(folder_path: str, top_k: int = 10, min_docs: int = 3) -> list:
+def load_keyword_state(state_path: str) -> dict:
+    """
+    读取增量关键词状态，文件不存在、损坏或版本不符时返回空状态。
+    读取成功时刷新文件的修改时间：状态目录按最近使用时间淘汰（见 cleanup_worker 的缓存目录）
+    """
+    if not state_path or not os.path.isfile(state_path):
+        return new_keyword_state()
+    try:
+        with open(state_path, "rb") as f:
+            state = pickle.load(f)
+        if isinstance(state, dict) and state.get("version") == KEYWORD_STATE_VERSION:
+            os.utime(state_path, None)
+            return state
+    except Exception as e:
+        print(f"读取关键词状态失败，将重新计算: {e}")
+    return new_keyword_state()
+
+
+def save_keyword_state(state: dict, state_path: str):
+    """原子地保存增量关键词状态（先写临时文件再替换）"""
+    os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+    tmp_path = f"{state_path}.tmp"
+    # 以下划线开头的键是运行期缓存（如查找表），不落盘
+    persistent = {k: v for k, v in state.items() if not k.startswith("_")}
+    with open(tmp_path, "wb") as f:
+        pickle.dump(persistent, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, state_path)
+
+
+def _term_index(state: dict) -> dict:
+    """短语 -> 短语id 的查找表（不落盘，按需重建）"""
+    index = state.get("_term_index")
+    if index is None or len(index) != len(state["terms"]):
+        index = {t: i for i, t in enumerate(state["terms"])}
+        state["_term_index"] = index
+    return index
+
+
+def add_document_to_state(state: dict, doc_hash: str, term_counts: Counter):
+    """把一个新文档的词频登记到状态中（文档频率在 sync_state_members 中统一更新）"""
+    index = _term_index(state)
+    terms = state["terms"]
+    ids = np.empty(len(term_counts), dtype=np.int64)
+    counts = np.empty(len(term_counts), dtype=np.int64)
+    for i, (term, count) in enumerate(term_counts.items()):
+        term_id = index.get(term)
+        if term_id is None:
+            term_id = len(terms)
+            index[term] = term_id
+            terms.append(term)
+        ids[i] = term_id
+        counts[i] = count
+    state["docs"][doc_hash] = (ids, counts)
+
+
+def sync_state_members(state: dict, doc_hashes: List[str]):
+    """
+    把状态的语料组成更新为 doc_hashes：只对新增/移除的文档增减文档频率，
+    并丢弃不再属于语料的文档词频
+    """
+    doc_freq = state["doc_freq"]
+    if len(doc_freq) < len(state["terms"]):
+        doc_freq = np.concatenate([doc_freq, np.zeros(len(state["terms"]) - len(doc_freq), dtype=np.int64)])
+
+    old_members = Counter(state["members"])
+    new_members = Counter(doc_hashes)
+    for doc_hash, times in (new_members - old_members).items():
+        doc_freq[state["docs"][doc_hash][0]] += times
+    for doc_hash, times in (old_members - new_members).items():
+        if doc_hash in state["docs"]:
+            doc_freq[state["docs"][doc_hash][0]] -= times
+
+    for doc_hash in set(state["docs"]) - set(new_members):
+        del state["docs"][doc_hash]
+
+    state["doc_freq"] = doc_freq
+    state["members"] = list(doc_hashes)
+    _compact_state(state)
+
+
+def _compact_state(state: dict):
+    """当超过一半的短语已不在语料中时，重新编号以回收空间"""
+    doc_freq = state["doc_freq"]
+    alive = doc_freq > 0
+    if len(doc_freq) == 0 or alive.sum() * 2 >= len(doc_freq):
+        return
+    remap = np.cumsum(alive) - 1
+    state["terms"] = [t for t, keep in zip(state["terms"], alive) if keep]
+    state["doc_freq"] = doc_freq[alive]
+    state["docs"] = {h: (remap[ids], counts) for h, (ids, counts) in state["docs"].items()}
+    sorted_ids = state.get("sorted_ids")
+    if sorted_ids is not None and len(sorted_ids) == len(alive):
+        state["sorted_ids"] = remap[sorted_ids[alive[sorted_ids]]]
+    else:
+        state.pop("sorted_ids", None)
+    term_hashes = state.get("term_hashes")
+    if term_hashes is not None and len(term_hashes) == len(alive):
+        state["term_hashes"] = term_hashes[alive]
+    else:
+        state.pop("term_hashes", None)
+    state.pop("_term_index", None)
+
+
+def load_documents_into_state(documents: Iterable, state: dict, workers: int = 1) -> List[List[str]]:
+    """
+    按内容哈希把文档加载进状态：已见过的文档直接复用词频，只对新增/修改的文档分词。
+    超过 KEYWORD_CHUNK_WORDS 个词的文档按窗口切分，每块单独登记
+
+    Args:
+        documents: txt文件路径列表，或 (名称, 内容字节) 的可迭代对象（如 file_utils.iter_corpus_documents，逐个读取）
+        state: 增量关键词状态
+        workers: 分词进程数（>1 时新文档的各分块并行分词）
+
+    Returns:
+        与 documents 一一对应的分块键列表（短文档只有一块，键即内容哈希）
+    """
+    file_chunks = []
+    pending = []  # (分块键, 分块文本)
+    new_docs = 0
+    for doc in documents:
+        if isinstance(doc, tuple):
+            data = doc[1]
+        else:
+            with open(doc, "rb") as f:
+                data = f.read()
+        doc_hash = hashlib.sha256(data).hexdigest()
+        keys = _cached_chunk_keys(state, doc_hash)
+        if keys is None:
+            text = basic_clean(data.decode("utf-8", errors="ignore"))
+            chunks = list(iter_text_chunks(text))
+            if len(chunks) == 1:
+                keys = [doc_hash]
+            else:
+                keys = [chunk_key(doc_hash, i) for i in range(len(chunks))]
+            pending.extend(zip(keys, chunks))
+            new_docs += 1
+        file_chunks.append(keys)
+
+    if pending:
+        keys, chunks = zip(*pending)
+        if workers > 1 and len(chunks) > 1:
+            # 与PDF转换相同的启动方式：在多线程的服务进程中不直接fork
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=process_context()) as pool:
+                chunk_counts = pool.map(count_terms, chunks)
+                for key, term_counts in zip(keys, chunk_counts):
+                    add_document_to_state(state, key, term_counts)
+        else:
+            for key, chunk in zip(keys, chunks):
+                add_document_to_state(state, key, count_terms(chunk))
+
+    sync_state_members(state, [key for keys in file_chunks for key in keys])
+    if new_docs < len(file_chunks):
+        print(f"增量关键词提取: 复用 {len(file_chunks) - new_docs} 个文档, 新分词 {new_docs} 个文档")
+    n_chunked = sum(1 for keys in file_chunks if len(keys) > 1)
+    if n_chunked:
+        print(f"长文档分块: {n_chunked} 个文档切分为 {sum(len(keys) for keys in file_chunks if len(keys) > 1)} 块")
+    return file_chunks
+
+
+def _sorted_term_ids(state: dict) -> np.ndarray:
+    """
+    按短语字母序排列的短语id（缓存在状态中）。新增短语只做少量插入，
+    避免每次都对全部短语重新排序
+    """
+    terms = state["terms"]
+    sorted_ids = state.get("sorted_ids")
+    if sorted_ids is None or len(sorted_ids) == 0:
+        sorted_ids = np.argsort(np.array(terms, dtype=str), kind="stable").astype(np.int64)
+    elif len(sorted_ids) < len(terms):
+        new_ids = np.arange(len(sorted_ids), len(terms), dtype=np.int64)
+        new_ids = new_ids[np.argsort(np.array(terms[len(sorted_ids):], dtype=str), kind="stable")]
+        sorted_terms = np.array(terms, dtype=object)[sorted_ids]
+        positions = np.searchsorted(sorted_terms, np.array([terms[i] for i in new_ids], dtype=object))
+        sorted_ids = np.insert(sorted_ids, positions, new_ids)
+    state["sorted_ids"] = sorted_ids
+    return sorted_ids
+
+
+def _state_term_hashes(state: dict) -> np.ndarray:
+    """短语的64位哈希（用于查询背景IDF模型），缓存在状态中，只为新增短语计算"""
+    term_hashes = state.get("term_hashes")
+    if term_hashes is None:
+        term_hashes = np.zeros(0, dtype=np.uint64)
+    if len(term_hashes) < len(state["terms"]):
+        term_hashes = np.concatenate([term_hashes, hash_terms(state["terms"][len(term_hashes):])])
+    state["term_hashes"] = term_hashes
+    return term_hashes
+
+
+def build_tfidf_from_state(state: dict, doc_hashes: List[str], idf_model: Optional[dict] = None):
+    """
+    由状态中的词频直接组装TF-IDF矩阵，结果与 build_vectorizer().fit_transform 一致
+    （同样的max_df裁剪、平滑IDF和次线性TF），但无需重新分词
+
+    Args:
+        state: 增量关键词状态
+        doc_hashes: 当前语料的文档哈希列表（矩阵的行）
+        idf_model: 背景IDF模型（可选）。提供时IDF按"背景语料 + 当前文档"计算
+
+    Returns:
+        (X, vocab, term_ids): 文档-短语矩阵、按字母序排列的短语数组、对应的短语id
+    """
+    vectorizer = build_vectorizer()
+    n_docs = len(doc_hashes)
+    doc_freq = state["doc_freq"]
+    max_doc_count = vectorizer.max_df * n_docs if isinstance(vectorizer.max_df, float) else vectorizer.max_df
+    active_ids = np.flatnonzero((doc_freq >= 1) & (doc_freq <= max_doc_count))
+    if len(active_ids) == 0:
+        raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+
+    is_active = np.zeros(len(doc_freq), dtype=bool)
+    is_active[active_ids] = True
+    sorted_ids = _sorted_term_ids(state)
+    term_ids = sorted_ids[is_active[sorted_ids]]
+    vocab = np.array(state["terms"], dtype=object)[term_ids]
+
+    column_of = np.full(len(doc_freq), -1, dtype=np.int64)
+    column_of[term_ids] = np.arange(len(term_ids))
+
+    rows, cols, data = [], [], []
+    for row, doc_hash in enumerate(doc_hashes):
+        ids, counts = state["docs"][doc_hash]
+        doc_cols = column_of[ids]
+        keep = doc_cols >= 0
+        rows.append(np.full(int(keep.sum()), row, dtype=np.int64))
+        cols.append(doc_cols[keep])
+        data.append(counts[keep].astype(np.float64))
+    tf = np.concatenate(data)
+    if vectorizer.sublinear_tf:
+        tf = np.log(tf) + 1
+    if idf_model is not None:
+        idf = compute_idf(idf_model, _state_term_hashes(state)[term_ids], doc_freq[term_ids], n_docs)
+    else:
+        idf = np.log((1 + n_docs) / (1 + doc_freq[term_ids])) + 1
+    X = sparse.csr_matrix(
+        (tf * idf[np.concatenate(cols)], (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n_docs, len(term_ids)),
+    )
+    X.sort_indices()
+    return X, vocab, term_ids
+
+
+def corpus_term_counts(state: dict, doc_hashes: List[str]) -> np.ndarray:
+    """全书（所有文档合并）中每个短语id的总出现次数"""
+    totals = np.zeros(len(state["terms"]), dtype=np.float64)
+    for doc_hash in doc_hashes:
+        ids, counts = state["docs"][doc_hash]
+        np.add.at(totals, ids, counts)
+    return totals
+
+
+def file_aggregation_matrix(file_chunks: List[List[str]]) -> sparse.csr_matrix:
+    """文件 x 分块 的平均矩阵：左乘分块的TF-IDF矩阵即得到每个原始文件的短语得分"""
+    n_chunks = sum(len(keys) for keys in file_chunks)
+    rows = np.repeat(np.arange(len(file_chunks)), [len(keys) for keys in file_chunks])
+    weights = np.concatenate([np.full(len(keys), 1.0 / len(keys)) for keys in file_chunks])
+    return sparse.csr_matrix((weights, (rows, np.arange(n_chunks))), shape=(len(file_chunks), n_chunks))
+
+
+def extract_keywords_from_folder(folder_path: str, top_k: int = 10, min_docs: int = 3,
+                                 state_path: Optional[str] = None, idf_model: Optional[dict] = None,
+                                 workers: int = 1, documents: Optional[Iterable] = None) -> list:
     """
     从文件夹中提取关键词/主题
     
     Args:
-        folder_path: 包含txt文件的文件夹路径（包括PDF转换后的txt）
+        folder_path: 包含txt文件的文件夹路径（包括PDF转换后的txt）；提供 documents 时不读取
         top_k: 提取的关键词数量
         min_docs: 关键词至少出现在多少个文档中
+        state_path: 增量状态文件路径（可选）。同一语料再次上传时只对新增或修改的文档分词
+        idf_model: 背景IDF模型（可选，见 idf_model.load_idf_model），提供时不再只按当前文档估计IDF
+        workers: 新文档分块分词的并行进程数
+        documents: 直接提供的语料文档（可选，(名称, 内容字节) 的可迭代对象，如 file_utils.iter_corpus_documents）
     
     Returns:
         关键词列表
     """
     # 获取所有txt文件路径（包括PDF转换后的txt）
-    # 排除macOS系统文件（以._开头的资源分叉文件）和其他隐藏文件
-    txt_paths = []
-    if os.path.isdir(folder_path):
-        for root, dirs, files in os.walk(folder_path):
-            for fname in files:
-                # 过滤掉macOS资源分叉文件（以._开头）和其他系统隐藏文件
-                if fname.startswith('._') or fname.startswith('.DS_Store'):
-                    continue
-                if fname.lower().endswith(".txt"):
-                    txt_paths.append(os.path.join(root, fname))
-    
-    txt_paths = sorted(txt_paths)
-    
-    if len(txt_paths) < 2:
-        raise ValueError("需要至少2个txt文档才能提取关键词")
+    if documents is None:
+        documents = list_txt_paths(folder_path)
+        if not documents:
+            raise ValueError("需要至少2个txt文档才能提取关键词")
     
-    # 读取和清洗文档
-    texts = []
-    for p in txt_paths:
-        t = basic_clean(read_file(p))
-        texts.append(t)
+    # 读取、清洗并统计词频（已见过的文档直接复用，长文档分块）
+    state = load_keyword_state(state_path) if state_path else new_keyword_state()
+    previous_members = list(state["members"])
+    file_chunks = load_documents_into_state(documents, state, workers=workers)
+    doc_hashes = [key for keys in file_chunks for key in keys]
     
-    n_docs = len(texts)
-    if n_docs < 2:
-        raise ValueError("需要至少2个文档")
+    # 单个短文档无法估计覆盖度；长文档切分后的多个分块可以
+    if len(doc_hashes) < 2:
+        raise ValueError("需要至少2个txt文档才能提取关键词")
     
-    # 向量化（章节为文档）
-    vectorizer = build_vectorizer()
-    X = vectorizer.fit_transform(texts)
-    vocab = np.array(vectorizer.get_feature_names_out())
+    # 向量化（章节/分块为文档）
+    X, vocab, _ = build_tfidf_from_state(state, doc_hashes, idf_model=idf_model)
+    corpus_counts = corpus_term_counts(state, doc_hashes)
+    term_index = _term_index(state)
     
-    # 计算每个短语的"全书得分"和覆盖度
-    tfidf_sum = X.sum(axis=0).A1
+    # 语料有变化时才写回状态（同一份语料重复处理无需重写）
+    if state_path and doc_hashes != previous_members:
+        try:
+            save_keyword_state(state, state_path)
+        except Exception as e:
+            print(f"保存关键词状态失败: {e}")
+    
+    # 计算每个短语的"全书得分"和覆盖度：得分先按原始文件聚合（分块取平均），
+    # 覆盖度按分块统计，单个超长文档也能用 min_docs 过滤偶发短语
+    X_files = X if len(doc_hashes) == len(file_chunks) else file_aggregation_matrix(file_chunks) @ X
+    tfidf_sum = X_files.sum(axis=0).A1
+    file_freq = (X_files > 0).sum(axis=0).A1
+    tfidf_mean = tfidf_sum / np.maximum(file_freq, 1)
     doc_freq = (X > 0).sum(axis=0).A1
-    tfidf_mean = tfidf_sum / np.maximum(doc_freq, 1)
     
     # 覆盖度过滤
     mask_coverage = doc_freq >= max(1, min_docs)
@@ -438,17 +1032,14 @@ def extract_keywords_from_folder(folder_path: str, top_k: int = 10, min_docs: in
     cand_scores = tfidf_mean[candidate_mask]
     
     # 规范化短语、去重
-    normalized = [normalize_phrase(t) for t in cand_terms]
+    normalized = normalize_phrases(cand_terms)
     keep_idx = [i for i, s in enumerate(normalized) if s]
     cand_terms = cand_terms[keep_idx]
     cand_scores = cand_scores[keep_idx]
     normalized = [normalized[i] for i in keep_idx]
     
     # 过滤噪声短语（地址、联系方式、网址等）
-    noise_filtered_idx = []
-    for i, term in enumerate(cand_terms):
-        if not is_noise_phrase(term):
-            noise_filtered_idx.append(i)
+    noise_filtered_idx = np.flatnonzero(filter_noise_phrases(cand_terms)).tolist()
     
     if len(noise_filtered_idx) == 0:
         # 如果全部被过滤，至少保留一些
@@ -471,7 +1062,7 @@ def extract_keywords_from_folder(folder_path: str, top_k: int = 10, min_docs: in
         return []
     
     # 计算语义得分并综合TF-IDF得分
-    semantic_scores = np.array([compute_semantic_score(term) for term in final_raws])
+    semantic_scores = compute_semantic_scores(final_raws)
     # 归一化TF-IDF得分和语义得分
     if final_scores.max() > 0:
         normalized_tfidf = final_scores / final_scores.max()
@@ -496,7 +1087,13 @@ def extract_keywords_from_folder(folder_path: str, top_k: int = 10, min_docs: in
         sublinear_tf=True,
     )
     phrase_vectors = phrase_vec.fit_transform(final_raws)
-    query_vector = phrase_vec.transform([" ".join(texts)])
+    # "全书向量"直接由各文档词频累加得到，无需再对全文重新分词
+    phrase_vocab = phrase_vec.get_feature_names_out()
+    query_counts = np.array([
+        corpus_counts[term_index[t]] if t in term_index else 0.0 for t in phrase_vocab
+    ])
+    query_counts = np.where(query_counts > 0, np.log(np.maximum(query_counts, 1)) + 1, 0.0)
+    query_vector = normalize(sparse.csr_matrix(query_counts * phrase_vec.idf_))
     
     # 先按综合得分排序，再用MMR挑选多样化 Top-K
     order = np.argsort(-combined_scores)
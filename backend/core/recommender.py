@@ -7,10 +7,16 @@
 
 import os
 import re
+import hashlib
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict, Tuple
+from sklearn.preprocessing import normalize
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from backend.core.idf_model import compute_idf, hash_terms
+from backend.utils.file_utils import get_all_txt_file_paths
 
 # 导入清理函数
 try:
@@ -25,13 +31,15 @@ except ImportError:
         """简单的标题清理函数"""
         return title
 
-# 导入AI摘要生成函数
+# 资源标识（摘要在推荐完成后按需生成，见 ai_summarizer.get_resource_summary）
 try:
-    from backend.core.ai_summarizer import generate_resource_summary as ai_generate_summary
-    HAS_AI_SUMMARIZER = True
+    from backend.core.ai_summarizer import resource_id
 except ImportError:
-    HAS_AI_SUMMARIZER = False
-    print("Warning: AI summarizer not available, using fallback method")
+    # 摘要模块不可用时只需要标识稳定，按与摘要模块相同的规则生成
+    def resource_id(resource: Dict, resource_type: str) -> str:
+        """资源在一次任务中的稳定标识（优先使用URL，否则使用标题和内容开头）"""
+        key = resource.get("url") or f"{resource.get('title', '')}\n{(resource.get('content') or resource.get('description') or '')[:500]}"
+        return hashlib.sha1(f"{resource_type}\n{key}".encode("utf-8")).hexdigest()[:16]
 
 
 def read_txt_files(folder_path: str) -> List[str]:
@@ -41,23 +49,14 @@ def read_txt_files(folder_path: str) -> List[str]:
     排除macOS系统文件（以._开头的资源分叉文件）和其他隐藏文件
     """
     texts = []
-    if not os.path.isdir(folder_path):
-        return texts
-    
-    for root, dirs, files in os.walk(folder_path):
-        for fname in files:
-            # 过滤掉macOS资源分叉文件（以._开头）和其他系统隐藏文件
-            if fname.startswith('._') or fname.startswith('.DS_Store'):
-                continue
-            if fname.lower().endswith(".txt"):
-                file_path = os.path.join(root, fname)
-                try:
-                    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                        content = f.read().strip()
-                        if content:
-                            texts.append(content)
-                except Exception as e:
-                    print(f"Error reading {file_path}: {e}")
+    for file_path in get_all_txt_file_paths(folder_path):
+        try:
+            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                content = f.read().strip()
+                if content:
+                    texts.append(content)
+        except Exception as e:
+            print(f"Error reading {file_path}: {e}")
     
     return texts
 
@@ -155,233 +154,146 @@ def is_relevant_resource(resource: Dict, user_docs: List[str]) -> bool:
     return True
 
 
-def generate_resource_summary_legacy(resource: Dict, resource_type: str) -> str:
+def vectorize_with_idf_model(texts: List[str], idf_model: dict):
     """
-    为资源生成内容摘要，让用户了解资源的大概内容
-    
-    Args:
-        resource: 资源字典
-        resource_type: 资源类型 ('txt', 'video', 'code')
-    
-    Returns:
-        内容摘要字符串
+    使用背景IDF模型向量化：当前文本只做分词计数，IDF直接由背景模型给出
+    （compute_idf，"背景语料 + 当前文本"的文档频率），不再拟合IDF
     """
-    title = resource.get("title", "")
-    content = resource.get("content", "")
-    description = resource.get("description", "")
-    url = resource.get("url", "")
-    source = resource.get("source", "")
-    
-    # 合并所有可用文本
-    all_text = ""
-    if title:
-        all_text += title + ". "
-    if description:
-        all_text += description + ". "
-    if content:
-        all_text += content
-    
-    # 清理文本：移除HTML标签、多余空格等
-    import re
-    all_text = re.sub(r'<[^>]+>', '', all_text)  # 移除HTML标签
-    all_text = re.sub(r'\s+', ' ', all_text).strip()  # 规范化空格
-    
+    counter = CountVectorizer(**SIMILARITY_VECTORIZER_PARAMS)
+    counts = counter.fit_transform(texts)
+    job_doc_freq = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = compute_idf(idf_model, hash_terms(counter.get_feature_names_out()), job_doc_freq, counts.shape[0])
+    return normalize(sparse.csr_matrix(counts.multiply(idf)))
+
+
+def resource_text(res: Dict, resource_type: str) -> str:
+    """根据资源类型取出用于相似度计算的文本"""
     if resource_type == "txt":
-        # 文本资源：提取内容的前2-3句话作为摘要
-        if content:
-            # 尝试按句子分割
-            sentences = re.split(r'[.!?]\s+', content)
-            # 过滤掉太短的句子
-            meaningful_sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
-            if meaningful_sentences:
-                # 取前2-3句，总长度不超过200字符
-                summary_parts = []
-                total_length = 0
-                for sent in meaningful_sentences[:3]:
-                    if total_length + len(sent) < 200:
-                        summary_parts.append(sent)
-                        total_length += len(sent) + 2
-                    else:
-                        break
-                if summary_parts:
-                    summary = ". ".join(summary_parts)
-                    if summary and not summary.endswith('.'):
-                        summary += "."
-                    return summary[:200] + "..." if len(summary) > 200 else summary
-        
-        # 如果没有内容，使用标题和描述
-        if title and description:
-            return f"{title}. {description[:150]}..." if len(description) > 150 else f"{title}. {description}"
-        elif title:
-            return title
-        else:
-            return "文本资源"
-    
+        return res.get("content", res.get("title", ""))
     elif resource_type == "video":
-        # 视频资源：使用描述或标题生成摘要
-        if description:
-            # 取描述的前150字符
-            desc = description.strip()
-            if len(desc) > 150:
-                # 尝试在句号处截断
-                sentences = desc.split('.')
-                summary_parts = []
-                total_length = 0
-                for sent in sentences:
-                    if total_length + len(sent) < 150:
-                        summary_parts.append(sent.strip())
-                        total_length += len(sent) + 1
-                    else:
-                        break
-                if summary_parts:
-                    summary = ". ".join(summary_parts)
-                    if summary and not summary.endswith('.'):
-                        summary += "."
-                    return summary[:150] + "..." if len(summary) > 150 else summary
-            return desc
-        elif title:
-            return title
-        else:
-            return "视频资源"
-    
+        return res.get("description", res.get("title", ""))
     elif resource_type == "code":
-        # 代码资源：根据描述、标题和来源生成摘要
-        summary_parts = []
-        
-        if title:
-            summary_parts.append(title)
-        
-        if description:
-            # 取描述的前100字符
-            desc = description.strip()
-            if len(desc) > 100:
-                # 尝试在句号处截断
-                sentences = desc.split('.')
-                desc_parts = []
-                total_length = 0
-                for sent in sentences:
-                    if total_length + len(sent) < 100:
-                        desc_parts.append(sent.strip())
-                        total_length += len(sent) + 1
-                    else:
-                        break
-                if desc_parts:
-                    desc = ". ".join(desc_parts)
-                    if desc and not desc.endswith('.'):
-                        desc += "."
-                    desc = desc[:100] + "..." if len(desc) > 100 else desc
-            summary_parts.append(desc)
-        
-        # 添加来源信息
-        source_info = ""
-        if "github" in url.lower() or "github" in source.lower():
-            source_info = "（GitHub代码仓库）"
-        elif "colab" in url.lower() or "colab" in source.lower():
-            source_info = "（Google Colab笔记本）"
-        elif "kaggle" in url.lower() or "kaggle" in source.lower():
-            source_info = "（Kaggle笔记本）"
-        elif "stackoverflow" in url.lower() or "stackoverflow" in source.lower():
-            source_info = "（Stack Overflow问答）"
-        elif "paperswithcode" in url.lower() or "papers with code" in source.lower():
-            source_info = "（Papers with Code）"
-        
-        if summary_parts:
-            summary = ". ".join([p for p in summary_parts if p])
-            if source_info:
-                summary += source_info
-            return summary[:200] + "..." if len(summary) > 200 else summary
-        elif source_info:
-            return f"代码资源{source_info}"
-        else:
-            return "代码资源"
-    
-    # 默认情况
-    if all_text:
-        return all_text[:150] + "..." if len(all_text) > 150 else all_text
+        return res.get("description", res.get("title", ""))
     else:
-        return "资源内容"
+        return str(res.get("title", ""))
 
 
-def compute_similarity(user_docs: List[str], resources: List[Dict], resource_type: str) -> List[Tuple[Dict, float]]:
+def top_k_indices(scores: np.ndarray, k: Optional[int] = None) -> np.ndarray:
     """
-    计算用户文档与资源之间的相似度
-    
+    按分数降序返回前k个位置（k为None时返回全部）
+
+    用 np.partition 找到第k大的分数作为门槛，只对门槛以上的少量元素排序；
+    分数相同时保持原有顺序（与稳定排序的结果一致）
+    """
+    scores = np.asarray(scores)
+    n = len(scores)
+    if k is None or k >= n:
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    threshold = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    selected = np.sort(np.concatenate([above, ties]))
+    return selected[np.argsort(-scores[selected], kind="stable")]
+
+
+def compute_similarity_by_type(user_docs: List[str], all_resources: Dict[str, List[Dict]],
+                               idf_model: Optional[dict] = None) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    一次性计算用户文档与所有类型资源之间的相似度
+
+    用户文档只清洗、合并一次，所有类型的候选资源共用同一个向量化器（只拟合一次），
+    再按类型切片得到各自的相似度
+
     Args:
-        user_docs: 用户上传的文档列表（已清洗的文本）
-        resources: 资源列表，每个资源是Dict，包含content/description等字段
-        resource_type: 资源类型 ('txt', 'video')
-    
+        user_docs: 用户上传的文档列表
+        all_resources: {资源类型: 资源列表}
+        idf_model: 背景IDF模型（可选），提供时IDF不再只由本次文本拟合
+
     Returns:
-        List[Tuple[Dict, float]]: (资源, 相似度分数) 的列表，按相似度降序排列
+        {资源类型: (资源下标数组, 相似度数组)}，下标指向 all_resources[资源类型]，
+        按原顺序排列（排序见 top_k_indices）；没有可用文本的资源不参与计算
     """
-    if not user_docs or not resources:
-        return []
-    
-    # 清洗用户文档
-    cleaned_user_docs = [clean_text(doc) for doc in user_docs]
-    user_text = " ".join(cleaned_user_docs)  # 合并所有用户文档
-    
-    # 提取资源文本内容
+    results = {
+        resource_type: (np.zeros(0, dtype=np.int64), np.zeros(0)) for resource_type in all_resources
+    }
+    if not user_docs:
+        return results
+
+    # 清洗用户文档（只做一次）
+    user_text = " ".join(clean_text(doc) for doc in user_docs)  # 合并所有用户文档
+
+    # 提取所有类型资源的文本，记录每种类型在矩阵中的行范围
     resource_texts = []
-    resource_objs = []
-    
-    for res in resources:
-        # 根据资源类型提取文本
-        if resource_type == "txt":
-            text = res.get("content", res.get("title", ""))
-        elif resource_type == "video":
-            text = res.get("description", res.get("title", ""))
-        elif resource_type == "code":
-            text = res.get("description", res.get("title", ""))
-        else:
-            text = str(res.get("title", ""))
-        
-        if text:
-            resource_texts.append(clean_text(text))
-            resource_objs.append(res)
-    
+    resource_indices = {}
+    spans = {}
+    for resource_type, resources in all_resources.items():
+        start = len(resource_texts)
+        indices = []
+        for i, res in enumerate(resources or []):
+            text = resource_text(res, resource_type)
+            if text:
+                resource_texts.append(clean_text(text))
+                indices.append(i)
+        resource_indices[resource_type] = np.array(indices, dtype=np.int64)
+        spans[resource_type] = (start, len(resource_texts))
+
     if not resource_texts:
-        return []
-    
+        return results
+
     # 使用TF-IDF向量化
     try:
-        vectorizer = TfidfVectorizer(
-            lowercase=True,
-            stop_words="english",
-            ngram_range=(1, 2),
-            max_df=0.95,
-            min_df=1,
-            token_pattern=r"(?u)\b[a-zA-Z][a-zA-Z\-]+\b",
-            norm="l2"
-        )
-        
-        # 合并用户文档和资源文本
+        # 合并用户文档和资源文本，只拟合一次
         all_texts = [user_text] + resource_texts
-        vectors = vectorizer.fit_transform(all_texts)
-        
-        # 用户文档向量（第一个）
-        user_vector = vectors[0:1]
-        # 资源向量（其余）
-        resource_vectors = vectors[1:]
-        
-        # 计算余弦相似度
-        similarities = cosine_similarity(user_vector, resource_vectors)[0]
-        
-        # 组合结果并排序
-        results = list(zip(resource_objs, similarities))
-        results.sort(key=lambda x: x[1], reverse=True)
-        
-        return results
+        if idf_model is not None:
+            vectors = vectorize_with_idf_model(all_texts, idf_model)
+        else:
+            vectorizer = TfidfVectorizer(**SIMILARITY_VECTORIZER_PARAMS, norm="l2")
+            vectors = vectorizer.fit_transform(all_texts)
+
+        # 用户文档向量（第一个）与全部资源向量（其余）的余弦相似度
+        similarities = cosine_similarity(vectors[0:1], vectors[1:])[0]
     except Exception as e:
         print(f"Error computing similarity: {e}")
         # 如果向量化失败，返回所有资源（相似度为0）
-        return [(res, 0.0) for res in resource_objs]
+        similarities = np.zeros(len(resource_texts))
+
+    # 按类型切片
+    for resource_type, (start, end) in spans.items():
+        results[resource_type] = (resource_indices[resource_type], similarities[start:end])
+    return results
+
+
+def compute_similarity(user_docs: List[str], resources: List[Dict], resource_type: str,
+                       idf_model: Optional[dict] = None,
+                       top_k: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算用户文档与单一类型资源之间的相似度（多种类型请用 compute_similarity_by_type）
+    
+    Args:
+        user_docs: 用户上传的文档列表（已清洗的文本）
+        resources: 资源列表，每个资源是Dict，包含content/description等字段
+        resource_type: 资源类型 ('txt', 'video')
+        idf_model: 背景IDF模型（可选），提供时IDF不再只由本次文本拟合
+        top_k: 只返回相似度最高的前K个（None表示全部）
+    
+    Returns:
+        (资源下标数组, 相似度数组)：下标指向 resources，按相似度降序排列
+    """
+    if not user_docs or not resources:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    indices, scores = compute_similarity_by_type(user_docs, {resource_type: resources}, idf_model=idf_model)[resource_type]
+    order = top_k_indices(scores, top_k)
+    return indices[order], scores[order]
 
 
 def recommend_best_resources(
     user_folder_path: str,
     all_resources: Dict[str, List[Dict]],
-    top_k_per_type: int = 5
+    top_k_per_type: int = 5,
+    idf_model: Optional[dict] = None,
+    user_docs: Optional[List[str]] = None
 ) -> Dict[str, List[Dict]]:
     """
     使用CBF推荐系统筛选最佳资源
@@ -393,12 +305,15 @@ def recommend_best_resources(
             "video": [...],
         }
         top_k_per_type: 每种类型选择前K个
+        idf_model: 背景IDF模型（可选，见 idf_model.load_idf_model）
+        user_docs: 已读取的用户文档（可选，如 file_utils.read_corpus_texts），提供时不再读取文件夹
     
     Returns:
         筛选后的资源字典，格式同all_resources
     """
     # 读取用户文档
-    user_docs = read_txt_files(user_folder_path)
+    if user_docs is None:
+        user_docs = read_txt_files(user_folder_path)
     
     if not user_docs:
         print("Warning: No user documents found, returning all resources")
@@ -406,42 +321,35 @@ def recommend_best_resources(
     
     recommended = {}
     
+    # 一次性计算所有类型资源的相似度（共用同一个向量化器）
+    similarity_by_type = compute_similarity_by_type(user_docs, all_resources, idf_model=idf_model)
+    
     # 对每种类型的资源进行推荐
     for resource_type, resources in all_resources.items():
         if not resources:
             recommended[resource_type] = []
             continue
         
-        # 计算相似度
-        similarity_results = compute_similarity(user_docs, resources, resource_type)
-        print(f"  [{resource_type}] 计算了 {len(similarity_results)} 个资源的相似度")
+        resource_indices, scores = similarity_by_type[resource_type]
+        print(f"  [{resource_type}] 计算了 {len(scores)} 个资源的相似度")
         
-        if similarity_results:
-            max_score = max(score for _, score in similarity_results)
-            min_score = min(score for _, score in similarity_results)
-            avg_score = sum(score for _, score in similarity_results) / len(similarity_results)
-            print(f"  [{resource_type}] 相似度范围: {min_score:.4f} - {max_score:.4f}, 平均: {avg_score:.4f}")
+        if len(scores):
+            print(f"  [{resource_type}] 相似度范围: {scores.min():.4f} - {scores.max():.4f}, 平均: {scores.mean():.4f}")
         
-        # 直接按相似度排序（从高到低），不设置阈值
-        sorted_results = sorted(similarity_results, key=lambda x: x[1], reverse=True)
+        # 按相似度取前top_k个（从高到低），不设置阈值；多选一些候选以防被relevance过滤
+        candidates = top_k_indices(scores, top_k_per_type * 2)
         print(f"  [{resource_type}] 按相似度排序完成，准备选择前 {top_k_per_type} 个")
         
-        # 直接取前top_k个，多选一些以防被relevance过滤
         top_resources = []
         relevance_filtered = 0
-        for res, score in sorted_results[:top_k_per_type * 2]:  # 多选一些候选
+        for pos in candidates:
+            res = resources[resource_indices[pos]]
+            score = scores[pos]
             # 额外检查：过滤掉明显不相关的资源
             if is_relevant_resource(res, user_docs):
                 res["similarity_score"] = float(score)
-                # 生成内容摘要（优先使用AI，否则使用fallback）
-                if HAS_AI_SUMMARIZER:
-                    try:
-                        res["summary"] = ai_generate_summary(res, resource_type)
-                    except Exception as e:
-                        print(f"AI摘要生成失败，使用fallback: {e}")
-                        res["summary"] = generate_resource_summary_legacy(res, resource_type)
-                else:
-                    res["summary"] = generate_resource_summary_legacy(res, resource_type)
+                # 摘要不在排序循环中生成：只记录资源标识，摘要在首次访问或按需请求时生成
+                res["resource_id"] = resource_id(res, resource_type)
                 top_resources.append(res)
                 if len(top_resources) >= top_k_per_type:
                     break
@@ -455,30 +363,20 @@ def recommend_best_resources(
     return recommended
 
 
-def save_recommended_resources(
-    recommended: Dict[str, List[Dict]],
-    output_folder: str
-):
+def render_recommended_resources(recommended: Dict[str, List[Dict]]) -> Iterator[Tuple[str, str]]:
     """
-    将推荐结果保存到文件夹
+    按推荐结果的文件布局逐个生成 (相对路径, 文件内容)，不写磁盘
+    （供 save_recommended_resources 写文件，或在下载时直接打包）
     
     Args:
         recommended: 推荐结果字典
-        output_folder: 输出文件夹路径
     """
-    os.makedirs(output_folder, exist_ok=True)
-    
-    # 为每种类型创建子文件夹
     for resource_type, resources in recommended.items():
-        type_folder = os.path.join(output_folder, resource_type)
-        os.makedirs(type_folder, exist_ok=True)
-        
         for i, res in enumerate(resources):
             if resource_type == "txt":
                 # 清理标题
                 cleaned_title = clean_title(res.get('title', 'resource'))
                 filename = f"{i+1}_{sanitize_filename(cleaned_title)}.txt"
-                filepath = os.path.join(type_folder, filename)
                 content = res.get("content", "")
                 # 清理内容：移除联系方式、部门信息等无关内容
                 cleaned_content = clean_extracted_content(content)
@@ -486,14 +384,12 @@ def save_recommended_resources(
                 metadata += f"URL: {res.get('url', '')}\n"
                 metadata += f"Similarity Score: {res.get('similarity_score', 0.0):.4f}\n"
                 metadata += "\n" + "="*50 + "\n\n"
-                with open(filepath, "w", encoding="utf-8") as f:
-                    f.write(metadata + cleaned_content)
+                yield f"{resource_type}/{filename}", metadata + cleaned_content
             
             elif resource_type == "video":
                 # 清理标题
                 cleaned_title = clean_title(res.get('title', 'video'))
                 filename = f"{i+1}_{sanitize_filename(cleaned_title)}.txt"
-                filepath = os.path.join(type_folder, filename)
                 content = f"Title: {cleaned_title}\n"
                 content += f"URL: {res.get('url', '')}\n"
                 description = res.get('description', '')
@@ -502,14 +398,12 @@ def save_recommended_resources(
                 content += f"Similarity Score: {res.get('similarity_score', 0.0):.4f}\n"
                 if res.get("thumbnail"):
                     content += f"Thumbnail: {res.get('thumbnail')}\n"
-                with open(filepath, "w", encoding="utf-8") as f:
-                    f.write(content)
+                yield f"{resource_type}/{filename}", content
             
             elif resource_type == "code":
                 # 清理标题
                 cleaned_title = clean_title(res.get('title', 'code'))
                 filename = f"{i+1}_{sanitize_filename(cleaned_title)}.txt"
-                filepath = os.path.join(type_folder, filename)
                 content = f"Title: {cleaned_title}\n"
                 content += f"URL: {res.get('url', '')}\n"
                 content += f"Source: {res.get('source', 'Unknown')}\n"
@@ -517,8 +411,29 @@ def save_recommended_resources(
                 if description:
                     content += f"Description: {description}\n"
                 content += f"Similarity Score: {res.get('similarity_score', 0.0):.4f}\n"
-                with open(filepath, "w", encoding="utf-8") as f:
-                    f.write(content)
+                yield f"{resource_type}/{filename}", content
+
+
+def save_recommended_resources(
+    recommended: Dict[str, List[Dict]],
+    output_folder: str
+):
+    """
+    将推荐结果保存到文件夹（每种类型一个子文件夹，每个资源一个txt文件）
+    
+    Args:
+        recommended: 推荐结果字典
+        output_folder: 输出文件夹路径
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    
+    # 为每种类型创建子文件夹
+    for resource_type in recommended:
+        os.makedirs(os.path.join(output_folder, resource_type), exist_ok=True)
+    
+    for relpath, content in render_recommended_resources(recommended):
+        with open(os.path.join(output_folder, relpath), "w", encoding="utf-8") as f:
+            f.write(content)
 
 
 def sanitize_filename(filename: str) -> str:
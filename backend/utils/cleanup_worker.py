@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台清理模块
+一个后台线程统一负责删除用户数据：请求线程只把要删除的路径放入清理队列（可延迟执行），
+到期的路径由后台线程成批删除；同时定期扫描 data/uploads、data/results、data/outputs，
+删除超过保留时间（TTL）仍无人处理的任务数据，避免中途放弃的任务在磁盘上堆积。
+跨任务保留的缓存目录（如PDF转换缓存、增量关键词状态）按各自的保留时间删除久未使用的条目。
+"""
+
+import os
+import time
+import heapq
+import multiprocessing
+import shutil
+import uuid
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+# 每批最多删除的路径数（到期的路径一次取出、统一删除）
+CLEANUP_BATCH_SIZE = 64
+# 任务数据的默认保留时间（秒），超过后被定期扫描删除
+CLEANUP_TTL_SECONDS = 6 * 3600
+# 定期扫描的间隔（秒）
+CLEANUP_SWEEP_INTERVAL = 10 * 60
+# 被扫描的数据目录（相对于 base_dir/data）
+CLEANUP_DATA_DIRS = ("uploads", "results", "outputs")
+# 丢弃的目录先改名为带此标记的名字，再由后台删除
+TRASH_MARKER = ".trash-"
+
+_CLEANUP = {
+    "cond": threading.Condition(),
+    "heap": [],           # [(到期时间, 路径)]，按到期时间排序
+    "pending": {},        # {路径: 到期时间}，取消或改期后堆中的旧条目按此失效
+    "active": {},         # {任务名: 引用计数}，处理中的任务不会被TTL扫描删除
+    "hooks": [],          # 任务结果数据被删除时调用的函数 hook(任务名)
+    "thread": None,
+    "stop": False,
+    "busy": False,        # 后台线程正在删除一批路径
+    "base_dir": None,
+    "cache_dirs": {},     # {缓存目录: 保留时间（秒）}
+    "ttl": CLEANUP_TTL_SECONDS,
+    "sweep_interval": CLEANUP_SWEEP_INTERVAL,
+    "next_sweep": 0.0,
+    "stats": {"deleted": 0, "failed": 0, "batches": 0, "swept": 0},
+}
+
+
+def start_cleanup_worker(base_dir: str, ttl_seconds: Optional[float] = CLEANUP_TTL_SECONDS,
+                         sweep_interval: float = CLEANUP_SWEEP_INTERVAL,
+                         cache_dirs: Optional[Dict[str, float]] = None):
+    """
+    启动后台清理线程（重复调用只更新配置）
+
+    在 multiprocessing 子进程中调用时不做任何事：spawn/forkserver 启动的子进程（如PDF转换进程）
+    会重新执行主脚本，清理只由服务进程负责。
+
+    Args:
+        base_dir: 基础目录路径（包含 data/uploads、data/results、data/outputs 的父目录）
+        ttl_seconds: 任务数据保留时间，None表示不做TTL扫描
+        sweep_interval: TTL扫描间隔（秒）
+        cache_dirs: {缓存目录: 保留时间（秒）}，扫描时删除超过保留时间未使用（修改时间）的缓存文件
+    """
+    if multiprocessing.current_process().name != "MainProcess":
+        return
+    cond = _CLEANUP["cond"]
+    with cond:
+        _CLEANUP["base_dir"] = base_dir
+        _CLEANUP["cache_dirs"] = dict(cache_dirs or {})
+        _CLEANUP["ttl"] = ttl_seconds
+        _CLEANUP["sweep_interval"] = sweep_interval
+        # 启动后先扫描一次，清掉上次运行遗留的数据
+        _CLEANUP["next_sweep"] = time.monotonic()
+        _CLEANUP["stop"] = False
+        if _CLEANUP["thread"] is None or not _CLEANUP["thread"].is_alive():
+            _CLEANUP["thread"] = threading.Thread(target=_cleanup_loop, name="cleanup-worker", daemon=True)
+            _CLEANUP["thread"].start()
+        cond.notify_all()
+
+
+def stop_cleanup_worker(timeout: float = 5.0):
+    """停止后台清理线程（未到期的路径留在队列中不删除）"""
+    cond = _CLEANUP["cond"]
+    with cond:
+        _CLEANUP["stop"] = True
+        thread = _CLEANUP["thread"]
+        cond.notify_all()
+    if thread is not None:
+        thread.join(timeout)
+    with cond:
+        _CLEANUP["thread"] = None
+
+
+def schedule_cleanup(paths: Iterable[str], delay: float = 0.0):
+    """
+    把路径放入清理队列，delay 秒后由后台线程删除（文件或目录均可，不存在的路径忽略）
+
+    同一路径重复放入时以最后一次的到期时间为准。
+    """
+    due = time.monotonic() + max(delay, 0.0)
+    cond = _CLEANUP["cond"]
+    with cond:
+        for path in paths:
+            path = os.path.abspath(path)
+            _CLEANUP["pending"][path] = due
+            heapq.heappush(_CLEANUP["heap"], (due, path))
+        cond.notify_all()
+
+
+def job_data_paths(folder_name: str, base_dir: str) -> Dict[str, str]:
+    """
+    某个任务在 data 目录下的全部数据路径（与 cleanup_user_data 删除的范围一致）；
+    keyword_state 是同名语料跨任务复用的增量状态，只在手动清理时删除
+    """
+    data_dir = os.path.join(base_dir, "data")
+    return {
+        "uploads": os.path.join(data_dir, "uploads", folder_name),
+        "results": os.path.join(data_dir, "results", folder_name),
+        "outputs": os.path.join(data_dir, "outputs", folder_name),
+        "outputs_zip": os.path.join(data_dir, "outputs", f"{folder_name}_recommended.zip"),
+        "keyword_state": os.path.join(data_dir, "keyword_state", f"{folder_name}.pkl"),
+    }
+
+
+def schedule_job_cleanup(folder_name: str, delay: float = 0.0,
+                         parts: Iterable[str] = ("uploads", "results", "outputs", "outputs_zip"),
+                         base_dir: Optional[str] = None) -> Dict[str, bool]:
+    """
+    把一个任务的数据放入清理队列
+
+    Args:
+        folder_name: 任务名
+        delay: 延迟删除的秒数
+        parts: 要删除的部分（job_data_paths 的键）
+        base_dir: 基础目录，默认使用 start_cleanup_worker 配置的目录
+
+    Returns:
+        {部分: 是否存在并已放入队列}
+    """
+    paths = job_data_paths(folder_name, base_dir or _CLEANUP["base_dir"])
+    scheduled = {part: os.path.exists(paths[part]) for part in parts}
+    schedule_cleanup([paths[part] for part in parts if scheduled[part]], delay)
+    if "results" in parts:
+        _run_job_cleanup_hooks(folder_name)
+    return scheduled
+
+
+def add_job_cleanup_hook(hook: Callable[[str], None]):
+    """
+    登记任务清理回调：任务的结果数据（data/results/{任务}）被放入清理队列或被TTL扫描删除时，
+    以任务名调用 hook，用于释放该任务在内存中的记录
+    """
+    with _CLEANUP["cond"]:
+        _CLEANUP["hooks"].append(hook)
+
+
+def _run_job_cleanup_hooks(folder_name: str):
+    with _CLEANUP["cond"]:
+        hooks = list(_CLEANUP["hooks"])
+    for hook in hooks:
+        try:
+            hook(folder_name)
+        except Exception as e:
+            print(f"任务清理回调失败 {folder_name}: {e}")
+
+
+def cancel_job_cleanup(folder_name: str, base_dir: Optional[str] = None):
+    """取消某个任务尚未执行的清理（同名任务重新上传时调用，避免新数据被旧的清理请求删除）"""
+    paths = {os.path.abspath(p) for p in job_data_paths(folder_name, base_dir or _CLEANUP["base_dir"]).values()}
+    with _CLEANUP["cond"]:
+        for path in paths:
+            _CLEANUP["pending"].pop(path, None)
+
+
+def discard_path(path: str) -> bool:
+    """
+    立即让路径“消失”：先原子改名为带 TRASH_MARKER 的名字，再交给后台线程删除。
+    调用方可以马上在原路径重新创建文件/目录，不必等待删除完成。
+
+    Returns:
+        路径存在并已丢弃时返回True
+    """
+    if not os.path.lexists(path):
+        return False
+    trash_path = f"{path.rstrip(os.sep)}{TRASH_MARKER}{uuid.uuid4().hex[:8]}"
+    try:
+        os.replace(path, trash_path)
+    except OSError:
+        # 改名失败（如跨设备）时直接在队列中删除原路径
+        trash_path = path
+    schedule_cleanup([trash_path])
+    return True
+
+
+def mark_job_active(folder_name: str):
+    """标记任务正在处理（TTL扫描跳过该任务的数据）"""
+    with _CLEANUP["cond"]:
+        _CLEANUP["active"][folder_name] = _CLEANUP["active"].get(folder_name, 0) + 1
+
+
+def mark_job_inactive(folder_name: str):
+    """取消 mark_job_active 的标记"""
+    with _CLEANUP["cond"]:
+        count = _CLEANUP["active"].get(folder_name, 0) - 1
+        if count > 0:
+            _CLEANUP["active"][folder_name] = count
+        else:
+            _CLEANUP["active"].pop(folder_name, None)
+
+
+def wait_for_cleanup(timeout: Optional[float] = None) -> bool:
+    """等待队列中已到期的路径全部删除完（测试和关闭服务时使用）；超时返回False"""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    cond = _CLEANUP["cond"]
+    with cond:
+        while _CLEANUP["busy"] or any(due <= time.monotonic() for due in _CLEANUP["pending"].values()):
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            cond.wait(remaining if remaining is not None else 0.5)
+    return True
+
+
+def get_cleanup_stats() -> dict:
+    """清理统计：已删除/删除失败的路径数、批次数、TTL扫描删除数、队列中等待的路径数"""
+    with _CLEANUP["cond"]:
+        stats = dict(_CLEANUP["stats"])
+        stats["pending"] = len(_CLEANUP["pending"])
+    return stats
+
+
+def _take_due_batch(now: float) -> List[str]:
+    """从队列中取出已到期的路径（调用方持有锁）"""
+    heap = _CLEANUP["heap"]
+    pending = _CLEANUP["pending"]
+    batch = []
+    while heap and heap[0][0] <= now and len(batch) < CLEANUP_BATCH_SIZE:
+        due, path = heapq.heappop(heap)
+        # 已取消或改期的旧条目
+        if pending.get(path) != due:
+            continue
+        del pending[path]
+        batch.append(path)
+    return batch
+
+
+def _delete_paths(paths: List[str]) -> int:
+    """删除一批路径；父目录也在同一批中时子路径不再单独删除。返回删除失败的数量"""
+    failed = 0
+    removed = []
+    for path in sorted(paths):
+        if any(path.startswith(parent + os.sep) for parent in removed):
+            continue
+        try:
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path)
+            elif os.path.lexists(path):
+                os.remove(path)
+            removed.append(path)
+        except OSError as e:
+            failed += 1
+            print(f"清理失败 {path}: {e}")
+    return failed
+
+
+def _sweep_cache_dir(cache_dir: str, max_age: float) -> List[str]:
+    """列出缓存目录中超过保留时间未使用的文件"""
+    cutoff = time.time() - max_age
+    expired = []
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    expired.append(path)
+            except OSError:
+                continue
+    return expired
+
+
+def _sweep_expired(base_dir: str, ttl: float) -> int:
+    """删除超过保留时间的任务数据、缓存条目和遗留的丢弃目录；返回删除的条目数"""
+    with _CLEANUP["cond"]:
+        active = set(_CLEANUP["active"])
+        pending = set(_CLEANUP["pending"])
+        cache_dirs = dict(_CLEANUP["cache_dirs"])
+    cutoff = time.time() - ttl
+    expired = []
+    expired_jobs = []
+    for data_dir in CLEANUP_DATA_DIRS:
+        root = os.path.join(base_dir, "data", data_dir)
+        try:
+            entries = list(os.scandir(root))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            name = entry.name
+            if TRASH_MARKER in name:
+                # 丢弃目录在上次运行中没来得及删除
+                expired.append(entry.path)
+                continue
+            job_name = name[:-len("_recommended.zip")] if name.endswith("_recommended.zip") else name
+            if name.startswith(".") or job_name in active or os.path.abspath(entry.path) in pending:
+                continue
+            try:
+                if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                    expired.append(entry.path)
+                    if data_dir == "results":
+                        expired_jobs.append(job_name)
+            except OSError:
+                continue
+    for cache_dir, max_age in cache_dirs.items():
+        expired.extend(_sweep_cache_dir(cache_dir, max_age))
+    for job_name in expired_jobs:
+        _run_job_cleanup_hooks(job_name)
+    if expired:
+        failed = _delete_paths(expired)
+        print(f"TTL清理: 删除 {len(expired) - failed} 个过期条目")
+        return len(expired) - failed
+    return 0
+
+
+def _cleanup_loop():
+    cond = _CLEANUP["cond"]
+    while True:
+        with cond:
+            while True:
+                if _CLEANUP["stop"]:
+                    return
+                now = time.monotonic()
+                batch = _take_due_batch(now)
+                sweep = _CLEANUP["ttl"] is not None and _CLEANUP["base_dir"] and now >= _CLEANUP["next_sweep"]
+                if batch or sweep:
+                    break
+                # 睡到下一个路径到期或下一次扫描，期间有新路径入队会被唤醒
+                wake_at = []
+                if _CLEANUP["heap"]:
+                    wake_at.append(_CLEANUP["heap"][0][0])
+                if _CLEANUP["ttl"] is not None and _CLEANUP["base_dir"]:
+                    wake_at.append(_CLEANUP["next_sweep"])
+                cond.wait(max(min(wake_at) - now, 0.0) if wake_at else None)
+            _CLEANUP["busy"] = True
+            if sweep:
+                _CLEANUP["next_sweep"] = now + _CLEANUP["sweep_interval"]
+            base_dir, ttl = _CLEANUP["base_dir"], _CLEANUP["ttl"]
+
+        # 删除在锁外进行，不阻塞请求线程入队
+        failed = _delete_paths(batch) if batch else 0
+        swept = _sweep_expired(base_dir, ttl) if sweep else 0
+
+        with cond:
+            stats = _CLEANUP["stats"]
+            stats["deleted"] += len(batch) - failed
+            stats["failed"] += failed
+            stats["batches"] += 1 if batch else 0
+            stats["swept"] += swept
+            _CLEANUP["busy"] = False
+            cond.notify_all()
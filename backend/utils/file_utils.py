@@ -11,9 +11,18 @@ import shutil
 import warnings
 import sys
 import io
+import json
+import gzip
+import time
+import hashlib
+import threading
 import contextlib
+import multiprocessing
+import uuid
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
 from werkzeug.utils import secure_filename
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 # PDF处理库
 try:
@@ -28,6 +37,38 @@ try:
 except ImportError:
     PYPDF2_AVAILABLE = False
 
+# 内存上限（仅Unix可用）
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+# PDF并行转换：工作进程数（None表示按当前进程可用的CPU核数）、单个文件超时（秒）、单个转换进程的额外内存上限（MB）
+PDF_CONVERSION_WORKERS = None
+PDF_CONVERSION_TIMEOUT = 120
+PDF_CONVERSION_MAX_MEMORY_MB = 1024
+
+# PDF提取方式选择：先用PyPDF2试提取前几页，文字足够且可读字符比例达标才采用PyPDF2，否则用pdfplumber
+PDF_PROBE_PAGES = 3
+PDF_PROBE_MIN_CHARS = 200
+PDF_PROBE_MIN_READABLE_RATIO = 0.9
+
+# 上传流式保存：每次从请求流读取的块大小、表单普通字段的内存上限
+UPLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_MAX_FORM_MEMORY = 500 * 1024
+
+# PDF转换结果格式版本（提取逻辑变化时递增，旧缓存自动失效）
+PDF_CONVERSION_VERSION = 1
+
+# PDF转换缓存配置：按PDF内容的SHA-256复用转换结果，目录为None时不启用（见 configure_pdf_cache）
+_PDF_CACHE = {
+    "dir": None,
+    "max_bytes": 500 * 1024 * 1024,
+    "size": None,  # 当前缓存总大小（首次使用时统计）
+    "lock": threading.Lock(),
+}
+
 # 抑制PDF处理库的警告
 warnings.filterwarnings('ignore', category=UserWarning)
 warnings.filterwarnings('ignore', message='.*FontBBox.*')
@@ -35,101 +76,158 @@ warnings.filterwarnings('ignore', message='.*gray non-stroke color.*')
 warnings.filterwarnings('ignore', message='.*invalid float value.*')
 
 
+def _is_hidden_system_name(fname: str) -> bool:
+    """macOS资源分叉文件（以._开头）和其他系统隐藏文件"""
+    return fname.startswith('._') or fname.startswith('.DS_Store')
+
+
+def build_folder_index(folder_path: str) -> dict:
+    """
+    一次 os.scandir 遍历建立文件夹索引：按类型分类文件并记录大小。
+    下面的计数、取路径函数都基于这个索引，共用同一套系统文件过滤规则
+    排除macOS系统文件（以._开头的资源分叉文件）和其他隐藏文件
+    
+    Returns:
+        {
+            "root": 文件夹路径,
+            "txt": [原始txt路径, ...]（不包括PDF转换后的_pdf.txt，已排序）,
+            "pdf_txt": [PDF转换后的txt路径, ...],
+            "pdf": [pdf路径, ...],
+            "sizes": {路径: 字节数}
+        }
+    """
+    index = {"root": folder_path, "txt": [], "pdf_txt": [], "pdf": [], "sizes": {}}
+    if not os.path.isdir(folder_path):
+        return index
+    pending = [folder_path]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif not _is_hidden_system_name(entry.name):
+                    _add_to_folder_index(index, entry.path, entry.stat().st_size)
+    for kind in ("txt", "pdf_txt", "pdf"):
+        index[kind].sort()
+    return index
+
+
+def _add_to_folder_index(index: dict, file_path: str, size: int):
+    """把文件按类型登记到索引中，非txt/pdf文件只记录大小"""
+    lower_name = file_path.lower()
+    if lower_name.endswith("_pdf.txt"):
+        kind = "pdf_txt"
+    elif lower_name.endswith(".txt"):
+        kind = "txt"
+    elif lower_name.endswith(".pdf"):
+        kind = "pdf"
+    else:
+        kind = None
+    if kind:
+        index[kind].append(file_path)
+    index["sizes"][file_path] = size
+
+
 def count_txt_files(folder_path: str) -> int:
     """
     统计文件夹中txt和pdf文件的数量（不包括PDF转换后的txt文件）
     这个函数用于验证上传文件数量，应该统计原始文件
-    排除macOS系统文件（以._开头的资源分叉文件）和其他隐藏文件
     """
-    count = 0
-    if not os.path.isdir(folder_path):
-        return 0
-    for root, dirs, files in os.walk(folder_path):
-        for fname in files:
-            # 过滤掉macOS资源分叉文件（以._开头）和其他系统隐藏文件
-            if fname.startswith('._') or fname.startswith('.DS_Store'):
-                continue
-            # 只统计原始的.txt和.pdf文件，不包括PDF转换后的_pdf.txt文件
-            if fname.lower().endswith(".pdf"):
-                count += 1
-            elif fname.lower().endswith(".txt") and not fname.lower().endswith("_pdf.txt"):
-                count += 1
-    return count
+    index = build_folder_index(folder_path)
+    return len(index["txt"]) + len(index["pdf"])
 
 
 def count_all_txt_files_after_conversion(folder_path: str) -> int:
     """
     统计转换后所有txt文件的数量（包括原始txt和PDF转换后的txt）
     这个函数用于关键词提取等处理步骤
-    排除macOS系统文件（以._开头的资源分叉文件）和其他隐藏文件
     """
-    count = 0
-    if not os.path.isdir(folder_path):
-        return 0
-    for root, dirs, files in os.walk(folder_path):
-        for fname in files:
-            # 过滤掉macOS资源分叉文件（以._开头）和其他系统隐藏文件
-            if fname.startswith('._') or fname.startswith('.DS_Store'):
-                continue
-            if fname.lower().endswith(".txt"):
-                count += 1
-    return count
+    index = build_folder_index(folder_path)
+    return len(index["txt"]) + len(index["pdf_txt"])
 
 
 def count_pdf_files(folder_path: str) -> int:
-    """
-    统计文件夹中pdf文件的数量
-    排除macOS系统文件（以._开头的资源分叉文件）和其他隐藏文件
-    """
-    count = 0
-    if not os.path.isdir(folder_path):
-        return 0
-    for root, dirs, files in os.walk(folder_path):
-        for fname in files:
-            # 过滤掉macOS资源分叉文件（以._开头）和其他系统隐藏文件
-            if fname.startswith('._') or fname.startswith('.DS_Store'):
-                continue
-            if fname.lower().endswith(".pdf"):
-                count += 1
-    return count
+    """统计文件夹中pdf文件的数量"""
+    return len(build_folder_index(folder_path)["pdf"])
 
 
 def get_txt_file_paths(folder_path: str) -> List[str]:
-    """
-    获取文件夹中所有txt文件的路径（不包括PDF转换后的txt）
-    排除macOS系统文件（以._开头的资源分叉文件）和其他隐藏文件
-    """
-    paths = []
-    if not os.path.isdir(folder_path):
-        return paths
-    for root, dirs, files in os.walk(folder_path):
-        for fname in files:
-            # 过滤掉macOS资源分叉文件（以._开头）和其他系统隐藏文件
-            if fname.startswith('._') or fname.startswith('.DS_Store'):
-                continue
-            if fname.lower().endswith(".txt"):
-                # 排除PDF转换后的txt文件（通常以_pdf.txt结尾）
-                if not fname.lower().endswith("_pdf.txt"):
-                    paths.append(os.path.join(root, fname))
-    return sorted(paths)
+    """获取文件夹中所有txt文件的路径（不包括PDF转换后的txt）"""
+    return build_folder_index(folder_path)["txt"]
+
+
+def get_all_txt_file_paths(folder_path: str) -> List[str]:
+    """获取文件夹中所有txt文件的路径（包括PDF转换后的txt），按路径排序"""
+    index = build_folder_index(folder_path)
+    return sorted(index["txt"] + index["pdf_txt"])
 
 
 def get_pdf_file_paths(folder_path: str) -> List[str]:
+    """获取文件夹中所有pdf文件的路径"""
+    return build_folder_index(folder_path)["pdf"]
+
+
+def save_upload_stream(stream, content_type: str, dest_dir: str, field_name: str = "folder",
+                       chunk_size: int = UPLOAD_CHUNK_SIZE) -> Optional[dict]:
     """
-    获取文件夹中所有pdf文件的路径
-    排除macOS系统文件（以._开头的资源分叉文件）和其他隐藏文件
+    流式保存multipart上传：按固定大小的块读取请求流，文件字段的内容边解析边写入磁盘并计算SHA-256，
+    内存占用与文件大小无关（不经过Werkzeug的临时文件，也不再复制一遍）
+
+    Args:
+        stream: 请求体流（如 Flask 的 request.stream）
+        content_type: 请求的Content-Type（含boundary）
+        dest_dir: 临时文件所在目录（应与最终保存位置在同一文件系统，便于 os.replace）
+        field_name: 文件字段名
+
+    Returns:
+        {"filename": 上传文件名, "path": 临时文件路径, "size": 字节数, "sha256": 内容哈希}，
+        请求中没有该文件字段时返回None
     """
-    paths = []
-    if not os.path.isdir(folder_path):
-        return paths
-    for root, dirs, files in os.walk(folder_path):
-        for fname in files:
-            # 过滤掉macOS资源分叉文件（以._开头）和其他系统隐藏文件
-            if fname.startswith('._') or fname.startswith('.DS_Store'):
-                continue
-            if fname.lower().endswith(".pdf"):
-                paths.append(os.path.join(root, fname))
-    return sorted(paths)
+    mimetype, options = parse_options_header(content_type or "")
+    boundary = options.get("boundary")
+    if mimetype != "multipart/form-data" or not boundary:
+        return None
+
+    os.makedirs(dest_dir, exist_ok=True)
+    decoder = MultipartDecoder(boundary.encode("latin-1"), max_form_memory_size=UPLOAD_MAX_FORM_MEMORY)
+    upload = None
+    output = None  # 当前正在写入的文件（其他字段的数据直接丢弃）
+    digest = None
+    try:
+        for chunk in iter(lambda: stream.read(chunk_size), b""):
+            decoder.receive_data(chunk)
+            event = decoder.next_event()
+            while not isinstance(event, (Epilogue, NeedData)):
+                if isinstance(event, File) and event.name == field_name and upload is None:
+                    path = os.path.join(dest_dir, f".incoming-{uuid.uuid4().hex}.part")
+                    upload = {"filename": event.filename or "", "path": path, "size": 0, "sha256": None}
+                    output = open(path, "wb")
+                    digest = hashlib.sha256()
+                elif isinstance(event, (File, Field)):
+                    output = None
+                elif isinstance(event, Data) and output is not None:
+                    output.write(event.data)
+                    digest.update(event.data)
+                    upload["size"] += len(event.data)
+                    if not event.more_data:
+                        output.close()
+                        output = None
+                        upload["sha256"] = digest.hexdigest()
+                event = decoder.next_event()
+    except BaseException:
+        if output is not None:
+            output.close()
+        if upload and os.path.exists(upload["path"]):
+            os.remove(upload["path"])
+        raise
+
+    if upload and upload["sha256"] is None:
+        # 请求体不完整（文件字段没有结束）
+        if output is not None:
+            output.close()
+        os.remove(upload["path"])
+        return None
+    return upload
 
 
 def extract_zip(zip_path: str, extract_to: str) -> bool:
@@ -166,6 +264,190 @@ def create_output_zip(folder_path: str, zip_path: str) -> bool:
         return False
 
 
+class _ZipStreamSink(io.RawIOBase):
+    """只写、不可定位的输出：zipfile 写入的数据暂存在这里，由 iter_zip_stream 取走后发送"""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_zip_stream(folder_path: str, compression: int = zipfile.ZIP_DEFLATED,
+                    chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """
+    边遍历文件夹边生成zip数据块（不写临时zip文件），可直接作为Flask响应体
+
+    Args:
+        folder_path: 要打包的文件夹
+        compression: zipfile.ZIP_DEFLATED（压缩）或 zipfile.ZIP_STORED（不压缩，适合很小的文本文件）
+        chunk_size: 大文件分块读取的大小；不超过该大小的文件整块写入（不需要数据描述符）
+    """
+    sink = _ZipStreamSink()
+    with zipfile.ZipFile(sink, 'w', compression) as zipf:
+        for root, dirs, files in os.walk(folder_path):
+            dirs.sort()
+            for file in sorted(files):
+                file_path = os.path.join(root, file)
+                arcname = os.path.relpath(file_path, folder_path)
+                if os.path.getsize(file_path) <= chunk_size:
+                    zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+                    zinfo.compress_type = compression
+                    with open(file_path, 'rb') as f:
+                        zipf.writestr(zinfo, f.read())
+                else:
+                    with open(file_path, 'rb') as f, zipf.open(arcname, 'w', force_zip64=True) as dest:
+                        for chunk in iter(lambda: f.read(chunk_size), b""):
+                            dest.write(chunk)
+                            data = sink.drain()
+                            if data:
+                                yield data
+                data = sink.drain()
+                if data:
+                    yield data
+    # 中央目录
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def iter_zip_stream_from_entries(entries: Iterable[Tuple[str, Union[str, bytes]]],
+                                 compression: int = zipfile.ZIP_DEFLATED) -> Iterator[bytes]:
+    """
+    把内存中的 (zip内路径, 文件内容) 逐个打包成zip数据块（不落盘），可直接作为Flask响应体
+
+    Args:
+        entries: (zip内路径, 文件内容) 的可迭代对象，内容为str时按UTF-8编码
+        compression: zipfile.ZIP_DEFLATED（压缩）或 zipfile.ZIP_STORED（不压缩）
+    """
+    sink = _ZipStreamSink()
+    with zipfile.ZipFile(sink, 'w', compression) as zipf:
+        for arcname, content in entries:
+            zinfo = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+            zinfo.compress_type = compression
+            zinfo.external_attr = 0o644 << 16
+            zipf.writestr(zinfo, content.encode("utf-8") if isinstance(content, str) else content)
+            data = sink.drain()
+            if data:
+                yield data
+    # 中央目录
+    data = sink.drain()
+    if data:
+        yield data
+
+
+# ==================== 任务结果存储 ====================
+
+def append_job_results(store_path: str, kind: str, resources_by_type: Dict[str, List[Dict]]):
+    """
+    把一类任务结果追加到任务的结果文件（JSON Lines，每行一个资源），取代每个资源一个小文件的目录布局
+
+    Args:
+        store_path: 结果文件路径（每个任务一个）
+        kind: 结果类别，如 "search"（搜索结果）、"recommended"（推荐结果）
+        resources_by_type: {资源类型: 资源列表}
+    """
+    os.makedirs(os.path.dirname(store_path), exist_ok=True)
+    lines = []
+    for resource_type, resources in resources_by_type.items():
+        # 空类型也记录一行，读取时保留该类型
+        if not resources:
+            lines.append(json.dumps({"kind": kind, "type": resource_type, "resource": None}, ensure_ascii=False))
+        for res in resources:
+            lines.append(json.dumps({"kind": kind, "type": resource_type, "resource": res},
+                                    ensure_ascii=False, default=str))
+    with open(store_path, "a", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def load_job_results(store_path: str, kind: str) -> Optional[Dict[str, List[Dict]]]:
+    """
+    读取任务结果文件中的一类结果
+
+    Returns:
+        {资源类型: 资源列表}（保持写入顺序），结果文件不存在或没有该类结果时返回None
+    """
+    if not os.path.isfile(store_path):
+        return None
+    results = None
+    with open(store_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record["kind"] != kind:
+                continue
+            if results is None:
+                results = {}
+            resources = results.setdefault(record["type"], [])
+            if record["resource"] is not None:
+                resources.append(record["resource"])
+    return results
+
+
+# ==================== 任务检查点 ====================
+
+def save_job_checkpoint(checkpoint_dir: str, stage: str, fingerprint: str, data):
+    """
+    保存处理流水线某一阶段的输出（gzip压缩的JSON，先写临时文件再替换，不会留下半个检查点）
+
+    Args:
+        checkpoint_dir: 任务的检查点目录
+        stage: 阶段名，如 "keywords"、"search"、"recommend"、"summaries"
+        fingerprint: 输入指纹（上传内容和流水线参数），读取时不一致的检查点作废
+        data: 阶段输出（可JSON序列化）
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    path = os.path.join(checkpoint_dir, f"{stage}.json.gz")
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    payload = {"stage": stage, "fingerprint": fingerprint, "saved_at": time.time(), "data": data}
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+        json.dump(payload, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+
+def load_job_checkpoint(checkpoint_dir: str, stage: str, fingerprint: str):
+    """
+    读取某一阶段的检查点
+
+    Returns:
+        阶段输出；检查点不存在、无法读取或输入指纹不一致时返回None
+    """
+    payload = _read_job_checkpoint(checkpoint_dir, stage)
+    if payload is None or payload.get("fingerprint") != fingerprint:
+        return None
+    return payload.get("data")
+
+
+def job_checkpoint_fingerprint(checkpoint_dir: str, stage: str) -> Optional[str]:
+    """某一阶段检查点记录的输入指纹（检查点不存在时返回None）"""
+    payload = _read_job_checkpoint(checkpoint_dir, stage)
+    return payload.get("fingerprint") if payload else None
+
+
+def _read_job_checkpoint(checkpoint_dir: str, stage: str) -> Optional[dict]:
+    path = os.path.join(checkpoint_dir, f"{stage}.json.gz")
+    if not os.path.isfile(path):
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"读取检查点失败 {path}: {e}")
+        return None
+
+
 def cleanup_user_data(folder_name: str, base_dir: str) -> dict:
     """
     清理用户数据：删除上传文件、处理结果和输出文件
@@ -180,7 +462,8 @@ def cleanup_user_data(folder_name: str, base_dir: str) -> dict:
             "deleted": {
                 "uploads": bool,
                 "results": bool,
-                "outputs": bool
+                "outputs": bool,
+                "keyword_state": bool
             },
             "message": str
         }
@@ -190,7 +473,8 @@ def cleanup_user_data(folder_name: str, base_dir: str) -> dict:
         "deleted": {
             "uploads": False,
             "results": False,
-            "outputs": False
+            "outputs": False,
+            "keyword_state": False
         },
         "message": ""
     }
@@ -199,6 +483,7 @@ def cleanup_user_data(folder_name: str, base_dir: str) -> dict:
     results_dir = os.path.join(base_dir, "data", "results", folder_name)
     outputs_dir = os.path.join(base_dir, "data", "outputs", folder_name)
     outputs_zip = os.path.join(base_dir, "data", "outputs", f"{folder_name}_recommended.zip")
+    keyword_state = os.path.join(base_dir, "data", "keyword_state", f"{folder_name}.pkl")
     
     deleted_items = []
     
@@ -240,6 +525,15 @@ def cleanup_user_data(folder_name: str, base_dir: str) -> dict:
         except Exception as e:
             print(f"删除输出zip文件失败: {e}")
     
+    # 删除增量关键词状态
+    if os.path.exists(keyword_state):
+        try:
+            os.remove(keyword_state)
+            result["deleted"]["keyword_state"] = True
+            deleted_items.append("关键词状态")
+        except Exception as e:
+            print(f"删除关键词状态失败: {e}")
+    
     if deleted_items:
         result["message"] = f"已清理: {', '.join(deleted_items)}"
     else:
@@ -248,18 +542,113 @@ def cleanup_user_data(folder_name: str, base_dir: str) -> dict:
     return result
 
 
-def convert_pdf_to_txt(pdf_path: str, output_txt_path: str = None) -> str:
+@contextlib.contextmanager
+def _quiet_pdf_libs():
+    """抑制PDF处理库的警告和stderr输出"""
+    import logging
+    pdfplumber_logger = logging.getLogger('pdfplumber')
+    original_level = pdfplumber_logger.level
+    pdfplumber_logger.setLevel(logging.ERROR)
+    try:
+        with contextlib.redirect_stderr(io.StringIO()):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                yield
+    finally:
+        pdfplumber_logger.setLevel(original_level)
+
+
+def _open_pdf_source(source: Union[str, bytes]):
+    """PDF来源可以是文件路径，也可以是内存中的PDF内容"""
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    return open(source, 'rb')
+
+
+def _iter_pages_pypdf2(source: Union[str, bytes]):
+    """用PyPDF2逐页提取文本（速度快，不做版面分析）"""
+    with _open_pdf_source(source) as file:
+        for page in PyPDF2.PdfReader(file).pages:
+            yield page.extract_text() or ""
+
+
+def _iter_pages_pdfplumber(source: Union[str, bytes]):
+    """用pdfplumber逐页提取文本（版面分析更准确，但慢得多）；处理完的页面立即释放缓存"""
+    with _open_pdf_source(source) as file, pdfplumber.open(file) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or ""
+            page.flush_cache()
+
+
+def _looks_like_text(text: str) -> bool:
+    """判断PyPDF2试提取的文本是否可用：字数足够，且绝大部分是正常文字（而非乱码）"""
+    if len(text.strip()) < PDF_PROBE_MIN_CHARS:
+        return False
+    readable = sum(1 for ch in text if ch.isalnum() or ch.isspace() or ch in ".,;:!?'\"()-[]，。；：！？")
+    return readable / len(text) >= PDF_PROBE_MIN_READABLE_RATIO
+
+
+def _choose_pdf_engine(source: Union[str, bytes]) -> List[str]:
+    """
+    按文件选择提取方式：先用PyPDF2试提取前几页，文本质量合格则用PyPDF2，
+    否则优先用pdfplumber。返回按优先级排列的提取方式（前一个失败时尝试下一个）
+    """
+    engines = []
+    if PYPDF2_AVAILABLE:
+        try:
+            with _quiet_pdf_libs():
+                pages = _iter_pages_pypdf2(source)
+                probe = "\n\n".join(text for _, text in zip(range(PDF_PROBE_PAGES), pages))
+            if _looks_like_text(probe):
+                return ["pypdf2"] + (["pdfplumber"] if PDFPLUMBER_AVAILABLE else [])
+        except Exception:
+            pass
+    if PDFPLUMBER_AVAILABLE:
+        engines.append("pdfplumber")
+    if PYPDF2_AVAILABLE:
+        engines.append("pypdf2")
+    return engines
+
+
+def _stream_pdf_text(page_texts, output_file, max_pages: Optional[int], max_chars: Optional[int]) -> int:
+    """把逐页文本写入输出文件，达到页数或字数上限时提前停止；返回写入的非空白字符数"""
+    written = 0
+    meaningful = 0
+    for page_index, page_text in enumerate(page_texts):
+        if max_pages is not None and page_index >= max_pages:
+            break
+        if not page_text:
+            continue
+        if max_chars is not None and written + len(page_text) > max_chars:
+            page_text = page_text[:max(max_chars - written, 0)]
+        if written:
+            output_file.write("\n\n")
+        output_file.write(page_text)
+        written += len(page_text)
+        meaningful += len(page_text.strip())
+        if max_chars is not None and written >= max_chars:
+            break
+    return meaningful
+
+
+def convert_pdf_to_txt(pdf_path: str, output_txt_path: str = None,
+                       max_pages: Optional[int] = None, max_chars: Optional[int] = None,
+                       pdf_bytes: Optional[bytes] = None) -> str:
     """
-    将PDF文件转换为TXT文件
+    将PDF文件转换为TXT文件（逐页写入输出文件，内存占用不随页数增长）
     
     Args:
         pdf_path: PDF文件路径
         output_txt_path: 输出TXT文件路径，如果为None则自动生成
+        max_pages: 最多提取的页数（None表示不限）
+        max_chars: 最多提取的字符数（None表示不限）
+        pdf_bytes: 内存中的PDF内容（可选，如zip成员）；提供时不读取文件，pdf_path只用于命名和日志
     
     Returns:
         转换后的TXT文件路径，失败返回None
     """
-    if not os.path.isfile(pdf_path):
+    source = pdf_bytes if pdf_bytes is not None else pdf_path
+    if pdf_bytes is None and not os.path.isfile(pdf_path):
         print(f"PDF文件不存在: {pdf_path}")
         return None
     
@@ -267,82 +656,338 @@ def convert_pdf_to_txt(pdf_path: str, output_txt_path: str = None) -> str:
     if output_txt_path is None:
         base_name = os.path.splitext(pdf_path)[0]
         output_txt_path = f"{base_name}_pdf.txt"
+    partial_path = f"{output_txt_path}.part"
     
+    page_iterators = {"pypdf2": _iter_pages_pypdf2, "pdfplumber": _iter_pages_pdfplumber}
+    start = time.perf_counter()
     try:
-        text_content = []
-        
-        # 优先使用pdfplumber（更准确）
-        if PDFPLUMBER_AVAILABLE:
+        for engine in _choose_pdf_engine(source):
             try:
-                # 抑制pdfplumber的警告输出
-                import logging
-                pdfplumber_logger = logging.getLogger('pdfplumber')
-                original_level = pdfplumber_logger.level
-                pdfplumber_logger.setLevel(logging.ERROR)
-                
-                # 临时重定向stderr来抑制警告
-                with contextlib.redirect_stderr(io.StringIO()):
-                    with warnings.catch_warnings():
-                        warnings.simplefilter("ignore")
-                        with pdfplumber.open(pdf_path) as pdf:
-                            for page in pdf.pages:
-                                page_text = page.extract_text()
-                                if page_text:
-                                    text_content.append(page_text)
-                
-                # 恢复日志级别
-                pdfplumber_logger.setLevel(original_level)
-            except Exception as e:
-                # 不打印详细错误（避免终端输出过多），只在最后统一报告
-                text_content = []
-        
-        # 如果pdfplumber失败或不可用，使用PyPDF2
-        if not text_content and PYPDF2_AVAILABLE:
-            try:
-                # 抑制PyPDF2的警告输出
-                with contextlib.redirect_stderr(io.StringIO()):
-                    with warnings.catch_warnings():
-                        warnings.simplefilter("ignore")
-                        with open(pdf_path, 'rb') as file:
-                            pdf_reader = PyPDF2.PdfReader(file)
-                            for page in pdf_reader.pages:
-                                page_text = page.extract_text()
-                                if page_text:
-                                    text_content.append(page_text)
-            except Exception as e:
-                # 不打印详细错误，只在最后统一报告
-                return None
-        
-        if not text_content:
-            # 不打印每个失败的文件，只在最后统一报告
-            return None
-        
-        # 保存为TXT文件
-        full_text = "\n\n".join(text_content)
-        # 检查提取的文本是否足够（至少50个字符）
-        if len(full_text.strip()) < 50:
-            # 文本内容太少，可能提取失败
-            return None
-        
-        with open(output_txt_path, 'w', encoding='utf-8') as f:
-            f.write(full_text)
-        
-        # 只打印成功转换的文件名（不打印完整路径）
-        filename = os.path.basename(pdf_path)
-        print(f"PDF转换成功: {filename} -> {os.path.basename(output_txt_path)}")
-        return output_txt_path
-    
+                with _quiet_pdf_libs(), open(partial_path, 'w', encoding='utf-8') as f:
+                    meaningful = _stream_pdf_text(page_iterators[engine](source), f, max_pages, max_chars)
+            except Exception:
+                # 不打印详细错误（避免终端输出过多），换下一种方式，都失败时在最后统一报告
+                continue
+            # 检查提取的文本是否足够（至少50个字符），太少可能是提取失败
+            if meaningful >= 50:
+                os.replace(partial_path, output_txt_path)
+                # 只打印成功转换的文件名（不打印完整路径）
+                print(f"PDF转换成功: {os.path.basename(pdf_path)} -> {os.path.basename(output_txt_path)}"
+                      f"（{engine}，{time.perf_counter() - start:.2f}秒）")
+                return output_txt_path
+        return None
     except Exception as e:
         # 不打印详细错误，只在最后统一报告
         return None
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+def _limit_process_memory(max_memory_mb: int) -> None:
+    """限制当前进程的地址空间：在已占用的基础上最多再分配 max_memory_mb，超出时分配失败（MemoryError）"""
+    if not RESOURCE_AVAILABLE or not max_memory_mb:
+        return
+    try:
+        with open("/proc/self/statm") as f:
+            current_bytes = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+        limit = current_bytes + max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (OSError, ValueError):
+        pass
+
+
+def _convert_pdf_worker(pdf_path: str, output_txt_path: str, pdf_bytes: Optional[bytes], max_memory_mb: int,
+                        max_pages: Optional[int], max_chars: Optional[int]) -> None:
+    """转换进程入口：以退出码报告结果（0成功，1失败）"""
+    _limit_process_memory(max_memory_mb)
+    try:
+        txt_path = convert_pdf_to_txt(pdf_path, output_txt_path, max_pages=max_pages, max_chars=max_chars,
+                                      pdf_bytes=pdf_bytes)
+    except MemoryError:
+        txt_path = None
+    sys.stdout.flush()
+    os._exit(0 if txt_path else 1)
+
+
+def _available_cpus() -> int:
+    """当前进程可用的CPU核数（考虑CPU亲和性/容器限制）"""
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def process_context():
+    """
+    子进程（PDF转换进程、关键词分词进程池）的启动方式：调用方（Flask请求线程、任务工作线程）是多线程进程，
+    在其中fork可能复制到其他线程持有的锁而死锁，因此用forkserver（不支持时用spawn）。
+    forkserver预先导入本项目中已导入的 backend.* 模块（连同其依赖的PDF库、sklearn等），子进程从服务进程fork，
+    不必重新导入这些依赖。不预先导入主模块：主模块（如app.py）有启动副作用，不应在服务进程中执行
+    """
+    try:
+        ctx = multiprocessing.get_context("forkserver")
+    except ValueError:
+        return multiprocessing.get_context("spawn")
+    package = __name__.split(".")[0] + "."
+    ctx.set_forkserver_preload(sorted(name for name in sys.modules if name.startswith(package)))
+    return ctx
+
+
+def _convert_pdfs_in_processes(jobs: List[Tuple], workers: int, timeout: float, max_memory_mb: int,
+                               max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> dict:
+    """
+    每个PDF在独立子进程中转换，最多同时运行 workers 个；
+    超时的进程会被终止，超出内存上限或崩溃的进程只记为该文件失败，不影响其他文件
+
+    Args:
+        jobs: [(pdf_path, output_txt_path, load_bytes), ...]，load_bytes 为None时按路径读取PDF，
+              否则在启动对应子进程前调用它取得PDF内容
+
+    Returns:
+        {pdf_path: 是否成功}
+    """
+    ctx = process_context()
+
+    pending = list(jobs)
+    running = {}  # pdf_path -> (进程, 截止时间, 输出路径)
+    results = {}
+    while pending or running:
+        while pending and len(running) < workers:
+            pdf_path, output_txt_path, load_bytes = pending.pop(0)
+            pdf_bytes = load_bytes() if load_bytes else None
+            proc = ctx.Process(target=_convert_pdf_worker,
+                               args=(pdf_path, output_txt_path, pdf_bytes, max_memory_mb, max_pages, max_chars),
+                               daemon=True)
+            proc.start()
+            running[pdf_path] = (proc, time.monotonic() + timeout if timeout else None, output_txt_path)
+
+        time.sleep(0.02)
+        now = time.monotonic()
+        for pdf_path, (proc, deadline, output_txt_path) in list(running.items()):
+            if proc.exitcode is not None:
+                results[pdf_path] = proc.exitcode == 0
+            elif deadline is not None and now > deadline:
+                proc.kill()
+                print(f"PDF转换超时（{timeout}秒），已终止: {os.path.basename(pdf_path)}")
+                results[pdf_path] = False
+            else:
+                continue
+            proc.join()
+            del running[pdf_path]
+            if not results[pdf_path]:
+                # 被终止的进程可能留下写了一半的临时文件
+                partial_txt = f"{output_txt_path}.part"
+                if os.path.exists(partial_txt):
+                    os.remove(partial_txt)
+    return results
+
+
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """分块计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def configure_pdf_cache(cache_dir: Optional[str], max_bytes: int = 500 * 1024 * 1024):
+    """
+    启用（或关闭）PDF转换缓存
+
+    Args:
+        cache_dir: 缓存目录，None表示关闭缓存
+        max_bytes: 缓存总大小上限，超过后按最近最少使用（LRU）淘汰
+    """
+    with _PDF_CACHE["lock"]:
+        _PDF_CACHE["dir"] = cache_dir
+        _PDF_CACHE["max_bytes"] = max_bytes
+        _PDF_CACHE["size"] = None
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+
+def pdf_cache_key(pdf_sha256: str, max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> str:
+    """PDF转换缓存键：(PDF内容哈希, 转换格式版本, 页数上限, 字符数上限)"""
+    return f"{pdf_sha256}.v{PDF_CONVERSION_VERSION}.p{max_pages or 0}.c{max_chars or 0}"
+
+
+def _pdf_cache_path(key: str) -> Optional[str]:
+    cache_dir = _PDF_CACHE["dir"]
+    if not cache_dir:
+        return None
+    return os.path.join(cache_dir, key[:2], f"{key}.txt")
+
+
+def _link_or_copy(src: str, dst: str):
+    """优先用硬链接（不占额外空间），跨文件系统等情况下退回复制"""
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def load_cached_pdf_text(key: str, output_txt_path: str) -> bool:
+    """缓存命中时把转换结果链接（或复制）到输出路径并刷新访问时间（用于LRU），返回是否命中"""
+    path = _pdf_cache_path(key)
+    if not path or not os.path.isfile(path):
+        return False
+    try:
+        _link_or_copy(path, output_txt_path)
+        os.utime(path, None)
+        return True
+    except OSError:
+        return False
+
+
+def store_cached_pdf_text(key: str, txt_path: str):
+    """把转换结果放入缓存，超过大小上限时淘汰最久未使用的条目"""
+    path = _pdf_cache_path(key)
+    if not path:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 覆盖已有条目时，总大小只增加新旧内容的差值
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        _link_or_copy(txt_path, tmp_path)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+    except OSError as e:
+        print(f"写入PDF转换缓存失败: {e}")
+        return
+
+    with _PDF_CACHE["lock"]:
+        if _PDF_CACHE["size"] is None:
+            _PDF_CACHE["size"] = sum(entry_size for _, _, entry_size in _scan_pdf_cache())
+        else:
+            _PDF_CACHE["size"] += size - old_size
+        if _PDF_CACHE["size"] > _PDF_CACHE["max_bytes"]:
+            _PDF_CACHE["size"] = _evict_pdf_cache(_PDF_CACHE["max_bytes"])
+
+
+def _scan_pdf_cache():
+    """列出缓存条目 (访问时间, 路径, 大小)"""
+    entries = []
+    cache_dir = _PDF_CACHE["dir"]
+    if not cache_dir or not os.path.isdir(cache_dir):
+        return entries
+    for sub in os.scandir(cache_dir):
+        if not sub.is_dir():
+            continue
+        for entry in os.scandir(sub.path):
+            if entry.name.endswith(".txt"):
+                st = entry.stat()
+                entries.append((st.st_mtime, entry.path, st.st_size))
+    return entries
 
 
-def convert_all_pdfs_to_txt(folder_path: str) -> dict:
+def _evict_pdf_cache(max_bytes: int) -> int:
+    """按最近最少使用淘汰，直到总大小降到上限的90%以下；返回淘汰后的总大小"""
+    entries = sorted(_scan_pdf_cache())
+    total = sum(size for _, _, size in entries)
+    target = int(max_bytes * 0.9)
+    for _, path, size in entries:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+    return total
+
+
+def _convert_pdf_sources(sources: List[Tuple], workers: Optional[int], timeout: float, max_memory_mb: int,
+                         max_pages: Optional[int], max_chars: Optional[int]) -> Dict[str, Optional[str]]:
+    """
+    批量转换PDF：先查转换缓存，同一批中内容相同的PDF只转换一次，其余按 workers 并行转换
+
+    Args:
+        sources: [(pdf_path, output_txt_path, content_sha256, load_bytes), ...]
+                 content_sha256 为None时不查缓存；load_bytes 为None时按路径读取PDF
+
+    Returns:
+        {pdf_path: txt_path 或 None}
+    """
+    results = {}
+    cache_keys = {}
+    first_by_key = {}
+    duplicates = {}  # pdf_path -> (内容相同、实际转换的pdf_path, 输出路径)
+    to_convert = []
+    for pdf_path, output_txt_path, content_sha256, load_bytes in sources:
+        key = pdf_cache_key(content_sha256, max_pages, max_chars) if content_sha256 and _PDF_CACHE["dir"] else None
+        if key and load_cached_pdf_text(key, output_txt_path):
+            results[pdf_path] = output_txt_path
+            continue
+        if key and key in first_by_key:
+            duplicates[pdf_path] = (first_by_key[key], output_txt_path)
+            continue
+        if key:
+            cache_keys[pdf_path] = key
+            first_by_key[key] = pdf_path
+        to_convert.append((pdf_path, output_txt_path, load_bytes))
+    
+    if workers is None:
+        workers = _available_cpus()
+    workers = min(workers, len(to_convert))
+    # 设置了超时或内存上限时，即使只有一个转换进程也不在当前进程中转换，异常PDF不会卡住或撑爆处理流水线
+    if to_convert and (workers > 1 or timeout or max_memory_mb):
+        # 子进程转换：转换成功时TXT文件已写到输出路径
+        outcomes = _convert_pdfs_in_processes(to_convert, max(workers, 1), timeout, max_memory_mb,
+                                              max_pages, max_chars)
+        for pdf_path, output_txt_path, _ in to_convert:
+            results[pdf_path] = output_txt_path if outcomes.get(pdf_path) else None
+    else:
+        for pdf_path, output_txt_path, load_bytes in to_convert:
+            results[pdf_path] = convert_pdf_to_txt(pdf_path, output_txt_path, max_pages=max_pages, max_chars=max_chars,
+                                                   pdf_bytes=load_bytes() if load_bytes else None)
+    
+    for pdf_path, _, _ in to_convert:
+        if results[pdf_path] and pdf_path in cache_keys:
+            store_cached_pdf_text(cache_keys[pdf_path], results[pdf_path])
+    for pdf_path, (original, output_txt_path) in duplicates.items():
+        results[pdf_path] = None
+        if results[original]:
+            try:
+                _link_or_copy(results[original], output_txt_path)
+                results[pdf_path] = output_txt_path
+            except OSError:
+                pass
+    return results
+
+
+def _report_failed_pdfs(failed_files: List[str]):
+    """统一报告失败的PDF文件（如果有）"""
+    if failed_files:
+        print(f"PDF转换失败的文件（共{len(failed_files)}个，可能是文件损坏或格式不支持）:")
+        for failed_file in failed_files[:5]:  # 只显示前5个
+            print(f"  - {failed_file}")
+        if len(failed_files) > 5:
+            print(f"  ... 还有 {len(failed_files) - 5} 个文件转换失败")
+
+
+def convert_all_pdfs_to_txt(folder_path: str, workers: Optional[int] = PDF_CONVERSION_WORKERS,
+                            timeout: float = PDF_CONVERSION_TIMEOUT,
+                            max_memory_mb: int = PDF_CONVERSION_MAX_MEMORY_MB,
+                            max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> dict:
     """
     将文件夹中所有PDF文件转换为TXT文件
     
     Args:
         folder_path: 文件夹路径
+        workers: 并行转换的进程数（None表示按当前进程可用的CPU核数）
+        timeout: 单个PDF的转换超时（秒），超时的文件记为失败
+        max_memory_mb: 单个转换进程最多额外使用的内存（MB），超出的文件记为失败；
+                       timeout 和 max_memory_mb 都为0/None且 workers 为0或1时在当前进程中逐个转换，不做保护
+        max_pages: 每个PDF最多提取的页数（None表示不限）
+        max_chars: 每个PDF最多提取的字符数（None表示不限）
     
     Returns:
         {
@@ -357,8 +1002,20 @@ def convert_all_pdfs_to_txt(folder_path: str) -> dict:
     converted_files = []
     failed_files = []
     
+    # 启用转换缓存时按内容哈希复用转换结果
+    sources = []
+    for pdf_path in pdf_files:
+        content_sha256 = None
+        if _PDF_CACHE["dir"]:
+            try:
+                content_sha256 = file_sha256(pdf_path)
+            except OSError:
+                pass
+        sources.append((pdf_path, f"{os.path.splitext(pdf_path)[0]}_pdf.txt", content_sha256, None))
+    results = _convert_pdf_sources(sources, workers, timeout, max_memory_mb, max_pages, max_chars)
+    
     for pdf_path in pdf_files:
-        txt_path = convert_pdf_to_txt(pdf_path)
+        txt_path = results[pdf_path]
         if txt_path:
             success_count += 1
             converted_files.append((pdf_path, txt_path))
@@ -366,13 +1023,7 @@ def convert_all_pdfs_to_txt(folder_path: str) -> dict:
             failed_count += 1
             failed_files.append(os.path.basename(pdf_path))
     
-    # 统一报告失败的PDF文件（如果有）
-    if failed_files:
-        print(f"PDF转换失败的文件（共{len(failed_files)}个，可能是文件损坏或格式不支持）:")
-        for failed_file in failed_files[:5]:  # 只显示前5个
-            print(f"  - {failed_file}")
-        if len(failed_files) > 5:
-            print(f"  ... 还有 {len(failed_files) - 5} 个文件转换失败")
+    _report_failed_pdfs(failed_files)
     
     return {
         "success_count": success_count,
@@ -380,3 +1031,136 @@ def convert_all_pdfs_to_txt(folder_path: str) -> dict:
         "converted_files": converted_files
     }
 
+
+# ==================== zip直接读取 ====================
+
+def _is_system_file(member_name: str) -> bool:
+    """macOS资源分叉文件（以._开头）、__MACOSX目录和其他系统隐藏文件"""
+    return _is_hidden_system_name(member_name.rsplit("/", 1)[-1]) or member_name.startswith('__MACOSX/')
+
+
+def ingest_zip(zip_path: str, converted_dir: str, workers: Optional[int] = PDF_CONVERSION_WORKERS,
+               timeout: float = PDF_CONVERSION_TIMEOUT, max_memory_mb: int = PDF_CONVERSION_MAX_MEMORY_MB,
+               max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> Optional[dict]:
+    """
+    不解压，直接从zip中建立语料清单：一次遍历 infolist() 完成文件分类和计数，
+    txt成员留在zip中（处理时由 iter_corpus_documents 流式读取），
+    PDF成员从内存中的内容转换，结果写入 converted_dir
+    
+    Args:
+        zip_path: 上传的zip文件路径
+        converted_dir: PDF转换结果的保存目录
+        其余参数同 convert_all_pdfs_to_txt
+    
+    Returns:
+        语料清单（可用 save_corpus_manifest 保存），zip无法读取时返回None:
+        {
+            "zip_path": zip文件路径,
+            "txt_members": [txt成员名, ...],
+            "converted": [(PDF成员名, 转换后的txt路径), ...],
+            "pdf_count": PDF文件数量,
+            "original_txt_count": 原始txt文件数量（不包括PDF转换后的txt）,
+            "success_count": 成功转换的PDF数量,
+            "failed_count": 转换失败的PDF数量
+        }
+    """
+    try:
+        zip_ref = zipfile.ZipFile(zip_path, 'r')
+    except (zipfile.BadZipFile, OSError) as e:
+        print(f"Error reading zip: {e}")
+        return None
+    
+    txt_members = []
+    pdf_members = []
+    original_txt_count = 0
+    with zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir() or _is_system_file(info.filename):
+                continue
+            lower_name = info.filename.lower()
+            if lower_name.endswith(".txt"):
+                txt_members.append(info.filename)
+                # 原始txt数量不包括PDF转换后的_pdf.txt文件
+                if not lower_name.endswith("_pdf.txt"):
+                    original_txt_count += 1
+            elif lower_name.endswith(".pdf"):
+                pdf_members.append(info)
+        
+        # PDF成员：按内容哈希查转换缓存，未命中的在启动转换时再从zip读出内容
+        sources = []
+        if pdf_members:
+            os.makedirs(converted_dir, exist_ok=True)
+        for i, info in enumerate(pdf_members):
+            content_sha256 = None
+            if _PDF_CACHE["dir"]:
+                digest = hashlib.sha256()
+                with zip_ref.open(info) as member:
+                    for chunk in iter(lambda: member.read(1024 * 1024), b""):
+                        digest.update(chunk)
+                content_sha256 = digest.hexdigest()
+            stem = sanitize_filename(os.path.splitext(info.filename.rsplit("/", 1)[-1])[0])
+            output_txt_path = os.path.join(converted_dir, f"{i:04d}_{stem}_pdf.txt")
+            sources.append((info.filename, output_txt_path, content_sha256,
+                            lambda info=info: zip_ref.read(info)))
+        results = _convert_pdf_sources(sources, workers, timeout, max_memory_mb, max_pages, max_chars)
+    
+    converted = [(info.filename, results[info.filename]) for info in pdf_members if results[info.filename]]
+    _report_failed_pdfs([info.filename.rsplit("/", 1)[-1] for info in pdf_members if not results[info.filename]])
+    
+    return {
+        "zip_path": zip_path,
+        "txt_members": txt_members,
+        "converted": converted,
+        "pdf_count": len(pdf_members),
+        "original_txt_count": original_txt_count,
+        "success_count": len(converted),
+        "failed_count": len(pdf_members) - len(converted)
+    }
+
+
+def save_corpus_manifest(corpus: dict, manifest_path: str):
+    """保存语料清单"""
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(corpus, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+
+def load_corpus_manifest(manifest_path: str) -> Optional[dict]:
+    """读取语料清单，不存在或无法读取时返回None"""
+    if not os.path.isfile(manifest_path):
+        return None
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"读取语料清单失败: {e}")
+        return None
+
+
+def iter_corpus_documents(corpus: dict) -> Iterator[Tuple[str, bytes]]:
+    """
+    按名称顺序逐个读出语料文档 (名称, 内容字节)：txt直接从zip中读取，PDF读取转换后的txt
+    PDF转换结果的名称为 "<成员名去掉.pdf>_pdf.txt"，与解压后转换的文件名排序一致
+    """
+    entries = [(name, None) for name in corpus["txt_members"]]
+    entries += [(f"{os.path.splitext(name)[0]}_pdf.txt", txt_path) for name, txt_path in corpus["converted"]]
+    entries.sort()
+    with zipfile.ZipFile(corpus["zip_path"], 'r') as zip_ref:
+        for name, txt_path in entries:
+            if txt_path is None:
+                data = zip_ref.read(name)
+            else:
+                with open(txt_path, "rb") as f:
+                    data = f.read()
+            yield name, data
+
+
+def read_corpus_texts(corpus: dict) -> List[str]:
+    """读取语料中所有文档的文本（去掉首尾空白，跳过空文档），与推荐系统读取txt文件夹的结果一致"""
+    texts = []
+    for _, data in iter_corpus_documents(corpus):
+        content = data.decode("utf-8", errors="ignore").strip()
+        if content:
+            texts.append(content)
+    return texts
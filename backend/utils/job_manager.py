@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务管理模块
+/process 的处理流程（关键词提取、资源搜索、推荐筛选、摘要生成）作为任务提交到固定大小的工作线程池，
+等待中的任务放在有最大深度的队列里，队列满时直接拒绝新任务（而不是同时跑无限多个流水线）。
+任务运行中产生的进度事件发布到任务的进度通道（见 progress_channel），客户端可以通过SSE订阅或按序号轮询获取。
+"""
+
+import time
+import uuid
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from backend.utils.progress_channel import (
+    PROGRESS_HEARTBEAT_INTERVAL,
+    new_progress_channel,
+    publish,
+    close_channel,
+    channel_events,
+    channel_size,
+    last_event,
+    iter_channel
+)
+
+# 同时运行的任务数（工作线程数）
+JOB_WORKERS = 2
+# 排队等待的任务数上限，超过后拒绝提交
+JOB_QUEUE_MAX_DEPTH = 8
+# 内存中保留的已结束任务数（超过后删除最早结束的任务记录）
+JOB_HISTORY_MAX = 100
+
+class JobQueueFull(Exception):
+    """任务队列已满"""
+
+
+_JOBS = {
+    "lock": threading.Lock(),
+    "queue": None,        # queue.Queue，待运行的任务
+    "unfinished": 0,      # 排队中和运行中的任务数
+    "jobs": {},           # {job_id: job}
+    "active_by_name": {}, # {任务名: job_id}，同名任务排队或运行中时复用
+    "finished": [],       # 已结束任务的id（按结束顺序）
+    "workers": [],
+    "max_workers": JOB_WORKERS,
+    "max_queue_depth": JOB_QUEUE_MAX_DEPTH,
+}
+
+
+def configure_job_manager(workers: int = JOB_WORKERS, max_queue_depth: int = JOB_QUEUE_MAX_DEPTH):
+    """
+    设置工作线程数和队列深度（需在第一次提交任务前调用）
+
+    Args:
+        workers: 同时运行的任务数
+        max_queue_depth: 排队等待的任务数上限
+    """
+    with _JOBS["lock"]:
+        if _JOBS["workers"]:
+            raise RuntimeError("任务工作线程已启动，不能再修改配置")
+        _JOBS["max_workers"] = max(1, workers)
+        _JOBS["max_queue_depth"] = max(1, max_queue_depth)
+
+
+def _ensure_workers():
+    """按需启动工作线程（调用方持有锁）"""
+    if _JOBS["workers"]:
+        return
+    _JOBS["queue"] = queue.Queue()
+    for i in range(_JOBS["max_workers"]):
+        worker = threading.Thread(target=_worker_loop, name=f"job-worker-{i}", daemon=True)
+        worker.start()
+        _JOBS["workers"].append(worker)
+
+
+def submit_job(name: str, run: Callable[[Callable[[dict], None]], Any]) -> dict:
+    """
+    提交任务；同名任务已在排队或运行时直接返回该任务
+
+    Args:
+        name: 任务名（如上传的文件夹名）
+        run: 任务函数，参数为 emit(event)，用它按顺序发布进度事件
+
+    Returns:
+        任务记录
+
+    Raises:
+        JobQueueFull: 排队的任务数已达上限
+    """
+    with _JOBS["lock"]:
+        existing = _JOBS["active_by_name"].get(name)
+        if existing is not None:
+            return _JOBS["jobs"][existing]
+
+        _ensure_workers()
+        # 工作线程全忙时最多再排 max_queue_depth 个任务
+        queued = _JOBS["unfinished"] - _JOBS["max_workers"]
+        if queued >= _JOBS["max_queue_depth"]:
+            raise JobQueueFull(f"任务队列已满（最多 {_JOBS['max_queue_depth']} 个任务排队）")
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "name": name,
+            "state": "queued",
+            "channel": new_progress_channel(),
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "run": run,
+        }
+        _JOBS["unfinished"] += 1
+        # 排在第几位（有空闲工作线程时为0）
+        job["queue_position"] = max(queued + 1, 0)
+        _JOBS["jobs"][job["id"]] = job
+        _JOBS["active_by_name"][name] = job["id"]
+        _JOBS["queue"].put(job)
+    return job
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """按id查找任务"""
+    return _JOBS["jobs"].get(job_id)
+
+
+def find_job(name: str) -> Optional[dict]:
+    """按任务名查找正在排队或运行的任务"""
+    job_id = _JOBS["active_by_name"].get(name)
+    return _JOBS["jobs"].get(job_id) if job_id else None
+
+
+def emit_job_event(job: dict, event: dict) -> Optional[int]:
+    """发布一个进度事件（任意线程都可以调用），返回事件序号"""
+    return publish(job["channel"], event)
+
+
+def get_job_events(job: dict, since: int = 0) -> List[Tuple[int, dict]]:
+    """取出序号不小于 since 的 (序号, 事件)"""
+    return channel_events(job["channel"], since)
+
+
+def job_finished(job: dict) -> bool:
+    """任务是否已结束（状态依次为 queued → running → done/failed）"""
+    return job["state"] in ("done", "failed")
+
+
+def job_status(job: dict) -> Dict[str, Any]:
+    """任务状态摘要（用于轮询接口）"""
+    last = last_event(job["channel"])
+    n_events = channel_size(job["channel"])
+    status = {
+        "job_id": job["id"],
+        "name": job["name"],
+        "state": job["state"],
+        "events": n_events,
+        "progress": last.get("progress") if isinstance(last, dict) and isinstance(last.get("progress"), (int, float)) else None,
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "error": job["error"],
+    }
+    if job["state"] == "queued":
+        status["queue_position"] = job.get("queue_position")
+    return status
+
+
+def get_job_manager_stats() -> Dict[str, int]:
+    """工作线程数、排队和运行中的任务数"""
+    with _JOBS["lock"]:
+        states = [job["state"] for job in _JOBS["jobs"].values()]
+        return {
+            "workers": _JOBS["max_workers"],
+            "max_queue_depth": _JOBS["max_queue_depth"],
+            "queued": states.count("queued"),
+            "running": states.count("running"),
+        }
+
+
+def iter_job_events(job: dict, since: int = 0,
+                    heartbeat_interval: float = PROGRESS_HEARTBEAT_INTERVAL) -> Iterator[Optional[Tuple[int, dict]]]:
+    """
+    按顺序逐个返回任务的 (序号, 事件)，阻塞等待新事件，长时间没有事件时返回None（心跳），
+    任务结束且事件全部返回后停止（供SSE使用）
+
+    Args:
+        since: 从哪个序号开始（断线重连时重放该序号之后的事件）
+    """
+    return iter_channel(job["channel"], since, heartbeat_interval)
+
+
+def _finish_job(job: dict, state: str, error: Optional[str] = None):
+    with _JOBS["lock"]:
+        job["state"] = state
+        job["error"] = error
+        job["finished_at"] = time.time()
+        job["run"] = None
+        _JOBS["unfinished"] -= 1
+        # 状态更新后再关闭通道：订阅者结束时任务状态已是最终状态
+        close_channel(job["channel"])
+        if _JOBS["active_by_name"].get(job["name"]) == job["id"]:
+            del _JOBS["active_by_name"][job["name"]]
+        finished = _JOBS["finished"]
+        finished.append(job["id"])
+        while len(finished) > JOB_HISTORY_MAX:
+            _JOBS["jobs"].pop(finished.pop(0), None)
+
+
+def _worker_loop():
+    job_queue = _JOBS["queue"]
+    while True:
+        job = job_queue.get()
+        with _JOBS["lock"]:
+            job["state"] = "running"
+            job["started_at"] = time.time()
+        try:
+            job["run"](lambda event: emit_job_event(job, event))
+            _finish_job(job, "done")
+        except Exception as e:
+            print(f"任务 {job['name']} ({job['id']}) 失败: {e}")
+            _finish_job(job, "failed", str(e))
+        finally:
+            job_queue.task_done()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进度通道模块
+任务线程发布进度事件，任意多个订阅者（SSE连接）各自用一个 queue.Queue 阻塞等待，
+事件发布后立即送达，没有事件时不会空转唤醒；长时间没有事件时返回心跳，便于保持连接。
+通道保留最近的事件及其序号，断线重连的订阅者可以从指定序号开始重放。
+"""
+
+import queue
+import threading
+from collections import deque
+from typing import Iterator, List, Optional, Tuple
+
+# 每个通道保留用于重放的最近事件数
+PROGRESS_REPLAY_SIZE = 1000
+# 没有新事件时多久返回一次心跳（秒）
+PROGRESS_HEARTBEAT_INTERVAL = 15.0
+
+# 通道关闭标记（放入订阅者队列）
+_CLOSED = object()
+
+
+def new_progress_channel(replay_size: int = PROGRESS_REPLAY_SIZE) -> dict:
+    """创建进度通道"""
+    return {
+        "lock": threading.Lock(),
+        "history": deque(maxlen=replay_size),  # [(序号, 事件)]
+        "next_seq": 0,
+        "subscribers": set(),
+        "closed": False,
+    }
+
+
+def publish(channel: dict, event: dict) -> Optional[int]:
+    """
+    发布事件并立即送达所有订阅者（任意线程都可以调用）
+
+    Returns:
+        事件序号（从0开始连续编号），通道已关闭时丢弃事件并返回None
+    """
+    with channel["lock"]:
+        if channel["closed"]:
+            return None
+        seq = channel["next_seq"]
+        channel["next_seq"] += 1
+        channel["history"].append((seq, event))
+        for subscriber in channel["subscribers"]:
+            subscriber.put((seq, event))
+    return seq
+
+
+def close_channel(channel: dict):
+    """关闭通道：订阅者收完已发布的事件后结束"""
+    with channel["lock"]:
+        if channel["closed"]:
+            return
+        channel["closed"] = True
+        for subscriber in channel["subscribers"]:
+            subscriber.put(_CLOSED)
+
+
+def channel_size(channel: dict) -> int:
+    """已发布的事件总数"""
+    return channel["next_seq"]
+
+
+def last_event(channel: dict) -> Optional[dict]:
+    """最近发布的事件"""
+    with channel["lock"]:
+        return channel["history"][-1][1] if channel["history"] else None
+
+
+def channel_events(channel: dict, since: int = 0) -> List[Tuple[int, dict]]:
+    """取出序号不小于 since 的已保留事件（用于轮询），更早的事件超出保留范围时从最早保留的开始"""
+    with channel["lock"]:
+        return [(seq, event) for seq, event in channel["history"] if seq >= since]
+
+
+def subscribe(channel: dict, since: int = 0) -> queue.Queue:
+    """
+    订阅通道：先放入序号不小于 since 的已保留事件（重放），之后发布的事件实时送达
+
+    Returns:
+        订阅者队列，元素为 (序号, 事件)；通道关闭后收到关闭标记
+    """
+    subscriber = queue.Queue()
+    with channel["lock"]:
+        for seq, event in channel["history"]:
+            if seq >= since:
+                subscriber.put((seq, event))
+        if channel["closed"]:
+            subscriber.put(_CLOSED)
+        else:
+            channel["subscribers"].add(subscriber)
+    return subscriber
+
+
+def unsubscribe(channel: dict, subscriber: queue.Queue):
+    with channel["lock"]:
+        channel["subscribers"].discard(subscriber)
+
+
+def iter_channel(channel: dict, since: int = 0,
+                 heartbeat_interval: float = PROGRESS_HEARTBEAT_INTERVAL) -> Iterator[Optional[Tuple[int, dict]]]:
+    """
+    逐个返回 (序号, 事件)，阻塞等待新事件；超过 heartbeat_interval 秒没有事件时返回None（心跳），
+    通道关闭且事件全部返回后停止。迭代器关闭（如客户端断开）时自动取消订阅。
+    """
+    subscriber = subscribe(channel, since)
+    try:
+        while True:
+            try:
+                item = subscriber.get(timeout=heartbeat_interval)
+            except queue.Empty:
+                yield None
+                continue
+            if item is _CLOSED:
+                return
+            yield item
+    finally:
+        unsubscribe(channel, subscriber)
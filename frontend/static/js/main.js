@@ -259,8 +259,15 @@ async function startProcessing(folderName) {
           try {
             const data = JSON.parse(line.slice(6));
             
+            // 处理后台生成完成的简介（最终结果发出后逐个推送）
+            if (data.type === 'summary') {
+              applySummaryUpdate(finalData, data);
+            }
+            else if (data.type === 'summaries_done') {
+              continue;
+            }
             // 处理搜索进度（实时显示当前搜索的关键词）
-            if (data.type === 'search_progress') {
+            else if (data.type === 'search_progress') {
               const progress = data.progress;
               
               if (progress.type === 'keyword_start') {
@@ -315,9 +322,10 @@ async function startProcessing(folderName) {
                 updateProcessingDetails(data.message);
               }
               
-              // 如果是完成或错误，保存最终数据
+              // 如果是完成或错误，保存最终数据并立即显示结果（简介随后逐个到达）
               if (data.step === 'complete' && data.success) {
                 finalData = data;
+                finishProcessing(finalData);
               } else if (data.step === 'error') {
                 updateProgress(0, '处理失败', 'error');
                 updateProcessingDetails(data.error || '处理过程中出现错误');
@@ -332,19 +340,7 @@ async function startProcessing(folderName) {
       }
     }
     
-    // 处理完成，显示结果
-    if (finalData && finalData.success) {
-      const completeText = getCurrentLanguage() === 'en-US' ? I18N_MAP['en-US']['home.processing.complete'] : I18N_MAP['zh-CN']['home.processing.complete'];
-      const allCompleteText = getCurrentLanguage() === 'en-US' ? I18N_MAP['en-US']['home.processing.allComplete'] : I18N_MAP['zh-CN']['home.processing.allComplete'];
-      updateProgress(100, completeText.replace('✨ ', ''), 'complete');
-      addTerminalLine(completeText, 'success');
-      updateProcessingDetails(allCompleteText);
-      
-      // 显示结果
-      setTimeout(() => {
-        showResults(finalData);
-      }, 500);
-    } else if (!finalData) {
+    if (!finalData) {
       throw new Error('未收到完成数据');
     }
   } catch (error) {
@@ -355,6 +351,40 @@ async function startProcessing(folderName) {
   }
 }
 
+// 处理完成，显示结果
+function finishProcessing(finalData) {
+  const completeText = getCurrentLanguage() === 'en-US' ? I18N_MAP['en-US']['home.processing.complete'] : I18N_MAP['zh-CN']['home.processing.complete'];
+  const allCompleteText = getCurrentLanguage() === 'en-US' ? I18N_MAP['en-US']['home.processing.allComplete'] : I18N_MAP['zh-CN']['home.processing.allComplete'];
+  updateProgress(100, completeText.replace('✨ ', ''), 'complete');
+  addTerminalLine(completeText, 'success');
+  updateProcessingDetails(allCompleteText);
+  
+  // 显示结果
+  setTimeout(() => {
+    showResults(finalData);
+  }, 500);
+}
+
+// 把推送过来的简介填入对应资源（按resource_id），已显示时刷新列表
+function applySummaryUpdate(finalData, update) {
+  if (!finalData || !finalData.recommended_resources || !update.summary) return;
+  const resources = finalData.recommended_resources[update.resource_type] || [];
+  const resource = resources.find(r => r.resource_id === update.resource_id);
+  if (!resource) return;
+  resource.summary = update.summary;
+  resource.summary_type = update.summary_type;
+  // showResults 之后 allRecommendedResources 与 finalData.recommended_resources 是同一个对象；
+  // 短时间内到达的多条简介合并为一次刷新
+  if (allRecommendedResources === finalData.recommended_resources && !summaryRefreshScheduled) {
+    summaryRefreshScheduled = true;
+    setTimeout(() => {
+      summaryRefreshScheduled = false;
+      updateResourceDisplay();
+    }, 200);
+  }
+}
+let summaryRefreshScheduled = false;
+
 // 添加终端输出行
 function addTerminalLine(text, type = 'info') {
   const line = document.createElement('div');
@@ -11,7 +11,7 @@
 import os
 import sys
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 
 def project_root() -> str:
@@ -103,42 +103,1566 @@ def test_keyword_extractor() -> Dict[str, Any]:
     }
 
 
+def test_noise_filter() -> Dict[str, Any]:
+    """
+    关键词候选噪声过滤：批量版本（filter_noise_phrases / normalize_phrases）
+    与逐个判断版本（is_noise_phrase / normalize_phrase）结果必须完全一致，并对比耗时
+    """
+    import random
+    from backend.core import keyword_extractor as ke
+
+    # 构造覆盖各条规则的候选短语（网址、机构、地址、电话、页码、版权、缩写、重复词等）
+    rng = random.Random(42)
+    words = [
+        "machine", "learning", "neural", "network", "model", "data", "deep", "center", "mass",
+        "durham", "university", "department", "of", "school", "thought", "ac", "uk", "www", "http",
+        "ny", "usa", "newyork", "phone", "tel", "123", "2024", "chapter", "4", "section", "figure",
+        "page", "copyright", "rights", "reserved", "ai", "ml", "a", "b", "cid", "et", "al",
+        "proposed", "arxiv", "preprint", "doi", "org", "mit.edu", "x.ac.uk", "contact", "road",
+        "office", "world", "wide", "web", "vol", "12", "deep-learning", "e-mail", "@",
+    ]
+    separators = [" ", " ", " ", "  ", "\t", "-", ", "]
+    phrases = [
+        rng.choice(separators).join(rng.choice(words) for _ in range(rng.randint(0, 7)))
+        for _ in range(20000)
+    ]
+
+    start = time.perf_counter()
+    expected_keep = [not ke.is_noise_phrase(p) for p in phrases]
+    expected_norm = [ke.normalize_phrase(p) for p in phrases]
+    per_phrase_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    keep = ke.filter_noise_phrases(phrases)
+    norm = ke.normalize_phrases(phrases)
+    batch_time = time.perf_counter() - start
+
+    noise_mismatch = int((keep != expected_keep).sum())
+    norm_mismatch = sum(1 for a, b in zip(norm, expected_norm) if a != b)
+    return {
+        "module": "keyword_extractor.filter_noise_phrases",
+        "status": "ok" if noise_mismatch == 0 and norm_mismatch == 0 else "mismatch",
+        "num_phrases": len(phrases),
+        "noise_mismatch": noise_mismatch,
+        "normalize_mismatch": norm_mismatch,
+        "per_phrase_time": per_phrase_time,
+        "batch_time": batch_time,
+    }
+
+
+def _scalar_semantic_score(phrase: str) -> float:
+    """向量化之前的逐个打分实现（作为 compute_semantic_scores 的对照）"""
+    from backend.core import keyword_extractor as ke
+
+    phrase_lower = phrase.lower()
+    score = 0.0
+    for term, weight in ke.SEMANTIC_TERM_WEIGHTS:
+        if term in phrase_lower:
+            score += weight
+            break
+    if sum(1 for kw in ke.SEMANTIC_BONUS_KEYWORDS if kw in phrase_lower) >= 2:
+        score += 0.5
+    if ' ' in phrase:
+        score += 0.3
+    if 2 <= len(phrase.split()) <= 4:
+        score += 0.2
+    return score
+
+
+def test_semantic_scores() -> Dict[str, Any]:
+    """
+    语义打分和包含关系矩阵：批量版本（compute_semantic_scores / _term_indicator_matrix / filter_noise_phrases）
+    与逐个判断的旧实现结果必须完全一致（包括空短语、含换行的短语），并对比耗时
+    """
+    import random
+    import numpy as np
+    from backend.core import keyword_extractor as ke
+
+    rng = random.Random(7)
+    words = [t for t, _ in ke.SEMANTIC_TERM_WEIGHTS[::3]] + list(ke.SEMANTIC_BONUS_KEYWORDS) + [
+        "the", "of", "durham", "university", "www", "page", "12", "copyright", "Deep", "LEARNING", "AI",
+    ]
+    separators = [" ", " ", "  ", "\t", "-", "\n", ""]
+    phrases = [
+        rng.choice(separators).join(rng.choice(words) for _ in range(rng.randint(0, 5)))
+        for _ in range(20000)
+    ]
+
+    start = time.perf_counter()
+    expected_scores = np.array([_scalar_semantic_score(p) for p in phrases])
+    expected_keep = np.array([not ke.is_noise_phrase(p) for p in phrases])
+    per_phrase_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores = ke.compute_semantic_scores(phrases)
+    keep = ke.filter_noise_phrases(phrases)
+    batch_time = time.perf_counter() - start
+
+    lowered = [p.lower() for p in phrases]
+    indicator = ke._term_indicator_matrix(lowered, ke._SEMANTIC_PATTERNS)
+    expected_indicator = np.array([[t in p for t in ke._SEMANTIC_TABLE_TERMS] for p in lowered])
+
+    score_mismatch = int((~np.isclose(scores, expected_scores)).sum())
+    indicator_mismatch = int((indicator != expected_indicator).any(axis=1).sum())
+    noise_mismatch = int((keep != expected_keep).sum())
+    return {
+        "module": "keyword_extractor.compute_semantic_scores",
+        "status": "ok" if score_mismatch == indicator_mismatch == noise_mismatch == 0 else "mismatch",
+        "num_phrases": len(phrases),
+        "score_mismatch": score_mismatch,
+        "indicator_mismatch": indicator_mismatch,
+        "noise_mismatch": noise_mismatch,
+        "per_phrase_time": per_phrase_time,
+        "batch_time": batch_time,
+    }
+
+
+def test_idf_model() -> Dict[str, Any]:
+    """
+    背景IDF模型：build_idf_model → load_idf_model → lookup_doc_freq / compute_idf，
+    IDF与 scikit-learn 在"背景语料 + 当前文档"上 smooth_idf 的结果一致（包括背景语料中没有的新词），
+    版本或分词配置不一致的模型被拒绝加载；同时统计构建和查询耗时
+    """
+    import json
+    import random
+    import shutil
+    import tempfile
+    import numpy as np
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+    from backend.core import idf_model as im
+    from backend.core import keyword_extractor as ke
+
+    rng = random.Random(3)
+    words = ("reinforcement learning agent reward policy value gradient network state action "
+             "markov decision process bellman equation exploration exploitation bandit regret "
+             "temporal difference monte carlo sampling replay buffer target critic actor").split()
+    new_words = ["zebrafish", "quasar", "tokamak"]  # 只出现在当前任务文档中
+    bg_texts = [" ".join(rng.choice(words) for _ in range(rng.randint(30, 80))) for _ in range(40)]
+    job_texts = [" ".join(rng.choice(words + new_words) for _ in range(60)) for _ in range(5)]
+    analyzer = {**im.IDF_ANALYZER_CONFIG, "ngram_range": tuple(im.IDF_ANALYZER_CONFIG["ngram_range"])}
+
+    root = tempfile.mkdtemp(prefix="perf_idf_")
+    try:
+        corpus_dir = os.path.join(root, "corpus")
+        model_dir = os.path.join(root, "model")
+        os.makedirs(corpus_dir)
+        for i, text in enumerate(bg_texts):
+            with open(os.path.join(corpus_dir, f"doc{i}.txt"), "w", encoding="utf-8") as f:
+                f.write(text)
+
+        start = time.perf_counter()
+        meta = im.build_idf_model([corpus_dir], model_dir, min_doc_freq=1)
+        build_time = time.perf_counter() - start
+        model = im.load_idf_model(model_dir)
+
+        # 背景语料的文档频率
+        bg_counts = CountVectorizer(binary=True, **analyzer).fit([ke.basic_clean(t) for t in bg_texts])
+        bg_vocab = bg_counts.get_feature_names_out()
+        expected_bg_df = np.asarray(bg_counts.transform([ke.basic_clean(t) for t in bg_texts]).sum(axis=0)).ravel()
+        bg_df = im.lookup_doc_freq(model, im.hash_terms(bg_vocab))
+
+        # 当前任务的短语（含新词）：IDF与sklearn在合并语料上的smooth_idf一致
+        cleaned_job = [ke.basic_clean(t) for t in job_texts]
+        job_counts = CountVectorizer(binary=True, **analyzer).fit(cleaned_job)
+        job_vocab = job_counts.get_feature_names_out()
+        job_df = np.asarray(job_counts.transform(cleaned_job).sum(axis=0)).ravel()
+        start = time.perf_counter()
+        idf = im.compute_idf(model, im.hash_terms(job_vocab), job_df, len(job_texts))
+        idf_time = time.perf_counter() - start
+        reference = TfidfVectorizer(smooth_idf=True, **analyzer).fit(
+            [ke.basic_clean(t) for t in bg_texts] + cleaned_job)
+        expected_idf = reference.idf_[[reference.vocabulary_[t] for t in job_vocab]]
+
+        unseen = np.array([t for t in job_vocab if any(w in t.split() for w in new_words)])
+        unseen_df = im.lookup_doc_freq(model, im.hash_terms(unseen))
+
+        # 版本或分词配置不一致时拒绝加载
+        meta_path = os.path.join(model_dir, "meta.json")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            good_meta = json.load(f)
+        rejected = []
+        for bad_meta in ({**good_meta, "version": im.IDF_MODEL_VERSION + 1},
+                         {**good_meta, "analyzer": {**im.IDF_ANALYZER_CONFIG, "ngram_range": [1, 2]}}):
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(bad_meta, f)
+            rejected.append(im.load_idf_model(model_dir) is None)
+        rejected.append(im.load_idf_model(os.path.join(root, "missing")) is None)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    ok = (
+        meta["n_docs"] == len(bg_texts)
+        and model is not None
+        and np.array_equal(bg_df, expected_bg_df)
+        and np.allclose(idf, expected_idf)
+        and len(unseen) > 0 and not unseen_df.any()
+        and all(rejected)
+    )
+    return {
+        "module": "idf_model.compute_idf",
+        "status": "ok" if ok else "mismatch",
+        "n_docs": meta["n_docs"],
+        "n_terms": meta["n_terms"],
+        "n_unseen_terms": len(unseen),
+        "max_idf_error": float(np.abs(idf - expected_idf).max()),
+        "build_time": build_time,
+        "idf_time": idf_time,
+    }
+
+
+def test_keyword_chunking() -> Dict[str, Any]:
+    """
+    长文档分块：超过 KEYWORD_CHUNK_WORDS 个词的文档切分为多块分别登记，
+    得分经 file_aggregation_matrix 按原始文件取平均；短文档只有一块，
+    矩阵与不分块时 build_vectorizer().fit_transform 的结果一致
+    """
+    import math
+    import random
+    import hashlib
+    import numpy as np
+    from backend.core import keyword_extractor as ke
+
+    rng = random.Random(5)
+    words = ("reinforcement learning agent reward policy value gradient network state action "
+             "markov decision process bellman equation exploration exploitation bandit regret").split()
+    n_long_words = int(ke.KEYWORD_CHUNK_WORDS * 2.5)
+    long_text = " ".join(rng.choice(words) for _ in range(n_long_words)).encode("utf-8")
+    short_texts = [" ".join(rng.choice(words) for _ in range(200)).encode("utf-8") for _ in range(4)]
+
+    # 切分：块数、每块词数，拼接后不丢词
+    cleaned_long = ke.basic_clean(long_text.decode("utf-8"))
+    chunks = list(ke.iter_text_chunks(cleaned_long))
+    chunks_ok = (
+        len(chunks) == math.ceil(len(cleaned_long.split()) / ke.KEYWORD_CHUNK_WORDS)
+        and all(len(c.split()) <= ke.KEYWORD_CHUNK_WORDS for c in chunks)
+        and " ".join(chunks).split() == cleaned_long.split()
+        and all(list(ke.iter_text_chunks(ke.basic_clean(t.decode("utf-8")))) == [ke.basic_clean(t.decode("utf-8"))]
+                for t in short_texts)
+    )
+
+    # 登记到状态：长文档按块登记，短文档的键即内容哈希
+    documents = [("long.txt", long_text)] + [(f"short{i}.txt", t) for i, t in enumerate(short_texts)]
+    state = ke.new_keyword_state()
+    start = time.perf_counter()
+    file_chunks = ke.load_documents_into_state(documents, state)
+    load_time = time.perf_counter() - start
+    long_hash = hashlib.sha256(long_text).hexdigest()
+    keys_ok = (
+        file_chunks[0] == [ke.chunk_key(long_hash, i) for i in range(len(chunks))]
+        and all(keys == [hashlib.sha256(t).hexdigest()] for keys, t in zip(file_chunks[1:], short_texts))
+    )
+
+    # 按文件聚合：长文档一行为各块的平均，短文档的行不变
+    doc_hashes = [key for keys in file_chunks for key in keys]
+    X, _, _ = ke.build_tfidf_from_state(state, doc_hashes)
+    X_files = (ke.file_aggregation_matrix(file_chunks) @ X).toarray()
+    dense = X.toarray()
+    aggregation_ok = (
+        X_files.shape == (len(documents), X.shape[1])
+        and np.allclose(X_files[0], dense[:len(chunks)].mean(axis=0))
+        and np.allclose(X_files[1:], dense[len(chunks):])
+    )
+
+    # 只有短文档时与不分块的向量化结果一致
+    short_state = ke.new_keyword_state()
+    short_chunks = ke.load_documents_into_state(documents[1:], short_state)
+    X_short, vocab_short, _ = ke.build_tfidf_from_state(short_state, [k for keys in short_chunks for k in keys])
+    vectorizer = ke.build_vectorizer()
+    X_ref = vectorizer.fit_transform([ke.basic_clean(t.decode("utf-8")) for t in short_texts])
+    short_ok = (
+        all(len(keys) == 1 for keys in short_chunks)
+        and list(vocab_short) == list(vectorizer.get_feature_names_out())
+        and np.allclose(X_short.toarray(), X_ref.toarray())
+    )
+
+    return {
+        "module": "keyword_extractor.file_aggregation_matrix",
+        "status": "ok" if chunks_ok and keys_ok and aggregation_ok and short_ok else "mismatch",
+        "long_doc_words": n_long_words,
+        "num_chunks": len(chunks),
+        "chunks_ok": chunks_ok,
+        "keys_ok": keys_ok,
+        "aggregation_ok": aggregation_ok,
+        "short_ok": short_ok,
+        "load_time": load_time,
+    }
+
+
+def test_incremental_keywords() -> Dict[str, Any]:
+    """
+    增量关键词状态：同一语料重跑、追加文件、删除文件三种情况下，
+    由状态组装的TF-IDF矩阵与重新 fit_transform 的结果一致，Top-10关键词与不用状态时完全相同
+    """
+    import random
+    import shutil
+    import tempfile
+    import numpy as np
+    from backend.core import keyword_extractor as ke
+
+    rng = random.Random(11)
+    topics = [
+        "reinforcement learning policy gradient reward function value network".split(),
+        "markov decision process bellman equation dynamic programming".split(),
+        "exploration exploitation multi armed bandit regret bound".split(),
+        "temporal difference learning monte carlo sampling replay buffer".split(),
+        "actor critic architecture target network soft update".split(),
+        "deep neural network convolutional layer training accuracy".split(),
+        "inverse reinforcement learning expert demonstration imitation".split(),
+    ]
+    common = "the agent learns from experience in the environment and improves its behaviour".split()
+
+    def make_doc(i):
+        vocab = topics[i % len(topics)] + topics[(i + 1) % len(topics)] + common
+        return (f"doc{i}.txt", " ".join(rng.choice(vocab) for _ in range(400)).encode("utf-8"))
+
+    docs = [make_doc(i) for i in range(6)]
+    appended = docs + [make_doc(6)]
+    cases = [
+        ("first_run", docs),
+        ("rerun", docs),
+        ("appended", appended),
+        ("removed", appended[:2] + appended[3:]),
+    ]
+
+    root = tempfile.mkdtemp(prefix="perf_incremental_")
+    state_path = os.path.join(root, "state.pkl")
+    results = {}
+    try:
+        for name, corpus in cases:
+            start = time.perf_counter()
+            incremental = ke.extract_keywords_from_folder("", top_k=10, documents=corpus, state_path=state_path)
+            incremental_time = time.perf_counter() - start
+            start = time.perf_counter()
+            fresh = ke.extract_keywords_from_folder("", top_k=10, documents=corpus)
+            fresh_time = time.perf_counter() - start
+
+            state = ke.load_keyword_state(state_path)
+            X, vocab, _ = ke.build_tfidf_from_state(state, state["members"])
+            vectorizer = ke.build_vectorizer()
+            X_ref = vectorizer.fit_transform([ke.basic_clean(data.decode("utf-8")) for _, data in corpus])
+            matrix_ok = (
+                list(vocab) == list(vectorizer.get_feature_names_out())
+                and X.shape == X_ref.shape
+                and np.allclose(X.toarray(), X_ref.toarray())
+            )
+            results[name] = {
+                "matrix_ok": matrix_ok,
+                "top10_ok": incremental == fresh and len(incremental) > 0,
+                "incremental_time": incremental_time,
+                "fresh_time": fresh_time,
+            }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    ok = all(r["matrix_ok"] and r["top10_ok"] for r in results.values())
+    return {
+        "module": "keyword_extractor.incremental_state",
+        "status": "ok" if ok else "mismatch",
+        **{f"{name}_{key}": value for name, r in results.items() for key, value in r.items()},
+    }
+
+
 def test_recommender() -> Dict[str, Any]:
     """
-    示例：对 recommender 进行简单性能测试
-    TODO:
-    - 提供一批伪造/真实的资源字典列表
-    - 控制候选资源数量和用户文档数量
+    对 recommender 的相似度计算进行性能测试：
+    三种资源类型共用一次向量化（compute_similarity_by_type）与逐类型调用 compute_similarity 对比
     """
     from backend.core import recommender as rec
 
-    # 简单构造一些假数据作为示例
+    # 构造一些假数据
     user_docs = [
-        "This is a short example document about machine learning and neural networks."
-    ] * 5  # 5 个用户文档
+        f"Chapter {i} of a book about machine learning, neural networks and gradient descent optimization. " * 200
+        for i in range(5)
+    ]  # 5 个用户文档
+
+    topics = ["deep learning", "transformers", "reinforcement learning", "support vector machines", "cooking"]
+    all_resources = {
+        "txt": [{"title": f"Paper {i}", "content": f"This paper {i} is about {topics[i % 5]} and neural networks. " * 20}
+                for i in range(100)],
+        "video": [{"title": f"Video {i}", "description": f"A lecture on {topics[i % 5]}."} for i in range(100)],
+        "code": [{"title": f"Repo {i}", "description": f"Implementation of {topics[i % 5]} in Python."} for i in range(100)],
+    }
+
+    def _run_per_type():
+        return {t: rec.compute_similarity(user_docs, res, t) for t, res in all_resources.items()}
+
+    def _run_fit_once():
+        return rec.compute_similarity_by_type(user_docs, all_resources)
 
+    # 大候选池下的 Top-K 选择：argpartition 与完整排序对比
+    import numpy as np
+    pool_scores = np.random.default_rng(0).random(100000)
+
+    def _run_full_sort():
+        return sorted(enumerate(pool_scores), key=lambda x: x[1], reverse=True)[:40]
+
+    def _run_top_k():
+        return rec.top_k_indices(pool_scores, 40)
+
+    per_type_stats = time_function(_run_per_type, repeat=5)
+    fit_once_stats = time_function(_run_fit_once, repeat=5)
+    full_sort_stats = time_function(_run_full_sort, repeat=5)
+    top_k_stats = time_function(_run_top_k, repeat=5)
+    same_top_k = [i for i, _ in _run_full_sort()] == _run_top_k().tolist()
+    return {
+        "module": "recommender",
+        "status": "ok",
+        "num_user_docs": len(user_docs),
+        "num_resources": sum(len(r) for r in all_resources.values()),
+        "per_type_avg_time": per_type_stats["avg_time"],
+        "top_k_pool_size": len(pool_scores),
+        "full_sort_avg_time": full_sort_stats["avg_time"],
+        "top_k_avg_time": top_k_stats["avg_time"],
+        "top_k_matches_sort": same_top_k,
+        **fit_once_stats,
+    }
+
+
+def start_stub_completion_server(reply, delay: float = 0.2):
+    """
+    启动本地的 chat-completions 桩服务器（代替 OpenAI API），在后台线程中运行
+
+    Args:
+        reply: 函数，参数为请求体（dict），返回助手消息文本
+        delay: 每个请求的模拟延迟（秒）
+
+    Returns:
+        (server, base_url)，用完后调用 server.shutdown()
+    """
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            time.sleep(delay)
+            payload = json.dumps({
+                "id": "stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply(body)},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def test_ai_summarizer() -> Dict[str, Any]:
+    """
+    批量并发摘要（generate_resource_summaries）与逐个串行调用对比，
+    使用本地桩服务器代替 OpenAI API（每个请求模拟 0.2 秒延迟）
+    """
+    import re
+    from backend.core import ai_summarizer as ai
+
+    def reply(body):
+        # 回显提示词中的标题，用于检查结果顺序
+        title = re.search(r"标题: (.*)", body["messages"][-1]["content"]).group(1)
+        return f"这是关于{title}的资源。"
+
+    server, base_url = start_stub_completion_server(reply, delay=0.2)
+    try:
+        resources = [
+            {"title": f"Resource {i}", "description": f"A lecture about topic {i}.", "url": f"https://example.com/{i}"}
+            for i in range(20)
+        ]
+        client = ai.create_openai_client("stub-key", base_url=base_url)
+
+        start = time.perf_counter()
+        sequential = [ai.generate_resource_summary(res, "video", client=client) for res in resources]
+        sequential_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = ai.generate_resource_summaries(resources, "video", openai_api_key="stub-key", base_url=base_url,
+                                               max_concurrency=8, requests_per_second=50)
+        batch_time = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    in_order = all(
+        r["summary"] == f"这是关于{res['title']}的资源。" for res, r in zip(resources, batch)
+    )
+    return {
+        "module": "ai_summarizer.generate_resource_summaries",
+        "status": "ok" if in_order and batch == sequential else "mismatch",
+        "num_resources": len(resources),
+        "sequential_time": sequential_time,
+        "batch_time": batch_time,
+    }
+
+
+def test_summary_cache() -> Dict[str, Any]:
+    """
+    摘要磁盘缓存：第二次为相同资源生成摘要时应全部命中缓存、不再请求API；
+    并检查超过大小上限时按LRU淘汰
+    """
+    import tempfile
+    from backend.core import ai_summarizer as ai
+
+    requests_seen = []
+
+    def reply(body):
+        requests_seen.append(1)
+        return "缓存测试摘要。"
+
+    server, base_url = start_stub_completion_server(reply, delay=0.1)
+    cache_dir = tempfile.mkdtemp(prefix="summary_cache_")
+    try:
+        ai.configure_summary_cache(cache_dir)
+        resources = [
+            {"title": f"Repo {i}", "description": f"Code for topic {i}.", "url": f"https://example.com/repo/{i}"}
+            for i in range(20)
+        ]
+
+        start = time.perf_counter()
+        cold = ai.generate_resource_summaries(resources, "code", openai_api_key="stub-key", base_url=base_url)
+        cold_time = time.perf_counter() - start
+        cold_requests = len(requests_seen)
+
+        start = time.perf_counter()
+        warm = ai.generate_resource_summaries(resources, "code", openai_api_key="stub-key", base_url=base_url)
+        warm_time = time.perf_counter() - start
+        warm_requests = len(requests_seen) - cold_requests
+
+        # 重复写入同一条目后，记录的缓存总大小应与磁盘上的实际大小一致
+        for _ in range(5):
+            ai.store_cached_summary(ai.summary_cache_key(resources[0]["url"], "code"), cold[0])
+        size_consistent = ai._SUMMARY_CACHE["size"] == sum(size for _, _, size in ai._scan_summary_cache())
+
+        # 把上限设为很小，写入一条新摘要后应淘汰旧条目
+        ai.configure_summary_cache(cache_dir, max_bytes=1024)
+        ai.store_cached_summary(ai.summary_cache_key("https://example.com/new", "code"), cold[0])
+        remaining = sum(len(files) for _, _, files in os.walk(cache_dir))
+    finally:
+        server.shutdown()
+        ai.configure_summary_cache(None)
+        import shutil
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    return {
+        "module": "ai_summarizer.summary_cache",
+        "status": "ok" if warm == cold and warm_requests == 0 and size_consistent and remaining < len(resources) else "mismatch",
+        "num_resources": len(resources),
+        "cold_requests": cold_requests,
+        "warm_requests": warm_requests,
+        "cold_time": cold_time,
+        "warm_time": warm_time,
+        "entries_after_eviction": remaining,
+    }
+
+
+def test_packed_summaries() -> Dict[str, Any]:
+    """
+    打包模式（pack_size>1）：本地桩服务器按打包提示词返回JSON，故意漏掉部分资源，
+    检查逐条回退、结果顺序，以及请求次数相对逐个请求的减少；
+    另外让部分打包请求整体失败，检查这些包中的资源逐个回退
+    """
+    import re
+    import json
+    from backend.core import ai_summarizer as ai
+
+    request_count = [0]
+
+    def reply(body):
+        request_count[0] += 1
+        prompt = body["messages"][-1]["content"]
+        titles = re.findall(r"标题: (.*)", prompt)
+        if "资源 1\n" not in prompt:
+            # 单个资源的请求（打包结果缺失时的回退）
+            return f"这是关于{titles[0]}的资源。"
+        # 打包请求：故意漏掉标题以 7 结尾的资源，模拟模型输出不完整
+        return json.dumps({"summaries": [
+            {"id": i, "summary": f"这是关于{title}的资源。"}
+            for i, title in enumerate(titles, 1) if not title.endswith("7")
+        ]}, ensure_ascii=False)
+
+    server, base_url = start_stub_completion_server(reply, delay=0.2)
+    try:
+        resources = [
+            {"title": f"Video {i}", "description": f"A lecture about topic {i}.", "url": f"https://example.com/v/{i}"}
+            for i in range(20)
+        ]
+        kwargs = dict(openai_api_key="stub-key", base_url=base_url, max_concurrency=8, requests_per_second=50)
+
+        start = time.perf_counter()
+        single = ai.generate_resource_summaries(resources, "video", **kwargs)
+        single_time = time.perf_counter() - start
+        single_requests = request_count[0]
+
+        start = time.perf_counter()
+        packed = ai.generate_resource_summaries(resources, "video", pack_size=5, **kwargs)
+        packed_time = time.perf_counter() - start
+        packed_requests = request_count[0] - single_requests
+
+        # 包含 Video 1 的打包请求整体失败（返回None）
+        packed_call = ai.generate_summaries_packed
+
+        def flaky_packed(requests, *args, **kw):
+            if any(request["title"] == "Video 1" for request in requests):
+                return None
+            return packed_call(requests, *args, **kw)
+
+        ai.generate_summaries_packed = flaky_packed
+        try:
+            failed_pack = ai.generate_resource_summaries(resources, "video", pack_size=5, **kwargs)
+        finally:
+            ai.generate_summaries_packed = packed_call
+    finally:
+        server.shutdown()
+
+    return {
+        "module": "ai_summarizer.packed",
+        "status": "ok" if packed == single and failed_pack == single else "mismatch",
+        "num_resources": len(resources),
+        "single_requests": single_requests,
+        "packed_requests": packed_requests,
+        "single_time": single_time,
+        "packed_time": packed_time,
+    }
+
+
+def test_extractive_summaries() -> Dict[str, Any]:
+    """
+    本地抽取式摘要：以 "extractive" 策略为一批资源生成摘要（不调用API），统计耗时
+    """
+    from backend.core import ai_summarizer as ai
+
+    sentences = [
+        "Reinforcement learning trains agents to maximize cumulative reward.",
+        "Q-learning estimates action values without a model of the environment.",
+        "Policy gradient methods optimize the policy directly with gradient ascent.",
+        "Deep networks approximate value functions for large state spaces.",
+        "Exploration strategies balance trying new actions against exploiting known ones.",
+    ]
     resources = [
         {
             "title": f"Resource {i}",
-            "content": f"This is resource {i} about deep learning and transformers.",
+            "content": " ".join(sentences[(i + j) % len(sentences)] for j in range(40)),
+            "description": " ".join(sentences[(i + j) % len(sentences)] for j in range(4)),
+            "url": f"https://example.com/r/{i}",
         }
-        for i in range(100)
+        for i in range(60)
     ]
+    types = ["txt", "video", "code"] * 20
+    strategies = {"txt": "extractive", "video": "extractive", "code": "extractive"}
 
-    def _run_recommend():
-        _ = rec.recommend_best_resources(
-            user_docs=user_docs,
-            resources=resources,
-            top_k=10,
-        )
+    timing = time_function(ai.generate_resource_summaries, resources, types, strategies=strategies)
+    results = ai.generate_resource_summaries(resources, types, strategies=strategies)
+    extractive = sum(1 for r in results if r.get("summary_type") == "extractive")
 
-    stats = time_function(_run_recommend, repeat=5)
     return {
-        "module": "recommender",
-        "status": "ok",
-        "num_user_docs": len(user_docs),
+        "module": "ai_summarizer.extractive",
+        "status": "ok" if extractive == len(resources) else "mismatch",
         "num_resources": len(resources),
-        **stats,
+        "extractive_summaries": extractive,
+        "avg_time": timing["avg_time"],
+        "per_resource_ms": timing["avg_time"] / len(resources) * 1000,
+    }
+
+
+def write_test_pdf(path: str, pages: List[List[str]]) -> None:
+    """写出一个最简单的文本PDF（Helvetica字体，每页若干行），用于PDF转换的性能测试"""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages))), len(pages)),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, lines in enumerate(pages):
+        stream = "BT /F1 10 Tf 40 800 Td 12 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def make_test_pdf_folder(folder: str, num_pdfs: int = 6, num_pages: int = 10) -> None:
+    """生成若干测试PDF，外加一个损坏的PDF"""
+    import random
+
+    words = "reinforcement learning agent reward policy value gradient network state action".split()
+    rnd = random.Random(0)
+    os.makedirs(folder, exist_ok=True)
+    for d in range(num_pdfs):
+        pages = [[" ".join(rnd.choice(words) for _ in range(12)) for _ in range(50)] for _ in range(num_pages)]
+        write_test_pdf(os.path.join(folder, f"doc{d}.pdf"), pages)
+    with open(os.path.join(folder, "broken.pdf"), "wb") as f:
+        f.write(b"%PDF-1.4 broken")
+
+
+def test_pdf_conversion() -> Dict[str, Any]:
+    """
+    PDF转换：当前进程逐个转换 vs 子进程池（带超时和内存上限），比较耗时和结果
+    """
+    import glob
+    import shutil
+    import tempfile
+    from backend.utils import file_utils
+
+    folder = tempfile.mkdtemp(prefix="perf_pdf_")
+    try:
+        make_test_pdf_folder(folder)
+
+        def run(**kwargs):
+            for txt in glob.glob(os.path.join(folder, "*_pdf.txt")):
+                os.remove(txt)
+            start = time.perf_counter()
+            result = file_utils.convert_all_pdfs_to_txt(folder, **kwargs)
+            return result, time.perf_counter() - start
+
+        # 不设超时和内存上限时才在当前进程中转换
+        sequential, sequential_time = run(workers=0, timeout=0, max_memory_mb=0)
+        pooled, pooled_time = run(workers=None)
+        # 只有一个转换进程时也有超时保护
+        timed_out, _ = run(workers=1, timeout=0.01)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    return {
+        "module": "file_utils.convert_all_pdfs_to_txt",
+        "status": "ok" if sequential == pooled and timed_out["success_count"] == 0 else "mismatch",
+        "cpu_count": file_utils._available_cpus(),
+        "success_count": pooled["success_count"],
+        "failed_count": pooled["failed_count"],
+        "sequential_time": sequential_time,
+        "pooled_time": pooled_time,
+    }
+
+
+def test_pdf_streaming() -> Dict[str, Any]:
+    """
+    PDF逐页提取：按文件选择提取方式（PyPDF2试提取合格则不用pdfplumber） vs 一律pdfplumber，
+    以及页数上限对耗时和输出大小的影响
+    """
+    import shutil
+    import tempfile
+    from backend.utils import file_utils
+
+    folder = tempfile.mkdtemp(prefix="perf_pdf_stream_")
+    try:
+        pdf_path = os.path.join(folder, "book.pdf")
+        make_test_pdf_folder(folder, num_pdfs=1, num_pages=40)
+        os.replace(os.path.join(folder, "doc0.pdf"), pdf_path)
+
+        def run(**kwargs):
+            out = os.path.join(folder, "out.txt")
+            start = time.perf_counter()
+            file_utils.convert_pdf_to_txt(pdf_path, out, **kwargs)
+            elapsed = time.perf_counter() - start
+            with open(out, encoding="utf-8") as f:
+                return f.read(), elapsed
+
+        auto_text, auto_time = run()
+        capped_text, capped_time = run(max_pages=5)
+        original_min_chars = file_utils.PDF_PROBE_MIN_CHARS
+        file_utils.PDF_PROBE_MIN_CHARS = float("inf")  # 让试提取不合格，强制使用pdfplumber
+        try:
+            plumber_text, plumber_time = run()
+        finally:
+            file_utils.PDF_PROBE_MIN_CHARS = original_min_chars
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    return {
+        "module": "file_utils.convert_pdf_to_txt",
+        "status": "ok" if auto_text.split() == plumber_text.split() and len(capped_text) < len(auto_text) else "mismatch",
+        "pdfplumber_time": plumber_time,
+        "auto_time": auto_time,
+        "capped_time": capped_time,
+        "full_chars": len(auto_text),
+        "capped_chars": len(capped_text),
+    }
+
+
+def test_pdf_cache() -> Dict[str, Any]:
+    """
+    PDF转换缓存：第一次上传转换并写入缓存，第二次上传（另一个目录、内容相同）直接链接缓存结果；
+    同一批中内容相同的PDF只转换一次
+    """
+    import glob
+    import shutil
+    import tempfile
+    from backend.utils import file_utils
+
+    root = tempfile.mkdtemp(prefix="perf_pdf_cache_")
+    try:
+        first, second = os.path.join(root, "first"), os.path.join(root, "second")
+        make_test_pdf_folder(first, num_pdfs=6, num_pages=10)
+        shutil.copytree(first, second)
+        shutil.copyfile(os.path.join(second, "doc0.pdf"), os.path.join(second, "doc0_copy.pdf"))
+        file_utils.configure_pdf_cache(os.path.join(root, "cache"), max_bytes=100 * 1024 * 1024)
+
+        start = time.perf_counter()
+        cold = file_utils.convert_all_pdfs_to_txt(first, workers=0)
+        cold_time = time.perf_counter() - start
+        start = time.perf_counter()
+        warm = file_utils.convert_all_pdfs_to_txt(second, workers=0)
+        warm_time = time.perf_counter() - start
+
+        def texts(folder):
+            result = {}
+            for path in glob.glob(os.path.join(folder, "*_pdf.txt")):
+                with open(path, encoding="utf-8") as f:
+                    result[os.path.basename(path)] = f.read()
+            return result
+
+        first_texts, second_texts = texts(first), texts(second)
+        same = all(second_texts[name] == text for name, text in first_texts.items())
+        same = same and second_texts.get("doc0_copy_pdf.txt") == first_texts.get("doc0_pdf.txt")
+    finally:
+        file_utils.configure_pdf_cache(None)
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "module": "file_utils.pdf_cache",
+        "status": "ok" if same and warm["success_count"] == cold["success_count"] + 1 else "mismatch",
+        "num_pdfs": cold["success_count"] + cold["failed_count"],
+        "cold_time": cold_time,
+        "warm_time": warm_time,
+    }
+
+
+def test_zip_ingestion() -> Dict[str, Any]:
+    """
+    上传处理：解压 + 多次遍历目录 + 转换PDF + 读取txt，对比直接从zip建立语料清单并流式读取文档，
+    检查两条路径读到的文档一致
+    """
+    import shutil
+    import zipfile
+    import tempfile
+    from backend.utils import file_utils
+
+    root = tempfile.mkdtemp(prefix="perf_zip_")
+    try:
+        src = os.path.join(root, "src")
+        make_test_pdf_folder(src, num_pdfs=2, num_pages=5)
+        for i in range(200):
+            with open(os.path.join(src, f"ch{i:03d}.txt"), "w", encoding="utf-8") as f:
+                f.write(f"Chapter {i} reinforcement learning policy gradient value function. " * 200)
+        zip_path = os.path.join(root, "upload.zip")
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name in sorted(os.listdir(src)):
+                zf.write(os.path.join(src, name), f"book/{name}")
+
+        def extracted_path():
+            from backend.core.keyword_extractor import list_txt_paths
+
+            extract_path = os.path.join(root, "extracted")
+            file_utils.extract_zip(zip_path, extract_path)
+            file_utils.count_pdf_files(extract_path)
+            file_utils.count_txt_files(extract_path)
+            file_utils.convert_all_pdfs_to_txt(extract_path, workers=0)
+            docs = []
+            for path in list_txt_paths(extract_path):
+                with open(path, "rb") as f:
+                    docs.append(f.read())
+            return sorted(docs)
+
+        def zip_native():
+            corpus = file_utils.ingest_zip(zip_path, os.path.join(root, "converted"), workers=0)
+            return sorted(data for _, data in file_utils.iter_corpus_documents(corpus))
+
+        start = time.perf_counter()
+        extracted_docs = extracted_path()
+        extracted_time = time.perf_counter() - start
+        start = time.perf_counter()
+        zip_docs = zip_native()
+        zip_time = time.perf_counter() - start
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "module": "file_utils.ingest_zip",
+        "status": "ok" if extracted_docs == zip_docs else "mismatch",
+        "num_documents": len(zip_docs),
+        "extract_time": extracted_time,
+        "zip_native_time": zip_time,
+    }
+
+
+def test_folder_index() -> Dict[str, Any]:
+    """
+    文件夹索引：一次 os.scandir 遍历分类文件，各个计数/取路径/读取函数的结果与实际文件一致（跳过系统隐藏文件）
+    """
+    import shutil
+    import tempfile
+    from backend.utils import file_utils
+    from backend.core.keyword_extractor import list_txt_paths
+    from backend.core.recommender import read_txt_files
+
+    root = tempfile.mkdtemp(prefix="perf_index_")
+    try:
+        for d in range(20):
+            sub = os.path.join(root, f"part{d}", "chapters")
+            os.makedirs(sub)
+            for i in range(100):
+                with open(os.path.join(sub, f"ch{i}.txt"), "w", encoding="utf-8") as f:
+                    f.write("reinforcement learning " * 20)
+                with open(os.path.join(sub, f"._ch{i}.txt"), "w") as f:
+                    f.write("x")
+            with open(os.path.join(sub, "slides.pdf"), "wb") as f:
+                f.write(b"%PDF-1.4")
+
+        lookups = (
+            file_utils.count_pdf_files(root),
+            file_utils.count_txt_files(root),
+            file_utils.count_all_txt_files_after_conversion(root),
+            len(file_utils.get_txt_file_paths(root)),
+            len(file_utils.get_pdf_file_paths(root)),
+            len(list_txt_paths(root)),
+            len(read_txt_files(root)),
+        )
+        index_stats = time_function(file_utils.build_folder_index, root)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "module": "file_utils.build_folder_index",
+        "status": "ok" if lookups == (20, 2020, 2000, 2000, 20, 2000, 2000) else "mismatch",
+        "num_files": 4020,
+        "index_time": index_stats["avg_time"],
+    }
+
+
+def test_upload_stream() -> Dict[str, Any]:
+    """
+    上传保存：Werkzeug表单解析 + FileStorage.save（先写临时文件再复制） vs 流式保存并同时计算哈希，
+    比较耗时和Python堆内存峰值
+    """
+    import hashlib
+    import shutil
+    import tempfile
+    import tracemalloc
+    from werkzeug.formparser import parse_form_data
+    from backend.utils import file_utils
+
+    root = tempfile.mkdtemp(prefix="perf_upload_")
+    try:
+        boundary = "perfboundary"
+        body_path = os.path.join(root, "body.bin")
+        payload = os.urandom(1024 * 1024)
+        digest = hashlib.sha256()
+        with open(body_path, "wb") as f:
+            f.write((f"--{boundary}\r\nContent-Disposition: form-data; name=\"folder\"; filename=\"big.zip\"\r\n"
+                     "Content-Type: application/zip\r\n\r\n").encode())
+            for _ in range(50):
+                f.write(payload)
+                digest.update(payload)
+            f.write(f"\r\n--{boundary}--\r\n".encode())
+        content_type = f"multipart/form-data; boundary={boundary}"
+
+        def werkzeug_save():
+            with open(body_path, "rb") as body:
+                environ = {"REQUEST_METHOD": "POST", "CONTENT_TYPE": content_type, "wsgi.input": body,
+                           "CONTENT_LENGTH": str(os.path.getsize(body_path))}
+                _, _, files = parse_form_data(environ)
+                files["folder"].save(os.path.join(root, "werkzeug.zip"))
+
+        def stream_save():
+            with open(body_path, "rb") as body:
+                return file_utils.save_upload_stream(body, content_type, root)
+
+        def measure(fn):
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return result, elapsed, peak
+
+        _, werkzeug_time, werkzeug_peak = measure(werkzeug_save)
+        upload, stream_time, stream_peak = measure(stream_save)
+        ok = upload["sha256"] == digest.hexdigest() and upload["size"] == 50 * len(payload)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "module": "file_utils.save_upload_stream",
+        "status": "ok" if ok else "mismatch",
+        "upload_mb": 50,
+        "werkzeug_time": werkzeug_time,
+        "stream_time": stream_time,
+        "werkzeug_peak_mb": werkzeug_peak / 1e6,
+        "stream_peak_mb": stream_peak / 1e6,
+    }
+
+
+def test_zip_download() -> Dict[str, Any]:
+    """
+    结果下载：先用 create_output_zip 写出完整zip再发送 vs iter_zip_stream 边打包边发送，
+    比较首字节时间和总耗时，并检查生成的zip内容一致
+    """
+    import io
+    import shutil
+    import zipfile
+    import tempfile
+    from backend.utils import file_utils
+
+    root = tempfile.mkdtemp(prefix="perf_download_")
+    try:
+        folder = os.path.join(root, "output")
+        for resource_type in ("txt", "video", "code"):
+            os.makedirs(os.path.join(folder, resource_type))
+            for i in range(300):
+                with open(os.path.join(folder, resource_type, f"resource_{i}.txt"), "w", encoding="utf-8") as f:
+                    f.write(f"标题: Resource {i}\nURL: https://example.com/{i}\n" + "content " * 300)
+
+        def build_then_send():
+            start = time.perf_counter()
+            zip_path = os.path.join(root, "recommended.zip")
+            file_utils.create_output_zip(folder, zip_path)
+            with open(zip_path, "rb") as f:
+                first = f.read(64 * 1024)
+                first_byte = time.perf_counter() - start
+                data = first + f.read()
+            os.remove(zip_path)
+            return data, first_byte, time.perf_counter() - start
+
+        def stream(compression):
+            start = time.perf_counter()
+            chunks = file_utils.iter_zip_stream(folder, compression=compression)
+            first = next(chunks)
+            first_byte = time.perf_counter() - start
+            data = first + b"".join(chunks)
+            return data, first_byte, time.perf_counter() - start
+
+        def contents(data):
+            with zipfile.ZipFile(io.BytesIO(data)) as zf:
+                return {name: zf.read(name) for name in zf.namelist()}
+
+        disk_data, disk_first, disk_total = build_then_send()
+        deflated_data, deflated_first, deflated_total = stream(zipfile.ZIP_DEFLATED)
+        stored_data, stored_first, stored_total = stream(zipfile.ZIP_STORED)
+        same = contents(disk_data) == contents(deflated_data) == contents(stored_data)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "module": "file_utils.iter_zip_stream",
+        "status": "ok" if same else "mismatch",
+        "disk_first_byte": disk_first,
+        "disk_total": disk_total,
+        "deflated_first_byte": deflated_first,
+        "deflated_total": deflated_total,
+        "stored_first_byte": stored_first,
+        "stored_total": stored_total,
+        "stored_mb": len(stored_data) / 1e6,
+        "deflated_mb": len(deflated_data) / 1e6,
+    }
+
+
+def test_job_results() -> Dict[str, Any]:
+    """
+    任务结果保存：每个资源写一个txt文件（save_recommended_resources）vs 写一个JSON Lines结果文件，
+    并检查下载时由结果文件生成的zip与按文件打包的zip内容一致
+    """
+    import io
+    import shutil
+    import zipfile
+    import tempfile
+    from backend.utils import file_utils
+    from backend.core.recommender import save_recommended_resources, render_recommended_resources
+
+    recommended = {
+        "txt": [{"title": f"Resource {i}", "url": f"https://example.com/{i}", "source": "web",
+                 "content": "content " * 300, "similarity_score": 0.5} for i in range(100)],
+        "video": [{"title": f"Video {i}", "url": f"https://youtube.com/{i}", "description": "desc",
+                   "similarity_score": 0.3} for i in range(100)],
+        "code": [{"title": f"repo-{i}", "url": f"https://github.com/{i}", "source": "GitHub",
+                  "description": "desc", "similarity_score": 0.2} for i in range(100)],
+    }
+    runs = 5
+    root = tempfile.mkdtemp(prefix="perf_job_results_")
+    try:
+        start = time.perf_counter()
+        for r in range(runs):
+            save_recommended_resources(recommended, os.path.join(root, f"files_{r}"))
+        files_time = (time.perf_counter() - start) / runs
+
+        start = time.perf_counter()
+        for r in range(runs):
+            file_utils.append_job_results(os.path.join(root, f"store_{r}", "results.jsonl"), "recommended", recommended)
+        store_time = (time.perf_counter() - start) / runs
+
+        def contents(data):
+            with zipfile.ZipFile(io.BytesIO(data)) as zf:
+                return {name: zf.read(name) for name in zf.namelist()}
+
+        files_zip = b"".join(file_utils.iter_zip_stream(os.path.join(root, "files_0")))
+        loaded = file_utils.load_job_results(os.path.join(root, "store_0", "results.jsonl"), "recommended")
+        store_zip = b"".join(file_utils.iter_zip_stream_from_entries(render_recommended_resources(loaded)))
+        same = contents(files_zip) == contents(store_zip)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "module": "file_utils.append_job_results",
+        "status": "ok" if same else "mismatch",
+        "resources": sum(len(v) for v in recommended.values()),
+        "per_file_avg_time": files_time,
+        "jsonl_avg_time": store_time,
+        "per_file_files_per_job": sum(len(v) for v in recommended.values()) + len(recommended),
+        "jsonl_files_per_job": 1,
+    }
+
+
+def test_cleanup_worker() -> Dict[str, Any]:
+    """
+    用户数据清理：请求线程内直接删除（cleanup_user_data）vs 放入后台清理队列（schedule_job_cleanup），
+    比较请求线程的耗时，并检查后台线程最终删除了全部数据
+    """
+    import shutil
+    import tempfile
+    from backend.utils import file_utils, cleanup_worker
+
+    def make_jobs(base, n_jobs):
+        for j in range(n_jobs):
+            for data_dir in ("uploads", "results", "outputs"):
+                folder = os.path.join(base, "data", data_dir, f"job_{j}", "txt")
+                os.makedirs(folder)
+                for i in range(50):
+                    with open(os.path.join(folder, f"{i}.txt"), "w", encoding="utf-8") as f:
+                        f.write("content " * 100)
+
+    n_jobs = 20
+    inline_base = tempfile.mkdtemp(prefix="perf_cleanup_inline_")
+    queued_base = tempfile.mkdtemp(prefix="perf_cleanup_queued_")
+    try:
+        make_jobs(inline_base, n_jobs)
+        start = time.perf_counter()
+        for j in range(n_jobs):
+            file_utils.cleanup_user_data(f"job_{j}", inline_base)
+        inline_time = time.perf_counter() - start
+
+        make_jobs(queued_base, n_jobs)
+        cleanup_worker.start_cleanup_worker(queued_base, ttl_seconds=None)
+        start = time.perf_counter()
+        for j in range(n_jobs):
+            cleanup_worker.schedule_job_cleanup(f"job_{j}", base_dir=queued_base)
+        queued_time = time.perf_counter() - start
+        cleanup_worker.wait_for_cleanup(timeout=30)
+        drain_time = time.perf_counter() - start
+        cleanup_worker.stop_cleanup_worker()
+        left = sum(len(os.listdir(os.path.join(queued_base, "data", d))) for d in ("uploads", "results", "outputs"))
+    finally:
+        shutil.rmtree(inline_base, ignore_errors=True)
+        shutil.rmtree(queued_base, ignore_errors=True)
+
+    return {
+        "module": "cleanup_worker.schedule_job_cleanup",
+        "status": "ok" if left == 0 else "leftover",
+        "jobs": n_jobs,
+        "inline_request_time": inline_time,
+        "queued_request_time": queued_time,
+        "background_drain_time": drain_time,
+        "stats": cleanup_worker.get_cleanup_stats(),
+    }
+
+
+def test_job_manager() -> Dict[str, Any]:
+    """
+    任务管理：一次提交超过 工作线程数+队列深度 的任务，
+    检查同时运行的任务数不超过工作线程数、超出队列深度的任务被拒绝，并统计总耗时
+    """
+    import threading
+    from backend.utils import job_manager
+
+    try:
+        job_manager.configure_job_manager(workers=2, max_queue_depth=4)
+    except RuntimeError:
+        pass
+    stats = job_manager.get_job_manager_stats()
+    n_submit = stats["workers"] + stats["max_queue_depth"] + 3
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def run(emit):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        for step in range(5):
+            emit({"progress": step * 20, "step": f"step_{step}"})
+            time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+
+    start = time.perf_counter()
+    jobs = []
+    rejected = 0
+    for i in range(n_submit):
+        try:
+            jobs.append(job_manager.submit_job(f"perf_job_{i}", run))
+        except job_manager.JobQueueFull:
+            rejected += 1
+    events = sum(len(list(job_manager.iter_job_events(job))) for job in jobs)
+    total = time.perf_counter() - start
+    ok = peak[0] <= stats["workers"] and events == 5 * len(jobs) and all(job["state"] == "done" for job in jobs)
+
+    return {
+        "module": "job_manager.submit_job",
+        "status": "ok" if ok else "mismatch",
+        "workers": stats["workers"],
+        "max_queue_depth": stats["max_queue_depth"],
+        "submitted": n_submit,
+        "accepted": len(jobs),
+        "rejected": rejected,
+        "peak_running": peak[0],
+        "total_time": total,
+    }
+
+
+def test_progress_channel() -> Dict[str, Any]:
+    """
+    进度事件传递：原先共享列表 + 每0.1秒轮询 vs 基于 queue.Queue 的进度通道（阻塞等待），
+    比较事件从发布到订阅者收到的延迟，并检查多个订阅者收到的事件序列一致
+    """
+    import threading
+    from backend.utils import progress_channel
+
+    n_events = 50
+    interval = 0.005
+
+    def publish_events(publish):
+        for i in range(n_events):
+            publish({"i": i, "t": time.perf_counter()})
+            time.sleep(interval)
+
+    # 原实现：共享列表 + pop(0) + 固定间隔轮询
+    events = []
+    done = threading.Event()
+    polling_latency = []
+    wakeups = [0]
+
+    def poll():
+        while not done.is_set() or events:
+            while events:
+                polling_latency.append(time.perf_counter() - events.pop(0)["t"])
+            wakeups[0] += 1
+            time.sleep(0.1)
+
+    poller = threading.Thread(target=poll)
+    poller.start()
+    publish_events(events.append)
+    done.set()
+    poller.join()
+
+    # 进度通道：两个订阅者
+    channel = progress_channel.new_progress_channel()
+    received = {0: [], 1: []}
+    channel_latency = []
+
+    def subscribe(k):
+        for item in progress_channel.iter_channel(channel):
+            seq, event = item
+            received[k].append(seq)
+            if k == 0:
+                channel_latency.append(time.perf_counter() - event["t"])
+
+    subscribers = [threading.Thread(target=subscribe, args=(k,)) for k in (0, 1)]
+    for t in subscribers:
+        t.start()
+    time.sleep(0.01)
+    publish_events(lambda event: progress_channel.publish(channel, event))
+    progress_channel.close_channel(channel)
+    for t in subscribers:
+        t.join()
+    same = received[0] == received[1] == list(range(n_events))
+
+    return {
+        "module": "progress_channel.iter_channel",
+        "status": "ok" if same and len(polling_latency) == n_events else "mismatch",
+        "events": n_events,
+        "polling_avg_latency": sum(polling_latency) / len(polling_latency),
+        "polling_wakeups": wakeups[0],
+        "channel_avg_latency": sum(channel_latency) / len(channel_latency),
+        "channel_max_latency": max(channel_latency),
+    }
+
+
+def _stub_pipeline_stages(calls: Dict[str, int]) -> Dict[str, Any]:
+    """
+    处理流水线中资源搜索、推荐筛选、摘要生成的桩函数（不访问网络），按 app 中的名字返回，
+    调用次数记在 calls 的 "search"、"recommend"、"summaries" 中
+    """
+    def fake_search(keywords, max_per_type=20, progress_callback=None):
+        calls["search"] += 1
+        if progress_callback:
+            progress_callback({"type": "txt", "done": 1, "total": 1})
+        return {
+            resource_type: [{"title": f"{resource_type} {i}", "url": f"https://example.com/{resource_type}/{i}",
+                             "source": "stub", "description": "stub resource"} for i in range(3)]
+            for resource_type in ("txt", "video", "code")
+        }
+
+    def fake_recommend(upload_path, all_resources, **kwargs):
+        calls["recommend"] += 1
+        return {
+            resource_type: [{**res, "resource_id": f"{resource_type}-{i}", "similarity_score": 0.5}
+                            for i, res in enumerate(resources)]
+            for resource_type, resources in all_resources.items()
+        }
+
+    def fake_summaries(resources, resource_types, memo=None, on_result=None, **kwargs):
+        results = []
+        for i, res in enumerate(resources):
+            result = memo["results"].get(res["resource_id"]) if memo is not None else None
+            if result is None:
+                calls["summaries"] += 1
+                result = {"summary": f"summary of {res['title']}", "summary_type": "stub"}
+                if memo is not None:
+                    memo["results"][res["resource_id"]] = result
+            if on_result:
+                on_result(i, result)
+            results.append(result)
+        return results
+
+    return {
+        "search_all_resources": fake_search,
+        "recommend_best_resources": fake_recommend,
+        "generate_resource_summaries": fake_summaries,
+    }
+
+
+def test_reupload_incremental() -> Dict[str, Any]:
+    """
+    通过接口走完 上传 → 处理 → 下载（触发清理）→ 追加一章后重新上传 → 处理：
+    增量关键词状态在下载后的清理中保留，第二次处理只对新增的文档分词；手动清理时删除状态
+    （资源搜索、推荐、摘要用桩函数代替）
+    """
+    import io
+    import json
+    import random
+    import zipfile
+    import app as web_app
+    from backend.core import keyword_extractor as ke
+    from backend.utils.cleanup_worker import wait_for_cleanup
+
+    rng = random.Random(13)
+    topics = ("reinforcement learning policy gradient reward function value network markov decision process "
+              "bellman equation exploration exploitation temporal difference actor critic").split()
+    chapters = {f"chapter{i:02d}.txt": " ".join(rng.choice(topics) for _ in range(300)) for i in range(11)}
+    first_upload = dict(list(chapters.items())[:10])
+
+    folder_name = f"perf_reupload_{os.getpid()}"
+    state_path = os.path.join(web_app.KEYWORD_STATE_DIR, f"{folder_name}.pkl")
+    calls = {"search": 0, "recommend": 0, "summaries": 0}
+    tokenized = [0]
+    count_terms = ke.count_terms
+
+    def counting_count_terms(text):
+        tokenized[0] += 1
+        return count_terms(text)
+
+    patched = _stub_pipeline_stages(calls)
+    originals = {name: getattr(web_app, name) for name in patched}
+    client = web_app.app.test_client()
+
+    def upload(files):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            for name, text in files.items():
+                zf.writestr(name, text)
+        buf.seek(0)
+        response = client.post("/upload", data={"folder": (buf, f"{folder_name}.zip")},
+                               content_type="multipart/form-data")
+        return response.status_code
+
+    def process():
+        tokenized[0] = 0
+        response = client.post("/process", json={"folder_name": folder_name})
+        body = response.get_data(as_text=True)
+        response.close()
+        events = [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+        return any(event.get("step") == "complete" for event in events), tokenized[0]
+
+    def download():
+        response = client.get(f"/download/{folder_name}")
+        response.get_data()
+        response.close()  # 触发下载后的清理
+        wait_for_cleanup(timeout=10)
+
+    try:
+        for name, value in patched.items():
+            setattr(web_app, name, value)
+        ke.count_terms = counting_count_terms
+
+        start = time.perf_counter()
+        first_status = upload(first_upload)
+        first_ok, first_tokenized = process()
+        download()
+        first_time = time.perf_counter() - start
+        state_kept = os.path.isfile(state_path)
+
+        start = time.perf_counter()
+        second_status = upload(chapters)
+        second_ok, second_tokenized = process()
+        download()
+        second_time = time.perf_counter() - start
+    finally:
+        ke.count_terms = count_terms
+        for name, value in originals.items():
+            setattr(web_app, name, value)
+        client.post(f"/cleanup/{folder_name}")
+        wait_for_cleanup(timeout=10)
+    state_removed = not os.path.exists(state_path)
+
+    ok = (
+        first_status == second_status == 200 and first_ok and second_ok
+        and first_tokenized == len(first_upload) and second_tokenized == 1
+        and state_kept and state_removed
+    )
+    return {
+        "module": "app.keyword_state_reupload",
+        "status": "ok" if ok else "mismatch",
+        "first_tokenized": first_tokenized,
+        "second_tokenized": second_tokenized,
+        "state_kept_after_download": state_kept,
+        "state_removed_on_cleanup": state_removed,
+        "first_time": first_time,
+        "second_time": second_time,
+    }
+
+
+def test_process_job_events() -> Dict[str, Any]:
+    """
+    处理流水线的事件顺序（关键词提取、搜索、推荐、摘要都用桩函数代替）：
+    "complete" 在各资源的 "summary" 事件之前发出，事件流以 "summaries_done" 结束；
+    同一输入再次运行时每个阶段发出 "checkpoint" 事件并直接使用检查点，不再调用各阶段；
+    上传数据清理后仍可按指纹完全从检查点恢复
+    """
+    import shutil
+    import zipfile
+    import tempfile
+    import app as web_app
+
+    calls = {"keywords": 0, "search": 0, "recommend": 0, "summaries": 0}
+
+    def fake_extract(*args, **kwargs):
+        calls["keywords"] += 1
+        return ["reinforcement learning", "policy gradient", "reward"]
+
+    root = tempfile.mkdtemp(prefix="perf_process_job_")
+    folder_name = f"perf_job_{os.getpid()}"
+    patched = {
+        "RESULTS_DIR": os.path.join(root, "results"),
+        "extract_keywords_from_folder": fake_extract,
+        **_stub_pipeline_stages(calls),
+    }
+    originals = {name: getattr(web_app, name) for name in patched}
+    runs = []
+    try:
+        zip_path = os.path.join(root, "upload.zip")
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            for i in range(3):
+                zf.writestr(f"doc{i}.txt", f"chapter {i} about reinforcement learning and policy gradient")
+        corpus = {"zip_path": zip_path, "zip_sha256": web_app.file_sha256(zip_path),
+                  "txt_members": [f"doc{i}.txt" for i in range(3)], "converted": []}
+        for name, value in patched.items():
+            setattr(web_app, name, value)
+
+        for mode in ("fresh", "resumed", "restored"):
+            events = []
+            if mode == "restored":
+                fingerprint = web_app.completed_checkpoint_fingerprint(folder_name)
+                web_app.run_process_job(folder_name, None, None, None, events.append, fingerprint)
+            else:
+                web_app.run_process_job(folder_name, None, corpus, root, events.append)
+            runs.append((mode, events, dict(calls)))
+    finally:
+        for name, value in originals.items():
+            setattr(web_app, name, value)
+        web_app.forget_job_summaries(folder_name)
+        shutil.rmtree(root, ignore_errors=True)
+
+    n_resources = 9
+    report = {"module": "app.run_process_job", "status": None}
+    ok = True
+    for mode, events, calls_after in runs:
+        steps = [event.get("step") or event.get("type") for event in events]
+        summary_positions = [i for i, step in enumerate(steps) if step == "summary"]
+        checkpoints = [event["stage"] for event in events if event.get("type") == "checkpoint"]
+        order_ok = (
+            "complete" in steps
+            and len(summary_positions) == n_resources
+            and steps.index("complete") < min(summary_positions)
+            and steps[-1] == "summaries_done"
+            and "error" not in steps
+        )
+        expected_checkpoints = [] if mode == "fresh" else list(web_app.PIPELINE_STAGES)
+        # 从检查点恢复时各阶段（包括摘要生成）都不再调用
+        expected_calls = {"keywords": 1, "search": 1, "recommend": 1, "summaries": n_resources}
+        run_ok = order_ok and checkpoints == expected_checkpoints and calls_after == expected_calls
+        ok = ok and run_ok
+        report[f"{mode}_events"] = len(events)
+        report[f"{mode}_checkpoints"] = checkpoints
+        report[f"{mode}_ok"] = run_ok
+    report["status"] = "ok" if ok and len(runs) == 3 else "mismatch"
+    return report
+
+
+def test_job_checkpoint() -> Dict[str, Any]:
+    """
+    流水线检查点：保存/读取搜索结果阶段的检查点（gzip压缩的JSON），
+    记录耗时和压缩后大小，并检查输入指纹不一致时检查点作废
+    """
+    import json
+    import shutil
+    import tempfile
+    from backend.utils import file_utils
+
+    all_resources = {
+        "txt": [{"title": f"Resource {i}", "url": f"https://example.com/{i}", "source": "web",
+                 "content": f"resource {i} " + "machine learning content " * 400} for i in range(60)],
+        "video": [{"title": f"Video {i}", "url": f"https://youtube.com/{i}", "description": "desc " * 40}
+                  for i in range(60)],
+        "code": [{"title": f"repo-{i}", "url": f"https://github.com/{i}", "source": "GitHub",
+                  "description": "desc " * 20} for i in range(60)],
+    }
+    root = tempfile.mkdtemp(prefix="perf_checkpoint_")
+    try:
+        save_stats = time_function(file_utils.save_job_checkpoint, root, "search", "fp1", all_resources, repeat=5)
+        load_stats = time_function(file_utils.load_job_checkpoint, root, "search", "fp1", repeat=5)
+        restored = file_utils.load_job_checkpoint(root, "search", "fp1")
+        stale = file_utils.load_job_checkpoint(root, "search", "fp2")
+        checkpoint_bytes = os.path.getsize(os.path.join(root, "search.json.gz"))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "module": "file_utils.save_job_checkpoint",
+        "status": "ok" if restored == all_resources and stale is None else "mismatch",
+        "save_avg_time": save_stats["avg_time"],
+        "load_avg_time": load_stats["avg_time"],
+        "json_kb": len(json.dumps(all_resources, ensure_ascii=False).encode("utf-8")) / 1024,
+        "checkpoint_kb": checkpoint_bytes / 1024,
     }
 
 
@@ -149,8 +1673,32 @@ def main():
     # 你可以按需启用/关闭某些测试
     tests = [
         ("keyword_extractor", test_keyword_extractor),
+        ("noise_filter", test_noise_filter),
+        ("semantic_scores", test_semantic_scores),
+        ("idf_model", test_idf_model),
+        ("keyword_chunking", test_keyword_chunking),
+        ("incremental_keywords", test_incremental_keywords),
         ("recommender", test_recommender),
-        # TODO: 后续可添加 resource_searcher / ai_summarizer 的性能测试
+        ("ai_summarizer", test_ai_summarizer),
+        ("summary_cache", test_summary_cache),
+        ("packed_summaries", test_packed_summaries),
+        ("extractive_summaries", test_extractive_summaries),
+        ("pdf_conversion", test_pdf_conversion),
+        ("pdf_streaming", test_pdf_streaming),
+        ("pdf_cache", test_pdf_cache),
+        ("zip_ingestion", test_zip_ingestion),
+        ("folder_index", test_folder_index),
+        ("upload_stream", test_upload_stream),
+        ("zip_download", test_zip_download),
+        ("job_results", test_job_results),
+        # 导入 app 时会配置任务管理器，需在 job_manager 测试启动工作线程之前运行
+        ("process_job_events", test_process_job_events),
+        ("reupload_incremental", test_reupload_incremental),
+        ("cleanup_worker", test_cleanup_worker),
+        ("job_manager", test_job_manager),
+        ("progress_channel", test_progress_channel),
+        ("job_checkpoint", test_job_checkpoint),
+        # TODO: 后续可添加 resource_searcher 的性能测试
     ]
 
     for name, fn in tests: